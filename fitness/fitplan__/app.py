@@ -1,6 +1,11 @@
-import streamlit as st
-import requests
+import os
+import re
+import threading
 import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
 
 # --- 1. SET PAGE CONFIG ---
 st.set_page_config(
@@ -11,58 +16,101 @@ st.set_page_config(
 )
 
 # --- 2. CUSTOM UI THEMING (CSS) ---
-st.markdown("""
-    <style>
-    .stApp { background-color: #0E1117; color: #FFFFFF; }
-    
-    .main-card {
-        background: rgba(255, 255, 255, 0.05);
-        padding: 30px;
-        border-radius: 20px;
-        border: 1px solid rgba(255, 255, 255, 0.1);
-        backdrop-filter: blur(10px);
-        margin-bottom: 25px;
-    }
+@st.cache_resource
+def load_css():
+    # Read and minified once per server process, not on every rerun
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "style.css"), encoding="utf-8") as f:
+        css = re.sub(r"/\*.*?\*/", "", f.read(), flags=re.S)
+    css = re.sub(r"\s*([{};,>])\s*", r"\1", re.sub(r"\s+", " ", css)).strip()
+    return f"<style>{css}</style>"
 
-    .stButton>button {
-        width: 100%;
-        border-radius: 12px;
-        height: 3em;
-        background: linear-gradient(90deg, #00DBDE 0%, #FC00FF 100%);
-        color: white !important;
-        font-weight: bold;
-        border: none;
-    }
 
-    /* Specialized Cards for Results */
-    .diet-item {
-        background: rgba(29, 38, 113, 0.3);
-        padding: 15px;
-        border-radius: 12px;
-        border-left: 5px solid #C33764;
-        margin-bottom: 10px;
-    }
-    
-    .workout-day {
-        background: rgba(0, 242, 96, 0.1);
-        padding: 15px;
-        border-radius: 12px;
-        border-top: 3px solid #00F260;
-        margin-bottom: 10px;
-    }
-
-    [data-testid="stMetricValue"] { color: #00DBDE !important; }
-    </style>
-    """, unsafe_allow_html=True)
+st.markdown(load_css(), unsafe_allow_html=True)
 
 # --- 3. SESSION STATE ---
 if 'logged_in' not in st.session_state:
     st.session_state.logged_in = False
 
 # --- 4. API INTEGRATION ---
-def get_plan_from_api(age, weight, height, gender, preference):
-    # This connects to the Flask backend we updated
-    API_URL = "http://localhost:5000/api/generate-plan"
+API_BASE_URL = os.environ.get("FITPLAN_API_URL", "http://localhost:5000")
+# (connect, read) timeouts in seconds, so a slow backend can't hang the page
+API_TIMEOUT = (
+    float(os.environ.get("FITPLAN_API_CONNECT_TIMEOUT", 3.05)),
+    float(os.environ.get("FITPLAN_API_READ_TIMEOUT", 10)),
+)
+API_RETRIES = int(os.environ.get("FITPLAN_API_RETRIES", 2))
+# Client-side plan cache: a plan depends only on the form inputs, so it is
+# shared by every session on this server
+PLAN_CACHE_TTL = int(os.environ.get("FITPLAN_CLIENT_CACHE_TTL", 600))
+PLAN_CACHE_ENTRIES = int(os.environ.get("FITPLAN_CLIENT_CACHE_ENTRIES", 1024))
+
+
+@st.cache_resource
+def get_http_session():
+    # requests is imported here, on the first plan fetch, so the login page
+    # renders without it. One keep-alive pool is shared by every session.
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    retry = Retry(
+        total=API_RETRIES,
+        backoff_factor=0.3,
+        status_forcelist=[502, 503, 504],
+        allowed_methods=["GET", "POST"],  # plan generation is idempotent
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=32, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+@st.cache_resource
+def get_request_executor():
+    return ThreadPoolExecutor(max_workers=16, thread_name_prefix="fitplan-api")
+
+
+class CachedInputs:
+    """
+    The form inputs render_plan's cache holds (same TTL and size), so a hit
+    needs no background request. Shared by every session, like the cache.
+    """
+
+    def __init__(self, ttl, maxsize):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._added = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, inputs):
+        with self._lock:
+            self._added[inputs] = time.monotonic()
+            self._added.move_to_end(inputs)
+            while len(self._added) > self.maxsize:
+                self._added.popitem(last=False)
+
+    def __contains__(self, inputs):
+        with self._lock:
+            added = self._added.get(inputs)
+            if added is None:
+                return False
+            if time.monotonic() - added >= self.ttl:
+                del self._added[inputs]
+                return False
+            self._added.move_to_end(inputs)
+            return True
+
+
+@st.cache_resource
+def get_cached_inputs():
+    return CachedInputs(PLAN_CACHE_TTL, PLAN_CACHE_ENTRIES)
+
+
+def fetch_plan(age, weight, height, gender, preference):
+    # This connects to the Flask backend we updated. Not cached itself (it
+    # runs on executor threads, outside Streamlit's script context); the
+    # cache is render_plan's. Failures raise, so they are never cached.
     payload = {
         "age": age,
         "weight": weight,
@@ -70,13 +118,62 @@ def get_plan_from_api(age, weight, height, gender, preference):
         "gender": gender,
         "dietary_preference": preference
     }
+    response = get_http_session().post(f"{API_BASE_URL}/api/generate-plan", json=payload, timeout=API_TIMEOUT)
+    response.raise_for_status()
+    return response.json()
+
+
+DIET_ITEM_HTML = """
+    <div class="diet-item">
+        <strong>{}</strong><br>
+        <small>{}</small>
+    </div>
+"""
+WORKOUT_DAY_HTML = """
+    <div class="workout-day">
+        <strong>{}</strong><br>
+        <small>{}</small>
+    </div>
+"""
+
+
+@st.cache_data(ttl=PLAN_CACHE_TTL, max_entries=PLAN_CACHE_ENTRIES, show_spinner=False)
+def render_plan(age, weight, height, gender, preference, _pending=None):
+    """
+    Fetch a plan and pre-render its result cards; cached per form input.
+    `_pending` (not part of the cache key) is an in-flight fetch_plan()
+    future to use on a cache miss instead of fetching again.
+    """
+    data = _pending.result() if _pending is not None else fetch_plan(age, weight, height, gender, preference)
+    days = list(data['workout_plan'].items())
+    get_cached_inputs().add((age, weight, height, gender, preference))
+    return {
+        "nutrition": data['nutritional_plan'],
+        "diet_html": "".join(DIET_ITEM_HTML.format(meal, desc) for meal, desc in data['diet_plan'].items()),
+        # Split workout into two mini-columns for better fit
+        "workout_html": (
+            "".join(WORKOUT_DAY_HTML.format(day, act) for day, act in days[:4]),
+            "".join(WORKOUT_DAY_HTML.format(day, act) for day, act in days[4:]),
+        ),
+    }
+
+
+def get_rendered_plan(inputs, pending=None):
+    """render_plan() on the script thread, where st.cache_data works; None on failure."""
+    from requests import RequestException
+
     try:
-        response = requests.post(API_URL, json=payload)
-        if response.status_code == 200:
-            return response.json()
-    except:
+        return render_plan(*inputs, _pending=pending)
+    except (RequestException, ValueError, KeyError):
         return None
 
+
+def request_plan(inputs):
+    """Start the API call in the background; returns a Future, or None when render_plan has it cached."""
+    if inputs in get_cached_inputs():
+        return None
+    return get_request_executor().submit(fetch_plan, *inputs)
+
 # --- 5. PAGE: LOGIN ---
 def show_login():
     _, col, _ = st.columns([1, 1.5, 1])
@@ -99,6 +196,7 @@ def show_dashboard():
     with c2:
         if st.button("Sign Out"):
             st.session_state.logged_in = False
+            st.session_state.pop("plan_inputs", None)
             st.rerun()
 
     # Input Section
@@ -117,18 +215,28 @@ def show_dashboard():
         generate = st.button("GENERATE MY 7-DAY PLAN")
         st.markdown('</div>', unsafe_allow_html=True)
 
-    # Output Section
-    if generate:
+    # Output Section: keep showing the last plan across reruns until the inputs change
+    inputs = (age, weight, height, gender, diet_pref)
+    if generate or st.session_state.get("plan_inputs") == inputs:
+        # Uncached inputs: fire the request first, then lay out the page while
+        # it is in flight. Cached ones come straight from render_plan.
+        pending = request_plan(inputs)
+
+        # --- ROW 1: MACROS ---
+        st.markdown("### 📊 Nutritional Targets")
+        m1, m2, m3, m4 = (col.empty() for col in st.columns(4))
+        for slot, label in ((m1, "Calories"), (m2, "Protein"), (m3, "Carbs"), (m4, "Fats")):
+            slot.metric(label, "…")
+
         with st.spinner("Syncing with ZenFlow Engine..."):
-            data = get_plan_from_api(age, weight, height, gender, diet_pref)
+            view = get_rendered_plan(inputs, pending)
             
-            if data:
-                st.balloons()
+            if view:
+                if generate:
+                    st.balloons()
+                st.session_state.plan_inputs = inputs
                 
-                # --- ROW 1: MACROS ---
-                st.markdown("### 📊 Nutritional Targets")
-                nutri = data['nutritional_plan']
-                m1, m2, m3, m4 = st.columns(4)
+                nutri = view['nutrition']
                 m1.metric("Calories", f"{nutri['daily_calories']} kcal")
                 m2.metric("Protein", f"{nutri['macros']['protein_g']}g")
                 m3.metric("Carbs", f"{nutri['macros']['carbs_g']}g")
@@ -141,29 +249,13 @@ def show_dashboard():
                 
                 with res_col1:
                     st.subheader("🍴 Daily Diet Plan")
-                    for meal, desc in data['diet_plan'].items():
-                        st.markdown(f"""
-                            <div class="diet-item">
-                                <strong>{meal}</strong><br>
-                                <small>{desc}</small>
-                            </div>
-                        """, unsafe_allow_html=True)
+                    st.markdown(view['diet_html'], unsafe_allow_html=True)
                 
                 with res_col2:
                     st.subheader("🏋️ 7-Day Workout Schedule")
-                    workout = data['workout_plan']
-                    # Split workout into two mini-columns for better fit
                     w_left, w_right = st.columns(2)
-                    days = list(workout.items())
-                    
-                    for i, (day, act) in enumerate(days):
-                        target = w_left if i < 4 else w_right
-                        target.markdown(f"""
-                            <div class="workout-day">
-                                <strong>{day}</strong><br>
-                                <small>{act}</small>
-                            </div>
-                        """, unsafe_allow_html=True)
+                    w_left.markdown(view['workout_html'][0], unsafe_allow_html=True)
+                    w_right.markdown(view['workout_html'][1], unsafe_allow_html=True)
             else:
                 st.error("Connection Error: Is the Flask backend running?")
 
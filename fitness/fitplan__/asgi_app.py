@@ -0,0 +1,270 @@
+"""
+ASGI Serving Mode - same API as backend_api.py on Starlette
+The routes call the framework-neutral handlers from backend_api, so both
+serving modes return identical responses and share the same caches.
+Those handlers are synchronous: they read SQLite, wait on the user store's
+group commit and run NumPy batches. Every route reads its body on the event
+loop and runs the handler in the threadpool (_run), so a slow request never
+blocks the others.
+Run with: python run_asgi.py  (or: uvicorn asgi_app:app)
+"""
+
+import json
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Route
+
+import backend_api
+from metrics import MetricsMiddleware, mark
+
+
+def _encode_body(body) -> bytes:
+    # Same bytes Flask's jsonify produces for a dict
+    if isinstance(body, bytes):
+        return body
+    return json.dumps(body, sort_keys=True, separators=(",", ":")).encode("ascii") + b"\n"
+
+
+def _response(body, status: int, headers=None) -> Response:
+    return Response(_encode_body(body), status_code=status, headers=headers, media_type="application/json")
+
+
+def _respond(body, status: int, headers=None) -> Response:
+    mark("handler")
+    response = _response(body, status, headers)
+    mark("serialization")
+    return response
+
+
+def _binary_type(request: Request):
+    return backend_api.negotiate_binary(request.headers.get("accept"))
+
+
+def _negotiated(request: Request, body, status: int, headers=None) -> Response:
+    mark("handler")
+    body, headers = backend_api.compress_response(body, headers, request.headers.get("accept-encoding"))
+    response = _response(body, status, headers)
+    mark("serialization")
+    return response
+
+
+async def _read_json(request: Request):
+    try:
+        data = json.loads(await request.body())
+    except ValueError:
+        data = None
+    mark("parse")
+    return data
+
+
+async def _run(handler, *args):
+    """Call a backend_api handler in Starlette's threadpool, off the event loop."""
+    return await run_in_threadpool(handler, *args)
+
+
+def _bad_json() -> Response:
+    return _respond({"message": "Invalid JSON body"}, 400)
+
+
+async def generate_plan(request: Request) -> Response:
+    if request.method == "GET":
+        # Profile in the query string, so HTTP caches can store it
+        data, if_none_match = dict(request.query_params), request.headers.get("if-none-match")
+        mark("parse")
+    else:
+        data, if_none_match = await _read_json(request), None
+        if data is None:
+            return _bad_json()
+    return _negotiated(request, *await _run(backend_api.plan_response, data, _binary_type(request), if_none_match))
+
+
+async def generate_plans(request: Request) -> Response:
+    mimetype = request.headers.get("content-type", "").split(";")[0].strip()
+    profiles = await _run(backend_api.parse_batch_body, mimetype, await request.body())
+    mark("parse")
+    return _negotiated(request, *await _run(backend_api.batch_plan_response, profiles, _binary_type(request)))
+
+
+async def meal_plan(request: Request) -> Response:
+    data = await _read_json(request)
+    if data is None:
+        return _bad_json()
+    return _respond(*await _run(backend_api.meal_plan_response, data))
+
+
+async def meal_plans(request: Request) -> Response:
+    mimetype = request.headers.get("content-type", "").split(";")[0].strip()
+    profiles = await _run(backend_api.parse_batch_body, mimetype, await request.body())
+    mark("parse")
+    return _respond(*await _run(backend_api.meal_plans_response, profiles))
+
+
+async def catalog(request: Request) -> Response:
+    return _negotiated(request, *await _run(backend_api.catalog_response,
+        _binary_type(request), request.headers.get("if-none-match"), request.query_params.get("version")
+    ))
+
+
+async def cache_stats(request: Request) -> Response:
+    return _respond(*await _run(backend_api.cache_stats_response))
+
+
+async def metrics(request: Request) -> Response:
+    return _respond(*await _run(backend_api.metrics_response))
+
+
+async def signup(request: Request) -> Response:
+    data = await _read_json(request)
+    if data is None:
+        return _bad_json()
+    return _respond(*await _run(backend_api.signup_response, data))
+
+
+async def login(request: Request) -> Response:
+    data = await _read_json(request)
+    if data is None:
+        return _bad_json()
+    return _respond(*await _run(backend_api.login_response, data))
+
+
+async def logout(request: Request) -> Response:
+    token = backend_api.bearer_token(request.headers.get("authorization"))
+    return _respond(*await _run(backend_api.logout_response, token))
+
+
+def _request_email(request: Request):
+    return backend_api.token_email(backend_api.bearer_token(request.headers.get("authorization")))
+
+
+async def add_progress(request: Request) -> Response:
+    data = await _read_json(request)
+    if data is None:
+        return _bad_json()
+    return _respond(*await _run(backend_api.progress_add_response, _request_email(request), data))
+
+
+async def progress_summary(request: Request) -> Response:
+    return _respond(*await _run(backend_api.progress_summary_response, _request_email(request)))
+
+
+async def progress_series(request: Request) -> Response:
+    return _respond(*await _run(backend_api.progress_series_response,
+        _request_email(request), request.query_params.get("period", "day"), request.query_params.get("limit", 30)
+    ))
+
+
+
+async def analytics_summary(request: Request) -> Response:
+    return _respond(*await _run(backend_api.analytics_response, "summary"))
+
+
+async def analytics_counts(request: Request) -> Response:
+    return _respond(*await _run(backend_api.analytics_response, "value_counts", request.path_params["column"]))
+
+
+async def analytics_group_mean(request: Request) -> Response:
+    q = request.query_params
+    return _respond(*await _run(backend_api.analytics_response, "group_mean", q.get("by", ""), q.get("column", "")))
+
+
+async def analytics_crosstab(request: Request) -> Response:
+    q = request.query_params
+    return _respond(*await _run(backend_api.analytics_response, "crosstab", q.get("rows", ""), q.get("columns", "")))
+
+
+async def analytics_histogram(request: Request) -> Response:
+    return _respond(*await _run(backend_api.analytics_histogram_response,
+        request.path_params["column"], request.query_params.get("bins", 10)
+    ))
+
+
+async def analytics_correlation(request: Request) -> Response:
+    return _respond(*await _run(backend_api.analytics_correlation_response, request.query_params.get("columns")))
+
+
+async def analytics_append(request: Request) -> Response:
+    data = await _read_json(request)
+    if data is None:
+        return _bad_json()
+    return _respond(*await _run(backend_api.analytics_append_response, request.headers.get("authorization"), data))
+
+
+async def similar_profiles(request: Request) -> Response:
+    data = await _read_json(request)
+    if data is None:
+        return _bad_json()
+    return _respond(*await _run(backend_api.similar_profiles_response, data, request.query_params.get("k", 10)))
+
+
+async def profile_start(request: Request) -> Response:
+    try:
+        data = json.loads(await request.body() or b"null")
+    except ValueError:
+        data = None
+    if not isinstance(data, dict):
+        data = dict(request.query_params)
+    return _respond(*await _run(backend_api.profile_start_response, request.headers.get("authorization"), data))
+
+
+async def profile_stop(request: Request) -> Response:
+    return _respond(*await _run(backend_api.profile_stop_response, request.headers.get("authorization")))
+
+
+async def profile_status(request: Request) -> Response:
+    return _respond(*await _run(backend_api.profile_status_response, request.headers.get("authorization")))
+
+
+async def profile_stacks(request: Request) -> Response:
+    return _respond(*await _run(backend_api.profile_stacks_response, request.headers.get("authorization")))
+
+
+async def catalog_reload(request: Request) -> Response:
+    return _respond(*await _run(backend_api.catalog_reload_response, request.headers.get("authorization")))
+
+
+async def catalog_status(request: Request) -> Response:
+    return _respond(*await _run(backend_api.catalog_status_response, request.headers.get("authorization")))
+
+
+app = Starlette(
+    routes=[
+        Route("/api/generate-plan", generate_plan, methods=["GET", "POST"]),
+        Route("/api/generate-plans", generate_plans, methods=["POST"]),
+        Route("/api/meal-plan", meal_plan, methods=["POST"]),
+        Route("/api/meal-plans", meal_plans, methods=["POST"]),
+        Route("/api/catalog", catalog, methods=["GET"]),
+        Route("/api/cache/stats", cache_stats, methods=["GET"]),
+        Route("/metrics", metrics, methods=["GET"]),
+        Route("/api/auth/signup", signup, methods=["POST"]),
+        Route("/api/auth/login", login, methods=["POST"]),
+        Route("/api/auth/logout", logout, methods=["POST"]),
+        Route("/api/progress", add_progress, methods=["POST"]),
+        Route("/api/progress/summary", progress_summary, methods=["GET"]),
+        Route("/api/progress/series", progress_series, methods=["GET"]),
+        Route("/api/analytics/summary", analytics_summary, methods=["GET"]),
+        Route("/api/analytics/counts/{column}", analytics_counts, methods=["GET"]),
+        Route("/api/analytics/group-mean", analytics_group_mean, methods=["GET"]),
+        Route("/api/analytics/crosstab", analytics_crosstab, methods=["GET"]),
+        Route("/api/analytics/histogram/{column}", analytics_histogram, methods=["GET"]),
+        Route("/api/analytics/correlation", analytics_correlation, methods=["GET"]),
+        Route("/api/analytics/rows", analytics_append, methods=["POST"]),
+        Route("/api/similar-profiles", similar_profiles, methods=["POST"]),
+        Route("/admin/profile/start", profile_start, methods=["POST"]),
+        Route("/admin/profile/stop", profile_stop, methods=["POST"]),
+        Route("/admin/profile", profile_status, methods=["GET"]),
+        Route("/admin/profile/stacks", profile_stacks, methods=["GET"]),
+        Route("/admin/catalog/reload", catalog_reload, methods=["POST"]),
+        Route("/admin/catalog", catalog_status, methods=["GET"]),
+    ],
+    middleware=[
+        # Outermost, so the recorded latency includes the CORS handling
+        *([Middleware(MetricsMiddleware, registry=backend_api.metrics_registry)]
+          if backend_api.app.config["METRICS"] else []),
+        Middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"]),
+    ],
+)
@@ -1,11 +1,181 @@
+import base64
+import binascii
+import calendar
+import datetime
+import hashlib
+import hmac
+import json
+import math
+import threading
 import time
+from collections import OrderedDict
 from typing import Optional
 
-import jwt
-
 SECRET_KEY = "CHANGE_THIS_SECRET_KEY_IN_PRODUCTION"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_SECONDS = 60 * 60  # 1 hour
+_URLSAFE_TO_STANDARD = bytes.maketrans(b"-_", b"+/")
+
+
+def _b64encode(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+def _b64decode(data: bytes) -> bytes:
+    """
+    Strict unpadded base64url, as PyJWT accepts it: no characters outside the
+    alphabet, no padding or trailing junk, and zero unused trailing bits, so
+    every byte string has exactly one encoding. binascii.Error otherwise.
+    """
+    decoded = base64.b64decode(data.translate(_URLSAFE_TO_STANDARD) + b"=" * (-len(data) % 4), validate=True)
+    if _b64encode(decoded) != data:
+        raise binascii.Error("non-canonical base64url")
+    return decoded
+
+
+class TokenVerifier:
+    """
+    HS256 JWT signer/verifier.
+    The HMAC key schedule is computed once and copied per token, and tokens
+    that verified successfully are cached by their decoded signature until
+    their exp, so re-checking the same token is a dictionary lookup. Revoked
+    signatures are kept in a bounded set until they expire. Segments must be
+    canonical base64url, so a token has exactly one accepted spelling and a
+    revoked token cannot be replayed with a re-encoded signature.
+    Tokens are interchangeable with PyJWT's HS256 encode/decode.
+    """
+
+    _HEADER = _b64encode(json.dumps({"alg": ALGORITHM, "typ": "JWT"}, separators=(",", ":"), sort_keys=True).encode())
+
+    def __init__(self, secret: str, max_cached: int = 10_000, max_revoked: int = 100_000):
+        key = secret.encode() if isinstance(secret, str) else secret
+        self._hmac = hmac.new(key, digestmod=hashlib.sha256)
+        self.max_cached = max_cached
+        self.max_revoked = max_revoked
+        self._cache = OrderedDict()
+        self._revoked = OrderedDict()
+        self._lock = threading.Lock()
+        self.cache_hits = 0
+        self.verifications = 0
+        self.failures = 0
+
+    def _signature(self, signing_input: bytes) -> bytes:
+        mac = self._hmac.copy()
+        mac.update(signing_input)
+        return mac.digest()
+
+    def sign(self, payload: dict) -> str:
+        claims = dict(payload)
+        for claim in ("exp", "iat", "nbf"):
+            if isinstance(claims.get(claim), datetime.datetime):
+                claims[claim] = calendar.timegm(claims[claim].utctimetuple())
+        signing_input = self._HEADER + b"." + _b64encode(json.dumps(claims, separators=(",", ":")).encode())
+        return (signing_input + b"." + _b64encode(self._signature(signing_input))).decode("ascii")
+
+    def _decode(self, token: str) -> Optional[dict]:
+        # Full verification: structure, algorithm, signature, then time claims
+        try:
+            signing_input, _, signature = token.encode("ascii").rpartition(b".")
+            header_segment, _, payload_segment = signing_input.partition(b".")
+            header = json.loads(_b64decode(header_segment))
+            if not isinstance(header, dict) or header.get("alg") != ALGORITHM or "crit" in header:
+                return None
+            if not hmac.compare_digest(_b64decode(signature), self._signature(signing_input)):
+                return None
+            payload = json.loads(_b64decode(payload_segment))
+        except (UnicodeError, ValueError, binascii.Error):
+            return None
+        if not isinstance(payload, dict):
+            return None
+
+        now = time.time()
+        exp, nbf, iat = payload.get("exp"), payload.get("nbf"), payload.get("iat")
+        for claim in (exp, nbf, iat):
+            if claim is not None and (isinstance(claim, bool) or not isinstance(claim, (int, float))
+                                      or not math.isfinite(claim)):
+                return None
+        if exp is not None and exp <= now:
+            return None
+        if nbf is not None and nbf > now:
+            return None
+        return payload
+
+    @staticmethod
+    def _key(token: str) -> Optional[bytes]:
+        # The decoded signature: what the cache and the revocation set are keyed on
+        try:
+            return _b64decode(token.encode("ascii").rpartition(b".")[2])
+        except (UnicodeError, ValueError, binascii.Error):
+            return None
+
+    def verify(self, token: str) -> Optional[dict]:
+        """Return the token's payload if it is valid and not revoked, else None."""
+        if not isinstance(token, str):
+            return None
+        key = self._key(token)
+        now = time.time()
+        with self._lock:
+            if key is None:
+                self.verifications += 1
+                self.failures += 1
+                return None
+            if key in self._revoked:
+                return None
+            cached = self._cache.get(key)
+            if cached is not None and cached[0] == token:
+                _, payload, exp = cached
+                if exp is None or exp > now:
+                    self._cache.move_to_end(key)
+                    self.cache_hits += 1
+                    return dict(payload)
+                del self._cache[key]
+
+        payload = self._decode(token)
+        with self._lock:
+            self.verifications += 1
+            if payload is None:
+                self.failures += 1
+                return None
+            if key in self._revoked:  # revoked while we were verifying
+                return None
+            self._cache[key] = (token, payload, payload.get("exp"))
+            if len(self._cache) > self.max_cached:
+                self._cache.popitem(last=False)
+        return dict(payload)
+
+    def revoke(self, token: str):
+        """Reject this token from now on (until it would have expired anyway)."""
+        key = self._key(token) if isinstance(token, str) else None
+        if key is None:
+            return  # malformed, so verify() rejects it already
+        payload = self._decode(token)
+        exp = payload.get("exp") if payload else None
+        now = time.time()
+        with self._lock:
+            self._cache.pop(key, None)
+            # Drop revocations whose tokens have expired, then enforce the bound
+            while self._revoked:
+                oldest_exp = next(iter(self._revoked.values()))
+                if oldest_exp is None or oldest_exp > now:
+                    break
+                self._revoked.popitem(last=False)
+            self._revoked[key] = exp
+            while len(self._revoked) > self.max_revoked:
+                self._revoked.popitem(last=False)
+
+    def stats(self) -> dict:
+        checks = self.cache_hits + self.verifications
+        return {
+            "cached_tokens": len(self._cache),
+            "revoked_tokens": len(self._revoked),
+            "cache_hits": self.cache_hits,
+            "verifications": self.verifications,
+            "failures": self.failures,
+            "hit_ratio": round(self.cache_hits / checks, 4) if checks else 0.0,
+        }
+
+
+_verifier = TokenVerifier(SECRET_KEY)
 
 
 def create_access_token(data: dict, expires_delta: int = ACCESS_TOKEN_EXPIRE_SECONDS) -> str:
@@ -16,21 +186,23 @@ def create_access_token(data: dict, expires_delta: int = ACCESS_TOKEN_EXPIRE_SEC
     to_encode = data.copy()
     expire = int(time.time()) + expires_delta
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-    return encoded_jwt
+    return _verifier.sign(to_encode)
 
 
 def verify_token(token: str) -> Optional[dict]:
     """
     Verify a JWT and return its payload if valid, else None.
+    Repeat checks of a token are served from the verified-token cache.
     """
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
-    except jwt.ExpiredSignatureError:
-        return None
-    except jwt.InvalidTokenError:
-        return None
+    return _verifier.verify(token)
+
+
+def revoke_token(token: str):
+    _verifier.revoke(token)
+
+
+def token_stats() -> dict:
+    return _verifier.stats()
 
 
 def is_authenticated(session_state) -> bool:
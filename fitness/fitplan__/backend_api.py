@@ -1,162 +1,1210 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify
 from flask_cors import CORS
-import jwt
 import datetime
+import hashlib
+import hmac
+import json
+import math
+import os
+import struct
+import tempfile
+import threading
+import time
+
+import health
+from auth import TokenVerifier
+from catalog import CatalogError, store as catalog_store
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsRegistry, mark
+from plan_cache import PlanCache
+from profiler import DEFAULT_INTERVAL, MAX_DURATION, MIN_INTERVAL, SamplingProfiler, install_signal_handler
+from progress import ProgressStore
+from shared_cache import open_shared_cache
+from user_store import UserRecord, open_user_store, verify_password
+from wire_format import BINARY_ENCODERS, compress_body, encode_binary, negotiate_binary
 
 app = Flask(__name__)
 CORS(app)
 
 app.config["SECRET_KEY"] = "zenflow-secret-key"
+app.config["PLAN_CACHE_SIZE"] = int(os.environ.get("FITPLAN_PLAN_CACHE_SIZE", 4096))
+app.config["PLAN_CACHE_TTL"] = float(os.environ.get("FITPLAN_PLAN_CACHE_TTL", 3600))
+
+app.config["CATALOG_WATCH"] = float(os.environ.get("FITPLAN_CATALOG_WATCH", 0))
+app.config["MEAL_PLAN_BUDGET_MS"] = float(os.environ.get("FITPLAN_MEAL_PLAN_BUDGET_MS", 20))
+app.config["PRELOAD"] = os.environ.get("FITPLAN_PRELOAD", "0") == "1"
+app.config["ADMIN_TOKEN"] = os.environ.get("FITPLAN_ADMIN_TOKEN", "")
+app.config["PROFILE_DIR"] = os.environ.get("FITPLAN_PROFILE_DIR", tempfile.gettempdir())
+# Opt-in: no signal handler is installed unless a signal is named (e.g. SIGUSR2)
+app.config["PROFILE_SIGNAL"] = os.environ.get("FITPLAN_PROFILE_SIGNAL", "")
+app.config["METRICS"] = os.environ.get("FITPLAN_METRICS", "1") != "0"
+app.config["HTTP_MAX_AGE"] = int(os.environ.get("FITPLAN_HTTP_MAX_AGE", 3600))
+app.config["SHARED_CACHE"] = os.environ.get("FITPLAN_SHARED_CACHE", "")
+app.config["USER_DB"] = os.environ.get("FITPLAN_USER_DB", "")
+app.config["PROGRESS_DIR"] = os.environ.get("FITPLAN_PROGRESS_DIR", "")
+app.config["PROGRESS_OPEN_LOGS"] = int(os.environ.get("FITPLAN_PROGRESS_OPEN_LOGS", 256))
+app.config["COHORT_CSV"] = os.environ.get(
+    "FITPLAN_COHORT_CSV", os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "fitness.csv")
+)
+app.config["COHORT_SNAPSHOT"] = os.environ.get("FITPLAN_COHORT_SNAPSHOT", "")
+
+# Encoded /api/generate-plan responses keyed on the normalized inputs
+plan_cache = PlanCache(app.config["PLAN_CACHE_SIZE"], app.config["PLAN_CACHE_TTL"])
+# Optional host-wide tier shared by every worker process (see shared_cache.py)
+shared_cache = open_shared_cache(app.config["SHARED_CACHE"])
 
 # ===============================
-# IN-MEMORY DATABASE
-# ===============================
-users_db = {}
-
-# ===============================
-# DIET DATABASE
-# ===============================
-DIET_PLANS = {
-    "Vegetarian": {
-        "Breakfast": "Oatmeal with nuts and honey",
-        "Lunch": "Chickpea salad with lemon-tahini dressing",
-        "Snack": "Greek yogurt with berries",
-        "Dinner": "Lentil curry with brown rice"
-    },
-    "Vegan": {
-        "Breakfast": "Tofu scramble with spinach",
-        "Lunch": "Quinoa and black bean bowl",
-        "Snack": "Apple slices with peanut butter",
-        "Dinner": "Roasted cauliflower tacos"
-    },
-    "Keto": {
-        "Breakfast": "3-egg omelet with avocado",
-        "Lunch": "Grilled salmon with buttered asparagus",
-        "Snack": "Handful of macadamia nuts",
-        "Dinner": "Chicken thighs with cheesy broccoli"
-    },
-    "Paleo": {
-        "Breakfast": "Sweet potato hash with eggs",
-        "Lunch": "Grilled chicken breast with mixed greens",
-        "Snack": "Beef jerky and almonds",
-        "Dinner": "Steak with roasted carrots and zucchini"
-    },
-    "Balanced": {
-        "Breakfast": "Whole grain toast with eggs",
-        "Lunch": "Turkey and avocado wrap",
-        "Snack": "Cottage cheese and pineapple",
-        "Dinner": "Baked cod with quinoa and green beans"
-    }
-}
+# USER DATABASE
+# ===============================
+# In-memory unless FITPLAN_USER_DB points at a SQLite file
+users_db = open_user_store(app.config["USER_DB"])
+# Pre-keyed HS256 signer/verifier with a verified-token cache
+token_verifier = TokenVerifier(app.config["SECRET_KEY"])
+# Per-user calorie logs with rolled-up aggregates (see progress.py)
+progress_store = ProgressStore(app.config["PROGRESS_DIR"] or None, max_open=app.config["PROGRESS_OPEN_LOGS"])
+
+# ===============================
+# DIET & WORKOUT CATALOG
+# ===============================
+# The diet plans and workouts come from the catalog file (see catalog.py),
+# which can be reloaded without a restart. DIET_PLANS and WORKOUT_PLANS are
+# plain-dict views of the catalog currently being served.
+DIET_PLANS = {}
+WORKOUT_PLANS = {}
+
+
+def select_workout(preference, exercise_type=None):
+    # A recommended exercise type picks the program when the catalog maps it
+    # (exercise_type_workouts). Otherwise high-fat/meat diets get Strength and
+    # the rest Endurance/Flexibility (diet_workouts and default_workout).
+    return _fragments.catalog.workout_for(preference, exercise_type)
+
+# ===============================
+# PRE-ENCODED PLAN FRAGMENTS
+# ===============================
+# The catalog only changes on reload, so its JSON is encoded once per
+# snapshot and every plan response is spliced together from these bytes plus
+# the numbers. Encoding matches jsonify (sorted keys, compact separators,
+# ASCII only).
+_NUTRITION_TEMPLATE = b'{"daily_calories":%d,"macros":{"carbs_g":%d,"fats_g":%d,"protein_g":%d}}'
+
+
+def _encode(obj):
+    return json.dumps(obj, sort_keys=True, separators=(",", ":")).encode("ascii")
+
+
+class PlanFragments:
+    """
+    Everything plan and catalog responses are built from, for one catalog
+    snapshot. A reload builds a new instance and swaps the module reference,
+    so a request that reads _fragments once stays consistent throughout.
+    """
+
+    def __init__(self, catalog, version):
+        self.catalog = catalog
+        self.version = version
+        self.diet_plans = {
+            name: {slot: meal.name for slot, meal in plan.items()} for name, plan in catalog.diet_plans.items()
+        }
+        # Only the programs a diet maps to are served; the rest belong to planner.py
+        served = {catalog.default_workout, *catalog.diet_workouts.values(), *catalog.exercise_type_workouts.values()}
+        self.workout_plans = {
+            name: {day: exercise.name for day, exercise in days.items()}
+            for name, days in catalog.workouts.items() if name in served
+        }
+        self.diet_fragments = {name: _encode(meals) for name, meals in self.diet_plans.items()}
+        self.workout_fragments = {name: _encode(days) for name, days in self.workout_plans.items()}
+        # Integer IDs for the compact (binary) plan format, resolved against /api/catalog
+        self.diet_ids = {name: i for i, name in enumerate(self.diet_plans)}
+        self.workout_ids = {name: i for i, name in enumerate(self.workout_plans)}
+        # Content hash, identical in every worker serving the same diets and workouts
+        self.digest = hashlib.blake2b(
+            _encode([self.diet_plans, self.workout_plans]), digest_size=8
+        ).hexdigest()
+        self.templates = {name: self._build_template(name) for name in self.diet_plans}
+        # /api/catalog bodies by binary type, encoded on first request
+        self.bodies = {}
+
+    def _build_template(self, preference, recommendation=None):
+        diet = self.diet_fragments.get(preference, self.diet_fragments[self.catalog.default_diet])
+        if recommendation is None:
+            workout, extra = self.catalog.workout_for(preference), b""
+        else:
+            workout = recommendation["workout"]
+            extra = b',"recommendation":' + _encode(recommendation).replace(b"%", b"%%")
+        # Escaped, since the preference and labels come from the client and
+        # the cohort, and this is a %-template
+        return (
+            b'{"diet_plan":' + diet
+            + b',"nutritional_plan":' + _NUTRITION_TEMPLATE
+            + b',"preference_applied":' + _encode(preference).replace(b"%", b"%%")
+            + extra + b',"workout_plan":' + self.workout_fragments[workout] + b"}"
+        )
+
+    def render(self, preference, tdee, protein, carbs, fats, recommendation=None):
+        if recommendation is not None:
+            template = self._build_template(preference, recommendation)
+        else:
+            template = self.templates.get(preference)
+            if template is None:
+                template = self._build_template(preference)
+        return template % (tdee, carbs, fats, protein)
+
+    def compact(self, preference, tdee, protein, carbs, fats, workout=None):
+        diet_id = self.diet_ids.get(preference, self.diet_ids[self.catalog.default_diet])
+        workout_id = self.workout_ids[workout or self.catalog.workout_for(preference)]
+        return [self.digest, diet_id, workout_id, tdee, protein, carbs, fats, preference]
+
+    def document(self):
+        return {
+            "version": self.digest,
+            "diets": [{"id": self.diet_ids[name], "name": name, "meals": meals} for name, meals in self.diet_plans.items()],
+            "workouts": [{"id": self.workout_ids[name], "name": name, "days": days} for name, days in self.workout_plans.items()],
+        }
+
+
+CATALOG_VERSION = 0
+CATALOG_DIGEST = ""
+DIET_IDS = {}
+WORKOUT_IDS = {}
+_fragments = None
+
+
+def prepare_plan_fragments(catalog):
+    """
+    Encode the fragments for a catalog snapshot; returns the function that
+    swaps them in. Subscribed to the catalog store, so it runs on every reload.
+    """
+    fragments = PlanFragments(catalog, CATALOG_VERSION)
+
+    def apply():
+        global _fragments, CATALOG_VERSION, CATALOG_DIGEST, DIET_PLANS, WORKOUT_PLANS, DIET_IDS, WORKOUT_IDS
+        changed = fragments.digest != CATALOG_DIGEST
+        fragments.version = CATALOG_VERSION + 1 if changed else CATALOG_VERSION
+        _fragments = fragments
+        CATALOG_VERSION, CATALOG_DIGEST = fragments.version, fragments.digest
+        DIET_PLANS, WORKOUT_PLANS = fragments.diet_plans, fragments.workout_plans
+        DIET_IDS, WORKOUT_IDS = fragments.diet_ids, fragments.workout_ids
+        # Cached plans are keyed by digest, so old ones could never be served
+        # again; dropping them just frees the space. A reload that only touched
+        # planner content keeps them.
+        if changed:
+            plan_cache.invalidate()
+    return apply
+
+
+def rebuild_plan_fragments(catalog=None):
+    """Re-encode the fragments from a catalog snapshot (default: the current one) and swap them in."""
+    prepare_plan_fragments(catalog or catalog_store.current())()
+
+
+def render_plan(preference, tdee, protein, carbs, fats):
+    """Return the encoded plan body for one profile (same bytes jsonify would produce)."""
+    return _fragments.render(preference, tdee, protein, carbs, fats)
+
+
+def compact_plan(preference, tdee, protein, carbs, fats):
+    """
+    Binary-format plan: [catalog version, diet id, workout id, daily_calories,
+    protein_g, carbs_g, fats_g, preference_applied]. Clients resolve the ids
+    against the /api/catalog document with the same version.
+    """
+    return _fragments.compact(preference, tdee, protein, carbs, fats)
+
+
+def catalog_document():
+    return _fragments.document()
+
+
+catalog_store.subscribe(prepare_plan_fragments)
+if app.config["CATALOG_WATCH"] > 0:
+    catalog_store.watch(app.config["CATALOG_WATCH"])
 
 # ===============================
-# WORKOUT DATABASE (NEW)
-# ===============================
-WORKOUT_PLANS = {
-    "Strength": { # Mapped to Keto/Paleo/Balanced
-        "Monday": "Chest & Tricots (Bench Press, Pushups, Dips)",
-        "Tuesday": "Back & Biceps (Pull-ups, Rows, Curls)",
-        "Wednesday": "Leg Day (Squats, Lunges, Calf Raises)",
-        "Thursday": "Active Recovery (20 min Walk + Stretching)",
-        "Friday": "Shoulders & Core (Overhead Press, Planks, Leg Raises)",
-        "Saturday": "HIIT (Sprints or Jump Rope - 20 mins)",
-        "Sunday": "Full Rest Day"
-    },
-    "Endurance/Flexibility": { # Mapped to Vegan/Vegetarian
-        "Monday": "Long Distance Run or Fast Walk (30-45 mins)",
-        "Tuesday": "Full Body Yoga & Mobility Flow",
-        "Wednesday": "Bodyweight Circuit (Burpees, Squats, Mountain Climbers)",
-        "Thursday": "Cycling or Swimming (30 mins)",
-        "Friday": "Pilates or Core-specific routine",
-        "Saturday": "Outdoor Activity (Hiking or Long Walk)",
-        "Sunday": "Deep Stretching & Meditation"
+# RESPONSE CACHE TIERS
+# ===============================
+_SHARED_KEY = struct.Struct("<8sqdd?")
+
+
+def _shared_key(cache_key):
+    # Compact binary key; the catalog digest keeps workers on different
+    # catalog versions from serving each other's responses.
+    age, weight, height, is_male, preference, digest = cache_key
+    try:
+        return _SHARED_KEY.pack(bytes.fromhex(digest), age, weight, height, is_male) + _encode(preference)
+    except (struct.error, TypeError, ValueError):
+        return None
+
+
+def get_cached_plan(cache_key):
+    """cache_key: (age, weight, height, is_male, preference, catalog digest)."""
+    body = plan_cache.get(cache_key)
+    if body is None and shared_cache is not None:
+        shared_key = _shared_key(cache_key)
+        if shared_key is not None:
+            body = shared_cache.get(shared_key)
+            if body is not None:
+                plan_cache.put(cache_key, body)
+    return body
+
+
+def store_cached_plan(cache_key, body):
+    # The digest in the key means a response rendered from a catalog that was
+    # swapped out meanwhile is stored under the old digest, never served as new
+    plan_cache.put(cache_key, body)
+    if shared_cache is not None:
+        shared_key = _shared_key(cache_key)
+        if shared_key is not None:
+            shared_cache.set(shared_key, body, app.config["PLAN_CACHE_TTL"])
+
+# ===============================
+# FRAMEWORK-NEUTRAL HANDLERS
+# ===============================
+# Each handler takes the decoded request payload and returns (body, status)
+# or (body, status, headers), where body is pre-encoded JSON bytes, a dict
+# still to be serialized, or a binary encoding named by a Content-Type header.
+# The Flask routes below and the ASGI app in asgi_app.py both call these.
+NEGOTIATED_HEADERS = {"Vary": "Accept, Accept-Encoding"}
+
+
+def binary_response(media_type, obj, status=200):
+    return encode_binary(media_type, obj), status, {"Content-Type": media_type, **NEGOTIATED_HEADERS}
+
+
+def compress_response(body, headers, accept_encoding):
+    """gzip/br for pre-encoded JSON bodies; dicts and binary bodies pass through."""
+    if not isinstance(body, bytes) or (headers and "Content-Type" in headers):
+        return body, headers
+    body, encoding = compress_body(body, accept_encoding)
+    if encoding is not None:
+        headers = {**(headers or {}), "Content-Encoding": encoding}
+        if "ETag" in headers:
+            # Each content coding is its own representation: give it its own strong tag
+            headers["ETag"] = headers["ETag"][:-1] + "-" + encoding + '"'
+    return body, headers
+
+# ===============================
+# HTTP CACHING (ETag / If-None-Match)
+# ===============================
+http_cache_stats = {"conditional_requests": 0, "not_modified": 0}
+_ETAG_CODING_SUFFIXES = ("-gzip", "-br")
+
+
+def make_etag(*parts):
+    """Strong ETag from the values that fully determine a representation."""
+    return '"%s"' % hashlib.blake2b(repr(parts).encode(), digest_size=12).hexdigest()
+
+
+def etag_matches(if_none_match, etag):
+    # If-None-Match uses weak comparison; a tag with a content-coding
+    # suffix still names the same resource state
+    if not if_none_match:
+        return False
+    http_cache_stats["conditional_requests"] += 1
+    if if_none_match.strip() == "*":
+        return True
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        for suffix in _ETAG_CODING_SUFFIXES:
+            if tag.endswith(suffix + '"'):
+                tag = tag[:-len(suffix) - 1] + '"'
+                break
+        if tag == etag:
+            http_cache_stats["not_modified"] += 1
+            return True
+    return False
+
+
+def cacheable_headers(etag, max_age, binary_type=None):
+    headers = {**NEGOTIATED_HEADERS, "ETag": etag, "Cache-Control": f"public, max-age={max_age}"}
+    if binary_type:
+        headers["Content-Type"] = binary_type
+    return headers
+
+
+def not_modified(headers):
+    return b"", 304, headers
+
+
+def to_flask_response(body, status, headers=None):
+    mark("handler")
+    if isinstance(body, bytes):
+        body, headers = compress_response(body, headers, request.headers.get("Accept-Encoding"))
+        mimetype = None if headers and "Content-Type" in headers else "application/json"
+        response = Response(body, status=status, headers=headers, mimetype=mimetype)
+    else:
+        response = jsonify(body), status
+    mark("serialization")
+    return response
+
+
+def json_body():
+    data = request.get_json(force=True)
+    mark("parse")
+    return data
+
+# ===============================
+# REQUEST METRICS (see metrics.py)
+# ===============================
+metrics_registry = MetricsRegistry()
+
+
+def cache_metrics():
+    """Hit/miss counters of every cache tier, collected at scrape time."""
+    token = token_verifier.stats()
+    counters = {
+        "plan": (plan_cache.hits, plan_cache.misses),
+        "token": (token["cache_hits"], token["verifications"]),
+        "http": (
+            http_cache_stats["not_modified"],
+            http_cache_stats["conditional_requests"] - http_cache_stats["not_modified"],
+        ),
     }
-}
+    if shared_cache is not None:
+        counters["shared"] = (shared_cache.hits, shared_cache.misses)
+    yield "cache_hits_total", "counter", "Cache hits by cache tier.", [
+        ({"cache": name}, hits) for name, (hits, _) in counters.items()
+    ]
+    yield "cache_misses_total", "counter", "Cache misses by cache tier.", [
+        ({"cache": name}, misses) for name, (_, misses) in counters.items()
+    ]
+    yield "cache_hit_ratio", "gauge", "Hits over lookups by cache tier.", [
+        ({"cache": name}, round(hits / (hits + misses), 4) if hits + misses else 0.0)
+        for name, (hits, misses) in counters.items()
+    ]
+    yield "plan_cache_entries", "gauge", "Responses held in the in-process plan cache.", [({}, len(plan_cache))]
+
+
+metrics_registry.register_collector(cache_metrics)
+
+if app.config["METRICS"]:
+    @app.before_request
+    def start_request_timer():
+        g.request_timer = metrics_registry.start(request.endpoint or "unmatched")
+
+    @app.after_request
+    def record_request_status(response):
+        started = g.get("request_timer")
+        if started is not None:
+            started[0].status = response.status_code
+        return response
+
+    @app.teardown_request
+    def finish_request_timer(exc):
+        started = g.pop("request_timer", None)
+        if started is not None:
+            metrics_registry.finish(*started)
+
+
+def metrics_response():
+    return metrics_registry.render(), 200, {"Content-Type": METRICS_CONTENT_TYPE}
 
 # ===============================
 # PLAN GENERATION ENDPOINT
 # ===============================
-@app.route("/api/generate-plan", methods=["POST"])
-def generate_plan():
-    data = request.get_json(force=True)
-    
+# Weight and height are rounded to 0.1 kg / 0.1 cm before anything is
+# computed, so profiles that differ below that share a cache entry and ETag
+INPUT_DECIMALS = 1
+
+
+def plan_response(data, binary_type=None, if_none_match=None):
     try:
         age = int(data.get("age"))
-        weight = float(data.get("weight"))
-        height = float(data.get("height"))
-        gender = data.get("gender")
+        weight = round(float(data.get("weight")), INPUT_DECIMALS)
+        height = round(float(data.get("height")), INPUT_DECIMALS)
+        is_male = health.is_male(data.get("gender"))
         preference = data.get("dietary_preference", "Balanced")
-    except (TypeError, ValueError):
-        return jsonify({"message": "Invalid physical data provided"}), 400
+    except (TypeError, ValueError, OverflowError):
+        return {"message": "Invalid physical data provided"}, 400
+    if not valid_physical_data(age, weight, height):
+        return {"message": "Invalid physical data provided"}, 400
+    if not isinstance(preference, str):
+        return {"message": "Invalid dietary preference"}, 400
 
-    # 1. Calculate BMR (Mifflin-St Jeor)
-    if gender.lower() == "male":
-        bmr = (10 * weight) + (6.25 * height) - (5 * age) + 5
-    else:
-        bmr = (10 * weight) + (6.25 * height) - (5 * age) - 161
+    # One snapshot for the whole request, even if the catalog is reloaded meanwhile
+    fragments = _fragments
+    try:
+        recommendation = workout_recommendation(data, preference, fragments.catalog)
+    except ValueError as e:
+        return {"message": str(e)}, 400
+    cache_key = (age, weight, height, is_male, preference, fragments.digest)
+    mark("validation")
+    # A plan is fully determined by its inputs, the catalog and the encoding,
+    # plus the cohort's recommendation when the request opted in
+    etag_parts = (cache_key, binary_type) if recommendation is None else (cache_key, recommendation, binary_type)
+    headers = cacheable_headers(make_etag(*etag_parts), app.config["HTTP_MAX_AGE"], binary_type)
+    if etag_matches(if_none_match, headers["ETag"]):
+        mark("cache")
+        return not_modified(headers)
+    # Recommended plans change as the cohort grows, so they skip the caches
+    if binary_type is None and recommendation is None:
+        body = get_cached_plan(cache_key)
+        mark("cache")
+        if body is not None:
+            return body, 200, headers
 
-    # 2. Calculate TDEE
-    tdee = int(bmr * 1.375)
+    # 1-3. BMR (Mifflin-St Jeor), TDEE and the macro split (see health.py)
+    tdee, protein, carbs, fats = health.nutrition(age, weight, height, is_male)
+    mark("compute")
 
-    # 3. Macro Split
-    protein = int((tdee * 0.30) / 4)
-    carbs = int((tdee * 0.45) / 4)
-    fats = int((tdee * 0.25) / 9)
+    if binary_type is not None:
+        workout = recommendation and recommendation["workout"]
+        body = encode_binary(binary_type, fragments.compact(preference, tdee, protein, carbs, fats, workout))
+        mark("serialization")
+        return body, 200, headers
 
-    # 4. Logic for Workout Mapping
-    # If the user chooses a high-fat/meat diet, give them Strength. 
-    # Otherwise, give them Endurance/Flexibility.
-    if preference in ["Keto", "Paleo", "Balanced"]:
-        selected_workout = WORKOUT_PLANS["Strength"]
-    else:
-        selected_workout = WORKOUT_PLANS["Endurance/Flexibility"]
-
-    return jsonify({
-        "nutritional_plan": {
-            "daily_calories": tdee,
-            "macros": {
-                "protein_g": protein,
-                "carbs_g": carbs,
-                "fats_g": fats
-            }
-        },
-        "diet_plan": DIET_PLANS.get(preference, DIET_PLANS["Balanced"]),
-        "workout_plan": selected_workout, # NEW KEY
-        "preference_applied": preference
-    }), 200
+    # 4. Splice the numbers into the pre-encoded diet/workout plan
+    body = fragments.render(preference, tdee, protein, carbs, fats, recommendation) + b"\n"
+    mark("serialization")
+    if recommendation is None:
+        store_cached_plan(cache_key, body)
+        mark("cache")
+    return body, 200, headers
+
+
+CATALOG_MAX_AGE = 300
+CATALOG_IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+def catalog_response(binary_type=None, if_none_match=None, version=None):
+    """
+    The catalog changes only when it is rebuilt, so its ETag is the catalog
+    digest. Requests pinned to the current version (?version=<digest>) may be
+    cached forever.
+    """
+    fragments = _fragments
+    etag = '"%s-%s"' % (fragments.digest, (binary_type or "application/json").rpartition("/")[2])
+    headers = cacheable_headers(etag, CATALOG_MAX_AGE, binary_type)
+    if version == fragments.digest:
+        headers["Cache-Control"] = CATALOG_IMMUTABLE
+    if etag_matches(if_none_match, etag):
+        return not_modified(headers)
+    body = fragments.bodies.get(binary_type)
+    if body is None:
+        document = fragments.document()
+        body = encode_binary(binary_type, document) if binary_type else _encode(document) + b"\n"
+        fragments.bodies[binary_type] = body
+    return body, 200, headers
+
+
+def cache_stats_response():
+    return {
+        "plan_cache": plan_cache.stats(),
+        "shared_cache": shared_cache.stats() if shared_cache is not None else None,
+        "token_cache": token_verifier.stats(),
+        "http_cache": dict(http_cache_stats),
+        "catalog_version": CATALOG_VERSION,
+        "catalog_digest": CATALOG_DIGEST
+    }, 200
+
+
+@app.route("/api/generate-plan", methods=["GET", "POST"])
+def generate_plan():
+    # GET takes the profile as query parameters, so HTTP caches can store it
+    data = request.args.to_dict() if request.method == "GET" else request.get_json(force=True)
+    mark("parse")
+    binary_type = negotiate_binary(request.headers.get("Accept"))
+    if_none_match = request.headers.get("If-None-Match") if request.method == "GET" else None
+    return to_flask_response(*plan_response(data, binary_type, if_none_match))
+
+
+@app.route("/api/catalog", methods=["GET"])
+def catalog():
+    return to_flask_response(*catalog_response(
+        negotiate_binary(request.headers.get("Accept")),
+        request.headers.get("If-None-Match"),
+        request.args.get("version"),
+    ))
+
+
+@app.route("/api/cache/stats", methods=["GET"])
+def cache_stats():
+    return to_flask_response(*cache_stats_response())
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    return to_flask_response(*metrics_response())
+
+# ===============================
+# BATCH PLAN GENERATION ENDPOINT
+# ===============================
+MAX_BATCH_SIZE = 10000
+
+
+def compute_nutrition_batch(age, weight, height, is_male):
+    """
+    TDEE and macro split for whole NumPy columns: the same health.nutrition()
+    the single-profile endpoint calls, so every value matches it exactly.
+    """
+    return health.nutrition(age, weight, height, is_male)
+
+
+def parse_batch_body(mimetype, raw):
+    # Accept a JSON array, {"profiles": [...]}, or an NDJSON body.
+    if mimetype in ("application/x-ndjson", "application/jsonl"):
+        profiles = []
+        for line in raw.splitlines():
+            if not line.strip():
+                continue
+            try:
+                profiles.append(json.loads(line))
+            except ValueError:
+                profiles.append(None)
+        return profiles
+
+    try:
+        data = json.loads(raw)
+    except ValueError:
+        return None
+    if isinstance(data, dict):
+        data = data.get("profiles")
+    return data if isinstance(data, list) else None
+
+
+# Upper bounds on the physical inputs; anything past them is a typo, and far
+# past them the calorie maths overflows
+MAX_AGE = 150
+MAX_WEIGHT_KG = 1000
+MAX_HEIGHT_CM = 300
+
+
+def valid_physical_data(age, weight, height):
+    """True for finite, positive, humanly possible values."""
+    return (
+        0 < age <= MAX_AGE
+        and math.isfinite(weight) and 0 < weight <= MAX_WEIGHT_KG
+        and math.isfinite(height) and 0 < height <= MAX_HEIGHT_CM
+    )
+
+
+def validate_profiles(profiles):
+    """
+    Returns (index, columns, preferences, errors) for a batch: the positions
+    of the profiles that parse, their age, weight, height and is_male as
+    NumPy columns, their dietary preferences, and an error per bad profile.
+    """
+    index, ages, weights, heights, males, preferences = [], [], [], [], [], []
+    errors = []
+
+    for i, data in enumerate(profiles):
+        try:
+            age = float(int(data.get("age")))
+            weight = round(float(data.get("weight")), INPUT_DECIMALS)
+            height = round(float(data.get("height")), INPUT_DECIMALS)
+            is_male = health.is_male(data.get("gender"))
+        except (AttributeError, TypeError, ValueError, OverflowError):
+            errors.append({"index": i, "message": "Invalid physical data provided"})
+            continue
+        if not valid_physical_data(age, weight, height):
+            errors.append({"index": i, "message": "Invalid physical data provided"})
+            continue
+        preference = data.get("dietary_preference", "Balanced")
+        if not isinstance(preference, str):
+            errors.append({"index": i, "message": "Invalid dietary preference"})
+            continue
+        index.append(i)
+        ages.append(age)
+        weights.append(weight)
+        heights.append(height)
+        males.append(is_male)
+        preferences.append(preference)
+
+    # NumPy is imported on first use; at module level it would account for a
+    # quarter of this module's import time
+    import numpy as np
+
+    columns = (
+        np.array(ages, dtype=np.float64),
+        np.array(weights, dtype=np.float64),
+        np.array(heights, dtype=np.float64),
+        np.array(males, dtype=bool),
+    )
+    return index, columns, preferences, errors
+
+
+def batch_plan_response(profiles, binary_type=None):
+    if profiles is None:
+        return {"message": "Expected a list of profiles"}, 400
+    if len(profiles) > MAX_BATCH_SIZE:
+        return {"message": f"Batch too large (max {MAX_BATCH_SIZE} profiles)"}, 413
+
+    n = len(profiles)
+    index, columns, preferences, errors = validate_profiles(profiles)
+    mark("validation")
+    tdee, protein, carbs, fats = (col.tolist() for col in compute_nutrition_batch(*columns))
+    mark("compute")
+
+    fragments = _fragments
+    if binary_type is not None:
+        compact = [None] * n
+        for j, i in enumerate(index):
+            compact[i] = fragments.compact(preferences[j], tdee[j], protein[j], carbs[j], fats[j])
+        return binary_response(binary_type, {"count": n, "errors": errors, "results": compact})
+
+    results = [b"null"] * n
+    for j, i in enumerate(index):
+        results[i] = fragments.render(preferences[j], tdee[j], protein[j], carbs[j], fats[j])
+
+    body = (
+        b'{"count":%d,"errors":' % n + _encode(errors)
+        + b',"results":[' + b",".join(results) + b"]}\n"
+    )
+    return body, 200, NEGOTIATED_HEADERS
+
+
+@app.route("/api/generate-plans", methods=["POST"])
+def generate_plans():
+    profiles = parse_batch_body(request.mimetype, request.get_data())
+    mark("parse")
+    binary_type = negotiate_binary(request.headers.get("Accept"))
+    return to_flask_response(*batch_plan_response(profiles, binary_type))
+
+# ===============================
+# WEEKLY MEAL PLANS (see meal_optimizer.py)
+# ===============================
+# Seven days of catalog meals and serving sizes that hit each profile's
+# calories and macros. The optimizer gets MEAL_PLAN_BUDGET_MS per profile.
+MAX_MEAL_PLAN_BATCH = 1000
+
+
+def meal_plans_response(profiles):
+    if profiles is None:
+        return {"message": "Expected a list of profiles"}, 400
+    if len(profiles) > MAX_MEAL_PLAN_BATCH:
+        return {"message": f"Batch too large (max {MAX_MEAL_PLAN_BATCH} profiles)"}, 413
+
+    index, columns, preferences, errors = validate_profiles(profiles)
+    mark("validation")
+
+    import numpy as np
+    from meal_optimizer import plan_weeks
+
+    targets = np.column_stack(compute_nutrition_batch(*columns))
+    # Valid inputs can still give a non-positive calorie target (tiny, old profiles)
+    positive = (targets > 0).all(axis=1)
+    for i in np.asarray(index)[~positive].tolist():
+        errors.append({"index": i, "message": "Profile gives no positive calorie target"})
+    errors.sort(key=lambda error: error["index"])
+    index = [i for i, keep in zip(index, positive.tolist()) if keep]
+    preferences = [preference for preference, keep in zip(preferences, positive.tolist()) if keep]
+    try:
+        plans = plan_weeks(
+            targets[positive], preferences, catalog_store.current(), app.config["MEAL_PLAN_BUDGET_MS"]
+        )
+    except ValueError as e:
+        return {"message": str(e)}, 422
+    mark("compute")
+    results = [None] * len(profiles)
+    for i, plan in zip(index, plans):
+        results[i] = plan
+    return {"count": len(profiles), "errors": errors, "results": results}, 200
+
+
+def meal_plan_response(data):
+    response, status = meal_plans_response([data])
+    if status != 200:
+        return response, status
+    if response["errors"]:
+        return {"message": response["errors"][0]["message"]}, 400
+    return response["results"][0], 200
+
+
+@app.route("/api/meal-plan", methods=["POST"])
+def meal_plan():
+    return to_flask_response(*meal_plan_response(json_body()))
+
+
+@app.route("/api/meal-plans", methods=["POST"])
+def meal_plans():
+    profiles = parse_batch_body(request.mimetype, request.get_data())
+    mark("parse")
+    return to_flask_response(*meal_plans_response(profiles))
 
 # (Keep your existing signup/login routes here...)
 
+def signup_response(data):
+    if not users_db.add(UserRecord.from_signup(data)):
+        return {"message": "User already exists"}, 409
+    return {"message": "Signup successful"}, 201
+
+
+def login_response(data):
+    identifier = (data.get("email") or data.get("username", "")).strip().lower()
+    password = data.get("password")
+    
+    user = users_db.find(identifier)
+    if not user or not verify_password(password, user.password):
+        return {"message": "Invalid credentials"}, 401
+
+    token = token_verifier.sign(
+        {"email": user.email, "exp": datetime.datetime.utcnow() + datetime.timedelta(hours=2)}
+    )
+    return {"access_token": token, "username": user.username}, 200
+
+
+def bearer_token(authorization):
+    scheme, _, token = (authorization or "").partition(" ")
+    return token.strip() if scheme.lower() == "bearer" else ""
+
+
+def logout_response(token):
+    if not token or token_verifier.verify(token) is None:
+        return {"message": "Invalid or expired token"}, 401
+    token_verifier.revoke(token)
+    return {"message": "Logged out"}, 200
+
+
 @app.route("/api/auth/signup", methods=["POST"])
 def signup():
-    data = request.get_json(force=True)
-    email = data.get("email", "").strip().lower()
-    if email in users_db:
-        return jsonify({"message": "User already exists"}), 409
-    users_db[email] = data
-    return jsonify({"message": "Signup successful"}), 201
+    return to_flask_response(*signup_response(json_body()))
+
 
 @app.route("/api/auth/login", methods=["POST"])
 def login():
-    data = request.get_json(force=True)
-    identifier = (data.get("email") or data.get("username", "")).strip().lower()
-    password = data.get("password")
-    
-    user = users_db.get(identifier)
-    if not user:
-        for u in users_db.values():
-            if u["username"].lower() == identifier:
-                user = u
-                break
+    return to_flask_response(*login_response(json_body()))
 
-    if not user or user["password"] != password:
-        return jsonify({"message": "Invalid credentials"}), 401
 
-    token = jwt.encode(
-        {"email": user["email"], "exp": datetime.datetime.utcnow() + datetime.timedelta(hours=2)},
-        app.config["SECRET_KEY"], algorithm="HS256"
-    )
-    return jsonify({"access_token": token, "username": user["username"]}), 200
+@app.route("/api/auth/logout", methods=["POST"])
+def logout():
+    return to_flask_response(*logout_response(bearer_token(request.headers.get("Authorization"))))
+
+# ===============================
+# PROGRESS TRACKING
+# ===============================
+MAX_SERIES_LENGTH = 1000
+
+
+def token_email(token):
+    payload = token_verifier.verify(token) if token else None
+    return payload.get("email") if payload else None
+
+
+def progress_add_response(email, data):
+    if not email:
+        return {"message": "Invalid or expired token"}, 401
+    try:
+        calories = float(data["calories"])
+        day = datetime.date.fromisoformat(data["date"]) if data.get("date") else datetime.date.today()
+    except (KeyError, TypeError, ValueError):
+        calories = None
+    if calories is None or not math.isfinite(calories):
+        return {"message": "Expected calories (number) and an optional ISO date"}, 400
+    log = progress_store.log(email)
+    log.append(day, calories)
+    return log.summary(), 201
+
+
+def progress_summary_response(email):
+    if not email:
+        return {"message": "Invalid or expired token"}, 401
+    return progress_store.log(email).summary(), 200
+
+
+def progress_series_response(email, period, limit):
+    if not email:
+        return {"message": "Invalid or expired token"}, 401
+    try:
+        limit = int(limit)
+    except (TypeError, ValueError):
+        return {"message": "limit must be an integer"}, 400
+    if not 1 <= limit <= MAX_SERIES_LENGTH:
+        return {"message": f"limit must be between 1 and {MAX_SERIES_LENGTH}"}, 400
+    try:
+        series = progress_store.log(email).series(period, limit)
+    except ValueError as e:
+        return {"message": str(e)}, 400
+    return {"period": period, "series": series}, 200
+
+
+def request_email():
+    return token_email(bearer_token(request.headers.get("Authorization")))
+
+
+@app.route("/api/progress", methods=["POST"])
+def add_progress():
+    return to_flask_response(*progress_add_response(request_email(), json_body()))
+
+
+@app.route("/api/progress/summary", methods=["GET"])
+def progress_summary():
+    return to_flask_response(*progress_summary_response(request_email()))
+
+
+@app.route("/api/progress/series", methods=["GET"])
+def progress_series():
+    return to_flask_response(*progress_series_response(
+        request_email(), request.args.get("period", "day"), request.args.get("limit", 30)
+    ))
+
+# ===============================
+# COHORT ANALYTICS
+# ===============================
+_cohort = None
+_cohort_lock = threading.Lock()
+
+
+def load_cohort():
+    """
+    The COHORT_SNAPSHOT file when it was built from the current COHORT_CSV;
+    otherwise parse the CSV and, with a snapshot path set, write a new one.
+    """
+    from cohort_analytics import CohortAnalytics
+
+    path, snapshot = app.config["COHORT_CSV"], app.config["COHORT_SNAPSHOT"]
+    if not os.path.exists(path):
+        return CohortAnalytics()
+    engine = CohortAnalytics.load_snapshot(snapshot, path) if snapshot else None
+    if engine is None:
+        engine = CohortAnalytics.from_csv(path)
+        if snapshot:
+            try:
+                engine.save_snapshot(snapshot, path)
+            except OSError:
+                pass  # read-only location: keep serving from the parsed CSV
+    return engine
+
+
+def cohort():
+    """The cohort engine, loaded on first use."""
+    global _cohort
+    if _cohort is None:
+        with _cohort_lock:
+            if _cohort is None:
+                _cohort = load_cohort()
+    return _cohort
+
+
+def analytics_response(query, *args):
+    """Run one CohortAnalytics query; unknown columns and bad arguments are a 400."""
+    try:
+        return {"rows": len(cohort()), "result": getattr(cohort(), query)(*args)}, 200
+    except ValueError as e:
+        return {"message": str(e)}, 400
+
+
+def analytics_histogram_response(column, bins):
+    try:
+        bins = int(bins)
+    except (TypeError, ValueError):
+        return {"message": "bins must be an integer"}, 400
+    if not 1 <= bins <= 1000:
+        return {"message": "bins must be between 1 and 1000"}, 400
+    return analytics_response("histogram", column, bins)
+
+
+def analytics_correlation_response(columns):
+    return analytics_response("correlation", [c for c in (columns or "").split(",") if c] or None)
+
+
+# Rows per POST /api/analytics/rows
+MAX_APPEND_ROWS = 1000
+
+
+def analytics_append_response(authorization, data):
+    # Admin-only: appended rows and labels stay in memory for the process lifetime
+    error = admin_error(authorization)
+    if error:
+        return error
+    rows = data if isinstance(data, list) else [data]
+    if not all(isinstance(row, dict) for row in rows):
+        return {"message": "Expected a row object or a list of them"}, 400
+    if len(rows) > MAX_APPEND_ROWS:
+        return {"message": f"Batch too large (max {MAX_APPEND_ROWS} rows)"}, 413
+    try:
+        added = cohort().append_rows(rows)
+    except KeyError as e:
+        return {"message": f"Missing column: {e.args[0]}"}, 400
+    except (TypeError, ValueError) as e:
+        return {"message": str(e)}, 400
+    return {"added": added, "rows": len(cohort())}, 201
+
+
+@app.route("/api/analytics/summary", methods=["GET"])
+def analytics_summary():
+    return to_flask_response(*analytics_response("summary"))
+
+
+@app.route("/api/analytics/counts/<column>", methods=["GET"])
+def analytics_counts(column):
+    return to_flask_response(*analytics_response("value_counts", column))
+
+
+@app.route("/api/analytics/group-mean", methods=["GET"])
+def analytics_group_mean():
+    return to_flask_response(*analytics_response("group_mean", request.args.get("by", ""), request.args.get("column", "")))
+
+
+@app.route("/api/analytics/crosstab", methods=["GET"])
+def analytics_crosstab():
+    return to_flask_response(*analytics_response("crosstab", request.args.get("rows", ""), request.args.get("columns", "")))
+
+
+@app.route("/api/analytics/histogram/<column>", methods=["GET"])
+def analytics_histogram(column):
+    return to_flask_response(*analytics_histogram_response(column, request.args.get("bins", 10)))
+
+
+@app.route("/api/analytics/correlation", methods=["GET"])
+def analytics_correlation():
+    return to_flask_response(*analytics_correlation_response(request.args.get("columns")))
+
+
+@app.route("/api/analytics/rows", methods=["POST"])
+def analytics_append():
+    return to_flask_response(*analytics_append_response(request.headers.get("Authorization"), json_body()))
+
+# ===============================
+# SIMILAR PROFILES (see recommender.py)
+# ===============================
+# A nearest-neighbour index over the cohort. It picks up rows appended
+# through /api/analytics/rows on the next query. A plan request opts in to a
+# cohort-based workout by sending any of these fields:
+COHORT_FIELDS = (
+    "fitness_goal", "activity_level", "preferred_workout_time",
+    "daily_step_count", "resting_heart_rate", "chronic_condition",
+)
+MAX_NEIGHBORS = 100
+_profile_index = None
+_profile_index_lock = threading.Lock()
+
+
+def profile_index():
+    """The cohort's nearest-neighbour index, built on first use and synced on every call."""
+    global _profile_index
+    if _profile_index is None:
+        with _profile_index_lock:
+            if _profile_index is None:
+                from recommender import ProfileIndex
+
+                _profile_index = ProfileIndex.from_cohort(cohort())
+    _profile_index.sync(cohort())
+    return _profile_index
+
+
+def workout_recommendation(data, preference, catalog):
+    """
+    None unless the request sent a cohort field; otherwise what the nearest
+    cohort profiles train like, and the workout program that follows from it.
+    """
+    if not any(data.get(field) not in (None, "") for field in COHORT_FIELDS):
+        return None
+    from recommender import request_features
+
+    try:
+        features = request_features(data)
+    except (TypeError, ValueError):
+        raise ValueError("Invalid cohort features provided")
+    recommendation = profile_index().recommend(features)
+    if recommendation is None:
+        return None
+    recommendation["workout"] = catalog.workout_for(preference, recommendation["exercise_type"])
+    return recommendation
+
+
+def similar_profiles_response(data, k):
+    if not isinstance(data, dict):
+        return {"message": "Expected a profile object"}, 400
+    try:
+        k = int(k)
+    except (TypeError, ValueError):
+        return {"message": "k must be an integer"}, 400
+    if not 1 <= k <= MAX_NEIGHBORS:
+        return {"message": f"k must be between 1 and {MAX_NEIGHBORS}"}, 400
+    from recommender import request_features
+
+    try:
+        features = request_features(data)
+    except (TypeError, ValueError):
+        return {"message": "Invalid cohort features provided"}, 400
+    if not features:
+        return {"message": "Expected at least one profile field"}, 400
+    index = profile_index()
+    mark("validation")
+    neighbors = index.neighbors(features, k)
+    recommendation = index.recommend(features, k)
+    if recommendation is not None:
+        recommendation["workout"] = select_workout(data.get("dietary_preference", "Balanced"), recommendation["exercise_type"])
+    mark("compute")
+    return {"rows": len(index), "neighbors": neighbors, "recommendation": recommendation}, 200
+
+
+@app.route("/api/similar-profiles", methods=["POST"])
+def similar_profiles():
+    return to_flask_response(*similar_profiles_response(json_body(), request.args.get("k", 10)))
+
+# ===============================
+# SAMPLING PROFILER (see profiler.py)
+# ===============================
+# Admin-only: every endpoint needs Authorization: Bearer <FITPLAN_ADMIN_TOKEN>
+profiler = SamplingProfiler()
+_UNPROFILED_ENDPOINTS = {
+    "static", "metrics", "profile_start", "profile_stop", "profile_status", "profile_stacks",
+    "catalog_reload", "catalog_status",
+}
+# View functions are matched by name in either serving mode
+_HANDLER_FILES = (os.path.abspath(__file__), os.path.join(os.path.dirname(os.path.abspath(__file__)), "asgi_app.py"))
+
+
+def start_profile(interval=DEFAULT_INTERVAL, duration=None, route=None):
+    """
+    route: an endpoint name (e.g. generate_plan) to sample only requests to
+    it, "all" to sample every thread, or None for every API request.
+    """
+    if route == "all":
+        names = None
+    elif route:
+        names = [route]
+    else:
+        names = [endpoint for endpoint in app.view_functions if endpoint not in _UNPROFILED_ENDPOINTS]
+    profiler.start(interval, duration, names, _HANDLER_FILES, route)
+
+
+if app.config["PROFILE_SIGNAL"]:
+    # e.g. kill -USR2 <pid> starts a session, a second signal writes
+    # PROFILE_DIR/fitplan-<pid>-<time>.collapsed
+    install_signal_handler(profiler, app.config["PROFILE_SIGNAL"], app.config["PROFILE_DIR"], start_profile)
+
+
+def admin_error(authorization):
+    expected = app.config["ADMIN_TOKEN"]
+    if not expected:
+        return {"message": "Admin endpoints are disabled (set FITPLAN_ADMIN_TOKEN)"}, 403
+    if not hmac.compare_digest(bearer_token(authorization).encode(), expected.encode()):
+        return {"message": "Invalid admin token"}, 401
+    return None
+
+
+def profile_start_response(authorization, data):
+    error = admin_error(authorization)
+    if error:
+        return error
+    try:
+        interval = float(data.get("interval", DEFAULT_INTERVAL))
+        duration = float(data["duration"]) if data.get("duration") is not None else None
+    except (TypeError, ValueError):
+        return {"message": "interval and duration must be numbers"}, 400
+    if not MIN_INTERVAL <= interval <= 1:
+        return {"message": f"interval must be between {MIN_INTERVAL} and 1 seconds"}, 400
+    if duration is not None and not 0 < duration <= MAX_DURATION:
+        return {"message": f"duration must be between 0 and {MAX_DURATION} seconds"}, 400
+    route = data.get("route") or None
+    if route not in (None, "all") and (route not in app.view_functions or route in _UNPROFILED_ENDPOINTS):
+        return {"message": f"Unknown route: {route}"}, 400
+    try:
+        start_profile(interval, duration, route)
+    except RuntimeError as e:
+        return {"message": str(e)}, 409
+    return profiler.status(), 200
+
+
+def profile_stop_response(authorization):
+    error = admin_error(authorization)
+    if error:
+        return error
+    if not profiler.stop():
+        return {"message": "profiler is not running"}, 409
+    return profiler.status(), 200
+
+
+def profile_status_response(authorization):
+    return admin_error(authorization) or (profiler.status(), 200)
+
+
+def profile_stacks_response(authorization):
+    """Collapsed stacks of the running or last session, for flamegraph.pl / speedscope."""
+    error = admin_error(authorization)
+    if error:
+        return error
+    return profiler.collapsed().encode(), 200, {"Content-Type": "text/plain; charset=utf-8"}
+
+
+@app.route("/admin/profile/start", methods=["POST"])
+def profile_start():
+    data = request.get_json(force=True, silent=True)
+    if not isinstance(data, dict):
+        data = request.args.to_dict()
+    return to_flask_response(*profile_start_response(request.headers.get("Authorization"), data))
+
+
+@app.route("/admin/profile/stop", methods=["POST"])
+def profile_stop():
+    return to_flask_response(*profile_stop_response(request.headers.get("Authorization")))
+
+
+@app.route("/admin/profile", methods=["GET"])
+def profile_status():
+    return to_flask_response(*profile_status_response(request.headers.get("Authorization")))
+
+
+@app.route("/admin/profile/stacks", methods=["GET"])
+def profile_stacks():
+    return to_flask_response(*profile_stacks_response(request.headers.get("Authorization")))
+
+# ===============================
+# CATALOG RELOAD (see catalog.py)
+# ===============================
+# Admin-only, like the profiler. A reload only reaches the process that
+# handles the request: with several workers, set FITPLAN_CATALOG_WATCH so
+# every worker picks up the new file by itself.
+def _catalog_state():
+    return {**catalog_store.status(), "catalog_version": CATALOG_VERSION, "catalog_digest": CATALOG_DIGEST}
+
+
+def catalog_reload_response(authorization):
+    error = admin_error(authorization)
+    if error:
+        return error
+    try:
+        reloaded = catalog_store.reload(force=True)
+    except CatalogError as e:
+        # The catalog being served is left as it was
+        return {"message": str(e), "catalog": _catalog_state()}, 422
+    return {"reloaded": reloaded, **_catalog_state()}, 200
+
+
+def catalog_status_response(authorization):
+    return admin_error(authorization) or (_catalog_state(), 200)
+
+
+@app.route("/admin/catalog/reload", methods=["POST"])
+def catalog_reload():
+    return to_flask_response(*catalog_reload_response(request.headers.get("Authorization")))
+
+
+@app.route("/admin/catalog", methods=["GET"])
+def catalog_status():
+    return to_flask_response(*catalog_status_response(request.headers.get("Authorization")))
+
+# ===============================
+# WARM-UP (--preload)
+# ===============================
+def warm_up():
+    """
+    Do the one-time work the first requests would otherwise pay for: load
+    the cohort and its similar-profiles index, import NumPy for the batch
+    path, encode every catalog representation and build the meal optimizer's
+    default pool. Returns the milliseconds each step took.
+    """
+    sample = {"age": 30, "weight": 70, "height": 175, "gender": "Female"}
+    steps = {
+        "cohort": cohort,
+        "similar_profiles": profile_index,
+        "batch": lambda: batch_plan_response([sample]),
+        "catalog": lambda: [catalog_response(binary_type) for binary_type in (None, *BINARY_ENCODERS)],
+        "meal_plans": lambda: meal_plans_response([sample]),
+    }
+    timings = {}
+    for name, step in steps.items():
+        started = time.perf_counter()
+        step()
+        timings[name] = round((time.perf_counter() - started) * 1000, 2)
+    return timings
+
+
+if app.config["PRELOAD"]:
+    warm_up()
 
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=5000, debug=False)
\ No newline at end of file
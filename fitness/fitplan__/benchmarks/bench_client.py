@@ -0,0 +1,62 @@
+"""
+Benchmark: frontend-perceived latency, per-request connections vs. a pooled session
+Simulates --users concurrent dashboard users, each generating --requests plans,
+once with a bare requests.post per call (the old app.py) and once through a
+shared keep-alive session configured like app.get_http_session.
+Usage: python benchmarks/bench_client.py [--url http://localhost:5000] [--users 16]
+"""
+
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+PAYLOAD = {"age": 25, "weight": 75, "height": 175, "gender": "Male", "dietary_preference": "Vegan"}
+
+
+def pooled_session(pool_size):
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def run(post, url, users, per_user):
+    def user(_):
+        latencies = []
+        for _ in range(per_user):
+            start = time.perf_counter()
+            post(url, json=PAYLOAD, timeout=(3.05, 10)).raise_for_status()
+            latencies.append(time.perf_counter() - start)
+        return latencies
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(users) as pool:
+        latencies = sorted(l for ls in pool.map(user, range(users)) for l in ls)
+    elapsed = time.perf_counter() - start
+    return {
+        "rps": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(0.99 * (len(latencies) - 1))] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", default="http://localhost:5000")
+    parser.add_argument("--users", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200, help="Plans generated per user")
+    args = parser.parse_args()
+    url = args.url.rstrip("/") + "/api/generate-plan"
+
+    for label, post in (("per-request", requests.post), ("pooled", pooled_session(args.users).post)):
+        r = run(post, url, args.users, args.requests)
+        print(f"{label:>12}: {r['rps']:8.1f} req/s  p50 {r['p50_ms']:7.2f} ms  p99 {r['p99_ms']:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
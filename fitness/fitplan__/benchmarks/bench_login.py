@@ -0,0 +1,63 @@
+"""
+Benchmark: login lookup latency vs. number of registered users
+Usage: python benchmarks/bench_login.py [--sizes 1000,10000,100000,1000000,10000000]
+The 10M size needs a few GB of RAM; the default stops at 1M.
+"""
+
+import argparse
+import random
+import sys
+import time
+import warnings
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import backend_api  # noqa: E402
+from user_store import UserRecord, UserStore, hash_password  # noqa: E402
+
+warnings.filterwarnings("ignore")
+# One scrypt hash shared by every synthetic user, so filling stays fast
+SECRET = hash_password("secret")
+
+
+def fill(store, start, stop):
+    for i in range(start, stop):
+        store.add(UserRecord(f"user{i}@example.com", f"User{i}", SECRET))
+
+
+def time_per_call(func, args_list):
+    start = time.perf_counter()
+    for args in args_list:
+        func(*args)
+    return (time.perf_counter() - start) / len(args_list)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="1000,10000,100000,1000000")
+    parser.add_argument("--lookups", type=int, default=20000)
+    # Each login pays for one scrypt verification (~50 ms)
+    parser.add_argument("--logins", type=int, default=20)
+    args = parser.parse_args()
+    sizes = sorted(int(s) for s in args.sizes.split(","))
+
+    store = UserStore()
+    backend_api.users_db = store
+    print(f"{'users':>10} {'by email':>12} {'by username':>12} {'login (+scrypt, JWT)':>14}")
+    filled = 0
+    for size in sizes:
+        fill(store, filled, size)
+        filled = size
+        picks = [random.randrange(size) for _ in range(args.lookups)]
+        by_email = time_per_call(store.find, [(f"user{i}@example.com",) for i in picks])
+        by_username = time_per_call(store.find, [(f"user{i}",) for i in picks])
+        login = time_per_call(
+            backend_api.login_response,
+            [({"username": f"USER{i}", "password": "secret"},) for i in picks[:args.logins]],
+        )
+        print(f"{size:>10} {by_email * 1e6:>10.2f}us {by_username * 1e6:>10.2f}us {login * 1e3:>12.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
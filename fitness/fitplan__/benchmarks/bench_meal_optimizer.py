@@ -0,0 +1,72 @@
+"""
+Benchmark: weekly meal-plan optimizer
+Solves meal plans for synthetic cohort profiles one at a time (latency
+percentiles against the per-user budget) and in batches (users per second),
+and reports how many days land within the calorie/macro tolerances per diet.
+Usage: python benchmarks/bench_meal_optimizer.py [--users 500] [--budget-ms 20] [--batch-sizes 10 100 1000]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import numpy as np  # noqa: E402
+
+from backend_api import catalog_store, compute_nutrition_batch  # noqa: E402
+from meal_optimizer import DAYS, plan_week, plan_weeks  # noqa: E402
+from synthetic_cohort import iter_profiles  # noqa: E402
+
+
+def cohort_targets(n, seed=0):
+    bodies = list(iter_profiles(n, seed))
+    columns = compute_nutrition_batch(
+        np.array([b["age"] for b in bodies], dtype=np.float64),
+        np.array([b["weight"] for b in bodies], dtype=np.float64),
+        np.array([b["height"] for b in bodies], dtype=np.float64),
+        np.array([b["gender"] == "Male" for b in bodies]),
+    )
+    return np.column_stack(columns), [b["dietary_preference"] for b in bodies]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Meal optimizer benchmark.")
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--budget-ms", type=float, default=20.0)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[10, 100, 1000])
+    args = parser.parse_args()
+
+    catalog = catalog_store.current()
+    targets, diets = cohort_targets(max(args.users, *args.batch_sizes))
+    plan_week(*targets[0], diets[0], catalog, args.budget_ms)  # build the meal pools
+
+    latencies, plans = [], []
+    for values, diet in zip(targets[:args.users], diets):
+        started = time.perf_counter()
+        plans.append(plan_week(*values, diet, catalog, args.budget_ms))
+        latencies.append((time.perf_counter() - started) * 1000)
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    print(f"=== one user at a time ({args.users} users, budget {args.budget_ms:g} ms) ===")
+    print(f"latency p50 {p50:.2f} ms, p95 {p95:.2f} ms, p99 {p99:.2f} ms, max {max(latencies):.2f} ms")
+    print(f"converged before the budget: {sum(plan['converged'] for plan in plans)}/{len(plans)}")
+
+    print(f"\n{'diet':<12} {'users':>6} {'days within tolerance':>22}")
+    for diet in sorted(set(diets[:args.users])):
+        mine = [plan for plan, d in zip(plans, diets) if d == diet]
+        within = sum(plan["days_within_tolerance"] for plan in mine)
+        print(f"{diet:<12} {len(mine):>6} {within / (len(mine) * len(DAYS)):>21.1%}")
+
+    print("\n=== batches ===")
+    print(f"{'users':>8} {'total ms':>10} {'ms/user':>10} {'users/s':>10}")
+    for size in args.batch_sizes:
+        started = time.perf_counter()
+        plan_weeks(targets[:size], diets[:size], catalog, args.budget_ms)
+        elapsed = time.perf_counter() - started
+        print(f"{size:>8} {elapsed * 1000:>10.1f} {elapsed * 1000 / size:>10.3f} {size / elapsed:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
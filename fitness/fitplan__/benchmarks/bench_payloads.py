@@ -0,0 +1,57 @@
+"""
+Benchmark: pre-encoded plan fragments vs. jsonify on every request
+Usage: python benchmarks/bench_payloads.py [--iterations N]
+"""
+
+import argparse
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from flask import jsonify  # noqa: E402
+
+from backend_api import DIET_PLANS, WORKOUT_PLANS, app, render_plan, select_workout  # noqa: E402
+
+PROFILE = {"age": 25, "weight": 75, "height": 175, "gender": "Male", "dietary_preference": "Vegan"}
+
+
+def encode_with_jsonify(preference, tdee, protein, carbs, fats):
+    # The pre-fragment implementation of generate_plan's response
+    return jsonify({
+        "nutritional_plan": {
+            "daily_calories": tdee,
+            "macros": {"protein_g": protein, "carbs_g": carbs, "fats_g": fats},
+        },
+        "diet_plan": DIET_PLANS.get(preference, DIET_PLANS["Balanced"]),
+        "workout_plan": WORKOUT_PLANS[select_workout(preference)],
+        "preference_applied": preference,
+    }).get_data()
+
+
+def best_of(func, iterations, repeat=5):
+    return min(timeit.repeat(func, number=iterations, repeat=repeat)) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    with app.app_context():
+        for preference in ("Vegan", "50%", "a%%b"):
+            assert encode_with_jsonify(preference, 2370, 177, 266, 65) == render_plan(preference, 2370, 177, 266, 65) + b"\n"
+        legacy = best_of(lambda: encode_with_jsonify("Vegan", 2370, 177, 266, 65), args.iterations)
+    spliced = best_of(lambda: render_plan("Vegan", 2370, 177, 266, 65), args.iterations)
+
+    client = app.test_client()
+    request_time = best_of(lambda: client.post("/api/generate-plan", json=PROFILE), args.iterations // 10)
+
+    print(f"jsonify encode:        {legacy * 1e6:8.2f} us/response")
+    print(f"pre-encoded splice:    {spliced * 1e6:8.2f} us/response  ({legacy / spliced:.1f}x faster)")
+    print(f"full request (client): {request_time * 1e6:8.2f} us/request")
+
+
+if __name__ == "__main__":
+    main()
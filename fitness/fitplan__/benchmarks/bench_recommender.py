@@ -0,0 +1,65 @@
+"""
+Benchmark: similar-profiles index (recommender.py)
+Builds the index over synthetic cohorts of increasing size and times
+recommend() with every feature and with only the plan's own fields, plus
+the cost of syncing a batch of appended rows.
+Usage: python benchmarks/bench_recommender.py [--sizes 200 10000 100000] [--queries 200] [--append 100]
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from cohort_analytics import CohortAnalytics  # noqa: E402
+from recommender import REQUEST_FIELDS, ProfileIndex, request_features  # noqa: E402
+from synthetic_cohort import generate_rows  # noqa: E402
+
+PLAN_FIELDS = ("age", "height", "weight", "gender", "dietary_preference")
+
+
+def time_queries(index, queries):
+    """Per-query microseconds."""
+    times = []
+    for features in queries:
+        started = time.perf_counter()
+        index.recommend(features)
+        times.append((time.perf_counter() - started) * 1e6)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Similar-profiles index benchmark.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[200, 10000, 100000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--append", type=int, default=100, help="Rows appended per sync")
+    args = parser.parse_args()
+
+    probes = generate_rows(args.queries, seed=7)
+    full = [request_features({field: row[column] for field, column in REQUEST_FIELDS.items()}) for row in probes]
+    plan_only = [request_features({field: row[REQUEST_FIELDS[field]] for field in PLAN_FIELDS}) for row in probes]
+    appended = generate_rows(args.append, seed=8)
+
+    print(f"{'rows':>8} {'build ms':>9} {'p50 us':>8} {'p99 us':>8} {'plan-only p50':>14} {'sync ms':>8}")
+    for size in args.sizes:
+        engine = CohortAnalytics()
+        engine.append_rows(generate_rows(size, seed=0))
+        started = time.perf_counter()
+        index = ProfileIndex.from_cohort(engine)
+        build = (time.perf_counter() - started) * 1000
+        times = sorted(time_queries(index, full))
+        plan_times = time_queries(index, plan_only)
+        engine.append_rows(appended)
+        started = time.perf_counter()
+        index.sync(engine)
+        sync = (time.perf_counter() - started) * 1000
+        print(f"{size:>8} {build:>9.2f} {statistics.median(times):>8.1f} {times[int(len(times) * 0.99) - 1]:>8.1f} "
+              f"{statistics.median(plan_times):>14.1f} {sync:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Benchmark: cold-start cost of the backend and frontend
+Each target is imported in fresh interpreters: once under -X importtime for
+the per-module breakdown and --runs more times for the wall-clock import
+time. A second section times the first requests that pay for lazy work
+(cohort load, NumPy import) with and without warm_up(), i.e. --preload.
+Set FITPLAN_COHORT_CSV / FITPLAN_COHORT_SNAPSHOT to measure a larger cohort.
+Usage: python benchmarks/bench_startup.py [--runs 5] [--top 15] [--targets backend_api asgi_app app]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+PACKAGE_DIR = Path(__file__).resolve().parent.parent
+FIRST_PARTY = {path.stem for path in PACKAGE_DIR.glob("*.py")}
+
+IMPORT_TIMER = """
+import sys, time
+started = time.perf_counter()
+import {target}
+print(time.perf_counter() - started)
+"""
+
+FIRST_REQUESTS = """
+import json, sys, time
+started = time.perf_counter()
+import backend_api
+result = {"import_ms": (time.perf_counter() - started) * 1000}
+if sys.argv[1] == "1":
+    result["warm_up_ms"] = backend_api.warm_up()
+client = backend_api.app.test_client()
+profile = {"age": 30, "weight": 70, "height": 175, "gender": "Female"}
+for name, call in [
+    ("POST /api/generate-plan", lambda: client.post("/api/generate-plan", json=profile)),
+    ("POST /api/generate-plans", lambda: client.post("/api/generate-plans", json=[profile])),
+    ("GET /api/catalog", lambda: client.get("/api/catalog")),
+    ("GET /api/analytics/summary", lambda: client.get("/api/analytics/summary")),
+]:
+    started = time.perf_counter()
+    call()
+    result[name] = (time.perf_counter() - started) * 1000
+print(json.dumps(result))
+"""
+
+
+def run_python(args, code_args=()):
+    return subprocess.run(
+        [sys.executable, *args, *code_args], cwd=PACKAGE_DIR, capture_output=True, text=True, check=True
+    )
+
+
+def import_breakdown(target):
+    """(module, self us, cumulative us) for every module a fresh `import target` loads."""
+    stderr = run_python(["-X", "importtime", "-c", f"import {target}"]).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        rows.append((name, int(self_us), int(cumulative_us)))
+    return rows
+
+
+def import_wall_time(target, runs):
+    return [float(run_python(["-c", IMPORT_TIMER.format(target=target)]).stdout) * 1000 for _ in range(runs)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup benchmark.")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per measurement")
+    parser.add_argument("--top", type=int, default=15, help="Modules to list per target")
+    parser.add_argument("--targets", nargs="+", default=["backend_api", "asgi_app", "app"])
+    args = parser.parse_args()
+
+    for target in args.targets:
+        try:
+            rows = import_breakdown(target)
+            wall = import_wall_time(target, args.runs)
+        except subprocess.CalledProcessError as e:
+            print(f"\n{target}: import failed\n{e.stderr.strip().splitlines()[-1]}")
+            continue
+        print(f"\n=== import {target}: median {statistics.median(wall):.1f} ms over {args.runs} runs ===")
+        # Top-level modules only: their cumulative time includes everything they import
+        top_level = [row for row in rows if "." not in row[0]]
+        print(f"{'module':<32} {'cumulative':>12} {'self':>10}")
+        for name, self_us, cumulative_us in sorted(top_level, key=lambda row: -row[2])[:args.top]:
+            marker = " *" if name in FIRST_PARTY else ""
+            print(f"{name:<32} {cumulative_us / 1000:>10.1f}ms {self_us / 1000:>8.1f}ms{marker}")
+    print("\n* first-party module")
+
+    print("\n=== first requests after startup (ms) ===")
+    runs = {
+        label: [json.loads(run_python(["-c", FIRST_REQUESTS], [flag]).stdout) for _ in range(args.runs)]
+        for label, flag in (("cold", "0"), ("--preload", "1"))
+    }
+    names = [name for name in runs["cold"][0] if name.startswith(("GET", "POST"))]
+    print(f"{'':<28} {'cold':>10} {'--preload':>10}")
+    for name in ["import_ms", *names]:
+        values = [statistics.median(result[name] for result in runs[label]) for label in runs]
+        print(f"{name:<28} {values[0]:>10.2f} {values[1]:>10.2f}")
+    warm_up = runs["--preload"][0]["warm_up_ms"]
+    print("warm_up(): " + ", ".join(f"{step} {ms:.1f} ms" for step, ms in warm_up.items()))
+
+
+if __name__ == "__main__":
+    main()
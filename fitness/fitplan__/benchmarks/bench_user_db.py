@@ -0,0 +1,89 @@
+"""
+Benchmark: persistent user store (SQLite/WAL)
+Measures restart time (open + first login lookup) for a database with
+--users accounts, lookup latency, and concurrent signup throughput with
+group commit vs. one commit per signup.
+Usage: python benchmarks/bench_user_db.py [--users 1000000] [--path /tmp/fitplan-users.db]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from user_store import SqliteUserStore, UserRecord  # noqa: E402
+
+
+def populate(path, users, chunk=100_000):
+    store = SqliteUserStore(path)
+    for start in range(0, users, chunk):
+        store.add_many(
+            UserRecord(f"user{i}@example.com", f"User{i}", "secret")
+            for i in range(start, min(start + chunk, users))
+        )
+    store.close()
+
+
+def signup_throughput(path, threads, per_thread, batch_size):
+    store = SqliteUserStore(path, batch_size=batch_size)
+
+    def signups(t):
+        for i in range(per_thread):
+            store.add(UserRecord(f"new{batch_size}-{t}-{i}@example.com", f"new{t}-{i}", "secret"))
+
+    workers = [threading.Thread(target=signups, args=(t,)) for t in range(threads)]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - start
+    store.close()
+    return threads * per_thread / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--path", default=os.path.join(tempfile.gettempdir(), "fitplan-users-bench.db"))
+    parser.add_argument("--threads", type=int, default=16)
+    args = parser.parse_args()
+
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(args.path + suffix):
+            os.remove(args.path + suffix)
+
+    start = time.perf_counter()
+    populate(args.path, args.users)
+    print(f"populated {args.users} users in {time.perf_counter() - start:.1f}s")
+
+    start = time.perf_counter()
+    store = SqliteUserStore(args.path)
+    user = store.find(f"user{args.users // 2}")
+    restart = time.perf_counter() - start
+    print(f"restart (open + first login lookup): {restart * 1000:.1f} ms  -> {user.email}")
+
+    lookups = [f"user{i * 7919 % args.users}@example.com" for i in range(10000)]
+    start = time.perf_counter()
+    for email in lookups:
+        store.find(email)
+    cold = (time.perf_counter() - start) / len(lookups)
+    start = time.perf_counter()
+    for email in lookups:
+        store.find(email)
+    hot = (time.perf_counter() - start) / len(lookups)
+    print(f"lookup: {cold * 1e6:.1f} us cold (SQLite), {hot * 1e6:.1f} us hot (in-memory index)")
+    store.close()
+
+    for batch_size in (1, 256):
+        rate = signup_throughput(args.path, args.threads, 200, batch_size)
+        print(f"signups with {args.threads} threads, batch_size={batch_size}: {rate:,.0f}/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark: plan payload size and client decode time per wire format
+Compares JSON (plain, gzip, br) with the compact MessagePack/CBOR encodings
+for one plan and for a batch response. Formats whose libraries are not
+installed are skipped.
+Usage: python benchmarks/bench_wire_format.py [--batch 1000] [--iterations N]
+"""
+
+import argparse
+import gzip
+import json
+import random
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import backend_api  # noqa: E402
+import wire_format  # noqa: E402
+
+PROFILE = {"age": 25, "weight": 75, "height": 175, "gender": "Male", "dietary_preference": "Vegan"}
+PREFERENCES = ["Vegetarian", "Vegan", "Keto", "Paleo", "Balanced"]
+
+
+def decoders():
+    yield "json", None, json.loads
+    yield "json+gzip", "gzip", lambda body: json.loads(gzip.decompress(body))
+    if wire_format.brotli is not None:
+        yield "json+br", "br", lambda body: json.loads(wire_format.brotli.decompress(body))
+    if wire_format.msgpack is not None:
+        yield "msgpack", "application/msgpack", wire_format.msgpack.unpackb
+    if wire_format.cbor2 is not None:
+        yield "cbor", "application/cbor", wire_format.cbor2.loads
+
+
+def encode(handler, label, option):
+    if label.startswith("json"):
+        body, _, _ = handler(None)
+        return wire_format._compress(body, option) if option else body
+    body, _, _ = handler(option)
+    return body
+
+
+def report(title, handler, iterations):
+    print(title)
+    for label, option, decode in decoders():
+        body = encode(handler, label, option)
+        per_call = min(timeit.repeat(lambda: decode(body), number=iterations, repeat=5)) / iterations
+        print(f"  {label:>10}: {len(body):>9} bytes  decode {per_call * 1e6:10.2f} us")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batch", type=int, default=1000)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    random.seed(0)
+    profiles = [
+        {"age": random.randint(18, 70), "weight": random.randint(45, 130), "height": random.randint(150, 200),
+         "gender": random.choice(["Male", "Female"]), "dietary_preference": random.choice(PREFERENCES)}
+        for _ in range(args.batch)
+    ]
+    report("single plan", lambda binary: backend_api.plan_response(PROFILE, binary), args.iterations * 50)
+    report(f"batch of {args.batch}", lambda binary: backend_api.batch_plan_response(profiles, binary), args.iterations)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""
+HTTP load test for the plan API (Flask vs. ASGI serving modes)
+Opens --concurrency keep-alive connections and hammers one endpoint for
+--duration seconds, optionally pipelining several requests per connection.
+Reports requests/second and latency percentiles.
+
+Usage:
+  python benchmarks/load_test.py --url http://127.0.0.1:5000/api/generate-plan
+  python benchmarks/load_test.py --compare              # spawn Flask and ASGI servers, test both
+  python benchmarks/load_test.py --compare --json out.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+APP_DIR = Path(__file__).resolve().parent.parent
+
+DEFAULT_BODY = {"age": 25, "weight": 75, "height": 175, "gender": "Male", "dietary_preference": "Vegan"}
+
+SERVERS = {
+    # Flask's built-in server, as started by run_backend.py (threaded)
+    "flask": [sys.executable, "-c",
+              "import sys; from backend_api import app; "
+              "app.run(host='127.0.0.1', port=int(sys.argv[1]), threaded=True)"],
+    "asgi": [sys.executable, "run_asgi.py", "--host", "127.0.0.1", "--port"],
+}
+
+
+def build_request(url, body: bytes) -> bytes:
+    parts = urlsplit(url)
+    return (
+        f"POST {parts.path or '/'} HTTP/1.1\r\n"
+        f"Host: {parts.netloc}\r\n"
+        "Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        "Connection: keep-alive\r\n\r\n"
+    ).encode("ascii") + body
+
+
+async def read_response(reader):
+    """Read one HTTP/1.x response; returns (status, keep_alive)."""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("connection closed")
+    version, status = status_line.split(b" ", 2)[:2]
+    length, keep_alive = None, version == b"HTTP/1.1"
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.partition(b":")
+        name = name.strip().lower()
+        if name == b"content-length":
+            length = int(value)
+        elif name == b"connection":
+            keep_alive = value.strip().lower() == b"keep-alive"
+    if length is None:
+        await reader.read()
+        keep_alive = False
+    else:
+        await reader.readexactly(length)
+    return int(status), keep_alive
+
+
+async def worker(host, port, request, pipeline, deadline, latencies, counters):
+    reader = writer = None
+    while time.perf_counter() < deadline:
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(host, port)
+            start = time.perf_counter()
+            writer.write(request * pipeline)
+            await writer.drain()
+            keep_alive = True
+            for _ in range(pipeline):
+                status, keep_alive = await read_response(reader)
+                latencies.append(time.perf_counter() - start)
+                counters["ok" if status < 400 else "errors"] += 1
+                if not keep_alive:
+                    break
+            if not keep_alive:
+                writer.close()
+                writer = None
+        except (ConnectionError, OSError, asyncio.IncompleteReadError, ValueError):
+            counters["errors"] += 1
+            if writer is not None:
+                writer.close()
+            writer = None
+    if writer is not None:
+        writer.close()
+
+
+async def run_load(url, body, concurrency, duration, pipeline):
+    parts = urlsplit(url)
+    request = build_request(url, body)
+    latencies, counters = [], {"ok": 0, "errors": 0}
+    start = time.perf_counter()
+    deadline = start + duration
+    await asyncio.gather(*(
+        worker(parts.hostname, parts.port or 80, request, pipeline, deadline, latencies, counters)
+        for _ in range(concurrency)
+    ))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+
+    def pct(p):
+        return latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))] * 1000 if latencies else None
+
+    return {
+        "url": url,
+        "concurrency": concurrency,
+        "pipeline": pipeline,
+        "duration_s": round(elapsed, 3),
+        "requests": counters["ok"],
+        "errors": counters["errors"],
+        "rps": round(counters["ok"] / elapsed, 1),
+        "p50_ms": pct(50),
+        "p90_ms": pct(90),
+        "p99_ms": pct(99),
+    }
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for_port(port, timeout=15.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"server on port {port} did not start")
+
+
+def run_spawned(kind, args, body):
+    port = free_port()
+    env = dict(os.environ, PYTHONWARNINGS="ignore")
+    proc = subprocess.Popen(SERVERS[kind] + [str(port)], cwd=APP_DIR, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for_port(port)
+        url = f"http://127.0.0.1:{port}/api/generate-plan"
+        # Flask's dev server speaks HTTP/1.0 (one request per connection): no pipelining
+        pipeline = 1 if kind == "flask" else args.pipeline
+        result = asyncio.run(run_load(url, body, args.concurrency, args.duration, pipeline))
+        result["server"] = kind
+        return result
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def print_result(r):
+    label = r.get("server", r["url"])
+    print(f"{label:>8}: {r['rps']:>9.1f} req/s  p50 {r['p50_ms'] or 0:7.2f} ms  "
+          f"p99 {r['p99_ms'] or 0:7.2f} ms  ({r['requests']} ok, {r['errors']} errors, "
+          f"c={r['concurrency']}, pipeline={r['pipeline']})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the plan API.")
+    parser.add_argument("--url", help="Endpoint of an already running server")
+    parser.add_argument("--compare", action="store_true", help="Spawn Flask and ASGI servers and test both")
+    parser.add_argument("--concurrency", "-c", type=int, default=32)
+    parser.add_argument("--duration", "-d", type=float, default=10.0)
+    parser.add_argument("--pipeline", "-p", type=int, default=1, help="Requests in flight per connection")
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    body = json.dumps(DEFAULT_BODY).encode()
+    if args.compare:
+        results = [run_spawned(kind, args, body) for kind in ("flask", "asgi")]
+    elif args.url:
+        results = [asyncio.run(run_load(args.url, body, args.concurrency, args.duration, args.pipeline))]
+    else:
+        parser.error("pass --url or --compare")
+
+    for r in results:
+        print_result(r)
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,550 @@
+"""
+Benchmark suite: planner micro-benchmarks and in-process API throughput
+Micro-benchmarks time the planner and backend building blocks directly;
+macro-benchmarks drive every Flask route through the test client with
+request bodies drawn from the synthetic cohort (see synthetic_cohort.py).
+
+Usage:
+  python benchmarks/run_benchmarks.py                        # everything
+  python benchmarks/run_benchmarks.py -k planner --kind micro
+  python benchmarks/run_benchmarks.py --json results.json    # save a run
+  python benchmarks/run_benchmarks.py --baseline results.json --threshold 0.15
+      # compare against a saved run; exits 1 if anything is >15% slower
+"""
+
+import argparse
+import datetime
+import itertools
+import json
+import platform
+import statistics
+import sys
+import time
+import warnings
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+warnings.filterwarnings("ignore")
+
+import backend_api  # noqa: E402
+import planner  # noqa: E402
+from bulk_planner import row_to_profile  # noqa: E402
+from synthetic_cohort import generate_rows, iter_profiles  # noqa: E402
+
+BENCHMARKS = {}
+# Rows each call processes, for benchmarks that also report rows/s
+ROWS = {}
+
+
+def benchmark(name, kind="micro", rows=None):
+    """Register a factory that sets up state and returns the zero-argument function to time."""
+    def register(factory):
+        BENCHMARKS[name] = (kind, factory)
+        if rows:
+            ROWS[name] = rows
+        return factory
+    return register
+
+
+def cycle(items):
+    return itertools.cycle(list(items)).__next__
+
+
+# ===============================
+# FIXTURES
+# ===============================
+COHORT_SIZE = 2000
+_state = {}
+
+
+def cohort_rows():
+    if "rows" not in _state:
+        _state["rows"] = generate_rows(COHORT_SIZE, seed=42)
+    return _state["rows"]
+
+
+def plan_bodies():
+    if "bodies" not in _state:
+        _state["bodies"] = list(iter_profiles(COHORT_SIZE, seed=42))
+    return _state["bodies"]
+
+
+def client():
+    if "client" not in _state:
+        _state["client"] = backend_api.app.test_client()
+    return _state["client"]
+
+
+def auth_header():
+    if "auth" not in _state:
+        c = client()
+        c.post("/api/auth/signup", json={"email": "bench@example.com", "username": "bench", "password": "pw"})
+        token = c.post("/api/auth/login", json={"email": "bench@example.com", "password": "pw"}).get_json()
+        _state["auth"] = {"Authorization": f"Bearer {token['access_token']}"}
+    return _state["auth"]
+
+
+def admin_header():
+    if not backend_api.app.config["ADMIN_TOKEN"]:
+        backend_api.app.config["ADMIN_TOKEN"] = "bench-admin"
+    return {"Authorization": f"Bearer {backend_api.app.config['ADMIN_TOKEN']}"}
+
+
+# ===============================
+# MICRO-BENCHMARKS
+# ===============================
+@benchmark("health.nutrition")
+def _():
+    import health
+
+    next_body = cycle(plan_bodies())
+
+    def run():
+        body = next_body()
+        return health.nutrition(body["age"], body["weight"], body["height"], body["gender"] == "Male")
+    return run
+
+
+@benchmark("health.health_metrics[1M rows]", rows=1_000_000)
+def _():
+    # Labels as a CSV would give them: string genders and activity levels
+    import health
+    from synthetic_cohort import generate_columns
+
+    columns = generate_columns(1_000_000, seed=1)
+    return lambda: health.health_metrics(
+        columns["Age"], columns["Weight_kg"], columns["Height_cm"], columns["Gender"], columns["Activity_Level"]
+    )
+
+
+@benchmark("planner.categorize_bmi")
+def _():
+    next_bmi = cycle(float(row["BMI"]) for row in cohort_rows())
+    return lambda: planner.categorize_bmi(next_bmi())
+
+
+@benchmark("planner.generate_exercise_plan")
+def _():
+    next_profile = cycle(row_to_profile(row) for row in cohort_rows())
+    return lambda: planner.generate_exercise_plan(next_profile())
+
+
+@benchmark("planner.generate_diet_plan")
+def _():
+    next_profile = cycle(row_to_profile(row) for row in cohort_rows())
+    return lambda: planner.generate_diet_plan(next_profile())
+
+
+@benchmark("bulk_planner.row_to_profile")
+def _():
+    next_row = cycle(cohort_rows())
+    return lambda: row_to_profile(next_row())
+
+
+@benchmark("backend_api.render_plan")
+def _():
+    return lambda: backend_api.render_plan("Vegan", 2370, 177, 266, 65)
+
+
+@benchmark("backend_api.plan_response[cached]")
+def _():
+    next_body = cycle(plan_bodies()[:100])
+    return lambda: backend_api.plan_response(next_body())
+
+
+@benchmark("backend_api.plan_response[uncached]")
+def _():
+    # Weight and height are rounded to 0.1 for the cache key, so stepping them
+    # by 0.1 gives every call a fresh key that always misses the response cache
+    # (1000 x 1000 combinations, all within the accepted ranges)
+    counter = itertools.count()
+
+    def call():
+        step_height, step_weight = divmod(next(counter) % 1000000, 1000)
+        return backend_api.plan_response({
+            "age": 25, "weight": 40 + step_weight * 0.1, "height": 120 + step_height * 0.1, "gender": "Male",
+        })
+    return call
+
+
+@benchmark("backend_api.compute_nutrition_batch[10k]")
+def _():
+    import numpy as np
+
+    bodies = (plan_bodies() * 5)[:10000]
+    columns = (
+        np.array([b["age"] for b in bodies], dtype=np.float64),
+        np.array([b["weight"] for b in bodies], dtype=np.float64),
+        np.array([b["height"] for b in bodies], dtype=np.float64),
+        np.array([b["gender"] == "Male" for b in bodies]),
+    )
+    return lambda: backend_api.compute_nutrition_batch(*columns)
+
+
+def meal_targets():
+    # (daily calories, protein, carbs, fats) and diet for every cohort body
+    if "meal_targets" not in _state:
+        import numpy as np
+
+        bodies = plan_bodies()
+        columns = backend_api.compute_nutrition_batch(
+            np.array([b["age"] for b in bodies], dtype=np.float64),
+            np.array([b["weight"] for b in bodies], dtype=np.float64),
+            np.array([b["height"] for b in bodies], dtype=np.float64),
+            np.array([b["gender"] == "Male" for b in bodies]),
+        )
+        _state["meal_targets"] = (np.column_stack(columns), [b["dietary_preference"] for b in bodies])
+    return _state["meal_targets"]
+
+
+@benchmark("meal_optimizer.plan_week")
+def _():
+    from meal_optimizer import plan_week
+
+    targets, diets = meal_targets()
+    catalog = backend_api.catalog_store.current()
+    next_user = cycle(zip(targets.tolist(), diets))
+
+    def run():
+        values, diet = next_user()
+        return plan_week(*values, diet, catalog)
+    return run
+
+
+@benchmark("meal_optimizer.plan_weeks[100]")
+def _():
+    from meal_optimizer import plan_weeks
+
+    targets, diets = meal_targets()
+    catalog = backend_api.catalog_store.current()
+    return lambda: plan_weeks(targets[:100], diets[:100], catalog)
+
+
+@benchmark("auth.verify[cached]")
+def _():
+    token = backend_api.token_verifier.sign({"email": "bench@example.com", "exp": int(time.time()) + 3600})
+    return lambda: backend_api.token_verifier.verify(token)
+
+
+@benchmark("user_store.find")
+def _():
+    from user_store import UserRecord, UserStore
+
+    store = UserStore()
+    for i in range(10000):
+        store.add(UserRecord(f"user{i}@example.com", f"user{i}", "pw"))
+    next_name = cycle(f"User{i}" for i in range(0, 10000, 7))
+    return lambda: store.find(next_name())
+
+
+@benchmark("progress.append")
+def _():
+    from progress import ProgressLog
+
+    log = ProgressLog()
+    day = datetime.date(2024, 1, 1)
+    return lambda: log.append(day, 2000.0)
+
+
+@benchmark("cohort_analytics.group_mean")
+def _():
+    from cohort_analytics import CohortAnalytics
+
+    engine = CohortAnalytics()
+    engine.append_rows(cohort_rows())
+    return lambda: engine.group_mean("Activity_Level", "Daily_Step_Count")
+
+
+def cohort_bodies():
+    # Request bodies carrying every cohort feature (opt in to recommendations)
+    if "cohort_bodies" not in _state:
+        from recommender import REQUEST_FIELDS
+
+        _state["cohort_bodies"] = [
+            {field: row[column] for field, column in REQUEST_FIELDS.items()} for row in cohort_rows()
+        ]
+    return _state["cohort_bodies"]
+
+
+@benchmark("recommender.recommend")
+def _():
+    from cohort_analytics import CohortAnalytics
+    from recommender import ProfileIndex, request_features
+
+    engine = CohortAnalytics()
+    engine.append_rows(cohort_rows())
+    index = ProfileIndex.from_cohort(engine)
+    next_features = cycle(request_features(body) for body in cohort_bodies())
+    return lambda: index.recommend(next_features())
+
+
+@benchmark("metrics.request_overhead")
+def _():
+    # Everything the instrumentation adds to one generate-plan request
+    from metrics import MetricsRegistry, mark
+
+    registry = MetricsRegistry()
+
+    def request():
+        timer, token = registry.start("generate_plan")
+        for phase in ("parse", "validation", "cache", "compute", "serialization", "handler"):
+            mark(phase)
+        registry.finish(timer, token, 200)
+    return request
+
+
+# ===============================
+# MACRO-BENCHMARKS (Flask test client)
+# ===============================
+@benchmark("POST /api/generate-plan", "macro")
+def _():
+    c, next_body = client(), cycle(plan_bodies())
+    return lambda: c.post("/api/generate-plan", json=next_body())
+
+
+@benchmark("GET /api/generate-plan", "macro")
+def _():
+    c = client()
+    next_query = cycle("/api/generate-plan?" + "&".join(f"{k}={v}" for k, v in b.items()) for b in plan_bodies())
+    return lambda: c.get(next_query())
+
+
+@benchmark("GET /api/generate-plan [304]", "macro")
+def _():
+    c = client()
+    query = "/api/generate-plan?age=25&weight=75&height=175&gender=Male&dietary_preference=Vegan"
+    headers = {"If-None-Match": c.get(query).headers["ETag"]}
+    return lambda: c.get(query, headers=headers)
+
+
+@benchmark("POST /api/generate-plans [100]", "macro")
+def _():
+    c, batch = client(), plan_bodies()[:100]
+    return lambda: c.post("/api/generate-plans", json=batch)
+
+
+@benchmark("POST /api/meal-plan", "macro")
+def _():
+    c, next_body = client(), cycle(plan_bodies())
+    return lambda: c.post("/api/meal-plan", json=next_body())
+
+
+@benchmark("POST /api/meal-plans [10]", "macro")
+def _():
+    c, next_batch = client(), cycle(plan_bodies()[i:i + 10] for i in range(0, 100, 10))
+    return lambda: c.post("/api/meal-plans", json=next_batch())
+
+
+@benchmark("GET /api/catalog", "macro")
+def _():
+    c = client()
+    return lambda: c.get("/api/catalog")
+
+
+@benchmark("GET /api/cache/stats", "macro")
+def _():
+    c = client()
+    return lambda: c.get("/api/cache/stats")
+
+
+@benchmark("GET /metrics", "macro")
+def _():
+    c = client()
+    return lambda: c.get("/metrics")
+
+
+@benchmark("POST /api/auth/signup", "macro")
+def _():
+    c, counter = client(), itertools.count()
+    return lambda: c.post("/api/auth/signup", json={
+        "email": f"signup{next(counter)}@example.com", "username": "someone", "password": "pw",
+    })
+
+
+@benchmark("POST /api/auth/login", "macro")
+def _():
+    c = client()
+    auth_header()
+    return lambda: c.post("/api/auth/login", json={"username": "bench", "password": "pw"})
+
+
+@benchmark("POST /api/auth/logout", "macro")
+def _():
+    # Each call revokes a freshly signed token, so signing is included
+    c, counter = client(), itertools.count()
+
+    def logout():
+        token = backend_api.token_verifier.sign(
+            {"email": "bench@example.com", "exp": int(time.time()) + 3600, "n": next(counter)}
+        )
+        return c.post("/api/auth/logout", headers={"Authorization": f"Bearer {token}"})
+    return logout
+
+
+@benchmark("POST /api/progress", "macro")
+def _():
+    c, headers = client(), auth_header()
+    return lambda: c.post("/api/progress", json={"calories": 2100, "date": "2024-05-01"}, headers=headers)
+
+
+@benchmark("GET /api/progress/summary", "macro")
+def _():
+    c, headers = client(), auth_header()
+    return lambda: c.get("/api/progress/summary", headers=headers)
+
+
+@benchmark("GET /api/progress/series", "macro")
+def _():
+    c, headers = client(), auth_header()
+    return lambda: c.get("/api/progress/series?period=week&limit=12", headers=headers)
+
+
+@benchmark("GET /api/analytics/*", "macro")
+def _():
+    c = client()
+    next_url = cycle([
+        "/api/analytics/summary",
+        "/api/analytics/counts/Gender",
+        "/api/analytics/group-mean?by=Gender&column=BMI",
+        "/api/analytics/crosstab?rows=Activity_Level&columns=BMI_Category",
+        "/api/analytics/histogram/BMI?bins=10",
+        "/api/analytics/correlation",
+    ])
+    return lambda: c.get(next_url())
+
+
+@benchmark("POST /api/similar-profiles", "macro")
+def _():
+    c, next_body = client(), cycle(cohort_bodies())
+    return lambda: c.post("/api/similar-profiles", json=next_body())
+
+
+@benchmark("POST /api/generate-plan [cohort features]", "macro")
+def _():
+    c, next_body = client(), cycle(cohort_bodies())
+    return lambda: c.post("/api/generate-plan", json=next_body())
+
+
+@benchmark("POST /api/analytics/rows", "macro")
+def _():
+    c, headers, next_row = client(), admin_header(), cycle(cohort_rows())
+    return lambda: c.post("/api/analytics/rows", json=next_row(), headers=headers)
+
+
+# ===============================
+# RUNNER
+# ===============================
+def measure(func, min_time=0.2, repeat=5):
+    """Time `func`; returns per-call seconds for each of `repeat` runs of ~min_time."""
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time / 4 or number >= 1 << 20:
+            break
+        number *= 4
+    number = max(1, int(number * (min_time / max(elapsed, 1e-9))))
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        runs.append((time.perf_counter() - start) / number)
+    return runs, number
+
+
+def uncovered_routes():
+    """API routes no macro-benchmark exercises ("/prefix/*" covers everything below it)."""
+    timed = {name.split(" ")[1] for name, (kind, _) in BENCHMARKS.items() if kind == "macro"}
+    prefixes = tuple(path[:-1] for path in timed if path.endswith("*"))
+    routes = {rule.rule for rule in backend_api.app.url_map.iter_rules() if rule.rule.startswith("/api/")}
+    return sorted(r for r in routes if r not in timed and not r.startswith(prefixes))
+
+
+def compare(results, baseline, threshold):
+    """Print the per-benchmark change against a baseline; returns the names that regressed."""
+    regressions = []
+    print(f"\n{'benchmark':<44} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, result in results.items():
+        old = baseline.get("results", {}).get(name)
+        if old is None:
+            continue
+        change = result["us_per_op"] / old["us_per_op"] - 1
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<44} {old['us_per_op']:>10.2f}us {result['us_per_op']:>10.2f}us {change:>+7.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Planner and API benchmark suite.")
+    parser.add_argument("-k", dest="keyword", help="Only run benchmarks whose name contains this")
+    parser.add_argument("--kind", choices=["micro", "macro"], help="Only run one kind")
+    parser.add_argument("--min-time", type=float, default=0.2, help="Seconds per repeat")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", help="Write results to this file")
+    parser.add_argument("--baseline", help="Results file from an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed slowdown vs. baseline (0.10 = 10%%)")
+    parser.add_argument("--list", action="store_true", help="List benchmarks and exit")
+    args = parser.parse_args()
+
+    selected = [
+        (name, kind, factory) for name, (kind, factory) in BENCHMARKS.items()
+        if (not args.keyword or args.keyword in name) and (not args.kind or kind == args.kind)
+    ]
+    if args.list:
+        for name, kind, _ in selected:
+            print(f"{kind:<6} {name}")
+        return
+
+    results = {}
+    print(f"{'benchmark':<44} {'us/op':>10} {'ops/s':>12} {'stdev':>7}")
+    for name, kind, factory in selected:
+        runs, number = measure(factory(), args.min_time, args.repeat)
+        best = min(runs)
+        results[name] = {
+            "kind": kind,
+            "us_per_op": best * 1e6,
+            "ops_per_sec": 1 / best,
+            "median_us": statistics.median(runs) * 1e6,
+            "stdev_pct": statistics.pstdev(runs) / statistics.mean(runs) * 100,
+            "calls_per_repeat": number,
+        }
+        r = results[name]
+        rows = ""
+        if name in ROWS:
+            r["rows_per_sec"] = ROWS[name] / best
+            rows = f"  {r['rows_per_sec'] / 1e6:.1f}M rows/s"
+        print(f"{name:<44} {r['us_per_op']:>10.2f} {r['ops_per_sec']:>12.0f} {r['stdev_pct']:>6.1f}%{rows}")
+
+    missing = uncovered_routes()
+    if missing and not args.keyword and args.kind != "micro":
+        print(f"\nRoutes without a benchmark: {', '.join(missing)}")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps({
+            "meta": {
+                "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "min_time": args.min_time,
+                "repeat": args.repeat,
+            },
+            "results": results,
+        }, indent=2))
+
+    if args.baseline:
+        regressions = compare(results, json.loads(Path(args.baseline).read_text()), args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Synthetic cohort generator modeled on fitness.csv
+Categorical columns are drawn with the frequencies observed in fitness.csv,
+numeric columns from a normal fit of each column clipped to its observed
+range, and BMI is derived from height and weight. Without fitness.csv the
+built-in fallback distribution is used.
+Usage: python benchmarks/synthetic_cohort.py --rows 100000 -o cohort.csv [--seed 0]
+"""
+
+import argparse
+import csv
+import sys
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+DEFAULT_SOURCE = Path(__file__).resolve().parent.parent.parent / "fitness.csv"
+
+COLUMNS = [
+    "S_ID", "Age", "Gender", "Height_cm", "Weight_kg", "Fitness_Goal", "Activity_Level",
+    "Preferred_Workout_Time", "Dietary_Preference", "Daily_Step_Count", "Resting_Heart_Rate",
+    "Academic_Schedule", "Preferred_Exercise_Type", "Weekly_Workout_Frequency", "Chronic_Condition", "BMI",
+]
+# column -> (mean, std, min, max), as fitted on fitness.csv; all integer-valued
+NUMERIC = {
+    "Age": (22.1, 2.6, 18, 26),
+    "Height_cm": (170.8, 11.7, 150, 190),
+    "Weight_kg": (72.0, 16.4, 45, 100),
+    "Daily_Step_Count": (9220.5, 3622.9, 3038, 14939),
+    "Resting_Heart_Rate": (80.5, 11.6, 60, 100),
+    "Academic_Schedule": (7.0, 2.1, 4, 10),
+    "Weekly_Workout_Frequency": (4.2, 1.9, 1, 7),
+}
+# column -> label counts
+CATEGORICAL = {
+    "Gender": {"Male": 85, "Other": 19, "Female": 96},
+    "Fitness_Goal": {"Endurance": 50, "Flexibility": 47, "Muscle Gain": 54, "Weight Loss": 49},
+    "Activity_Level": {"Active": 54, "Lightly Active": 47, "Very Active": 46, "Sedentary": 53},
+    "Preferred_Workout_Time": {"Morning": 61, "Afternoon": 71, "Evening": 68},
+    "Dietary_Preference": {"Vegetarian": 58, "Vegan": 52, "Non-Vegetarian": 49, "Jain": 41},
+    "Preferred_Exercise_Type": {"Gym": 43, "Home Workouts": 41, "Running": 34, "Sports": 46, "Yoga": 36},
+    "Chronic_Condition": {"None": 142, "Asthma": 32, "Hypertension": 26},
+}
+
+
+def fit_distributions(path: Optional[Path]) -> tuple:
+    """Estimate NUMERIC/CATEGORICAL from a cohort CSV; falls back to the built-ins."""
+    if path is None or not path.exists():
+        return NUMERIC, CATEGORICAL
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    if not rows:
+        return NUMERIC, CATEGORICAL
+    numeric = {}
+    for name in NUMERIC:
+        values = np.array([float(row[name]) for row in rows])
+        numeric[name] = (values.mean(), values.std(), values.min(), values.max())
+    categorical = {}
+    for name in CATEGORICAL:
+        counts: Dict[str, int] = {}
+        for row in rows:
+            counts[row[name]] = counts.get(row[name], 0) + 1
+        categorical[name] = counts
+    return numeric, categorical
+
+
+def generate_columns(n: int, seed: int = 0, source: Optional[Path] = DEFAULT_SOURCE) -> Dict[str, np.ndarray]:
+    """n synthetic rows as NumPy columns keyed like fitness.csv."""
+    numeric, categorical = fit_distributions(source)
+    rng = np.random.default_rng(seed)
+    columns: Dict[str, np.ndarray] = {"S_ID": np.char.add("S", np.arange(1, n + 1).astype(str))}
+    for name, (mean, std, low, high) in numeric.items():
+        columns[name] = np.clip(np.rint(rng.normal(mean, std, n)), low, high).astype(np.int64)
+    for name, counts in categorical.items():
+        labels = np.array(list(counts))
+        weights = np.array(list(counts.values()), dtype=np.float64)
+        columns[name] = labels[rng.choice(len(labels), size=n, p=weights / weights.sum())]
+    height_m = columns["Height_cm"] / 100
+    columns["BMI"] = np.round(columns["Weight_kg"] / (height_m * height_m), 2)
+    return columns
+
+
+def generate_rows(n: int, seed: int = 0, source: Optional[Path] = DEFAULT_SOURCE) -> List[Dict[str, str]]:
+    """n synthetic rows as dicts of strings, as csv.DictReader would yield them."""
+    columns = generate_columns(n, seed, source)
+    as_text = [columns[name].astype(str).tolist() for name in COLUMNS]
+    return [dict(zip(COLUMNS, values)) for values in zip(*as_text)]
+
+
+def iter_profiles(n: int, seed: int = 0) -> Iterator[dict]:
+    """n /api/generate-plan request bodies with the cohort's age/height/weight/gender mix."""
+    columns = generate_columns(n, seed)
+    diets = np.array(["Balanced", "Vegetarian", "Vegan", "Keto", "Paleo"])
+    preference = diets[np.random.default_rng(seed + 1).integers(0, len(diets), n)]
+    for i in range(n):
+        yield {
+            "age": int(columns["Age"][i]),
+            "weight": int(columns["Weight_kg"][i]),
+            "height": int(columns["Height_cm"][i]),
+            "gender": "Male" if columns["Gender"][i] == "Male" else "Female",
+            "dietary_preference": str(preference[i]),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--source", type=Path, default=DEFAULT_SOURCE, help="Cohort CSV to fit distributions on")
+    parser.add_argument("-o", "--output", help="Output CSV (default: stdout)")
+    args = parser.parse_args()
+
+    rows = generate_rows(args.rows, args.seed, args.source)
+    out = open(args.output, "w", newline="", encoding="utf-8") if args.output else sys.stdout
+    try:
+        writer = csv.DictWriter(out, fieldnames=COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+    finally:
+        if args.output:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
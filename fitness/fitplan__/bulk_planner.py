@@ -0,0 +1,265 @@
+"""
+Bulk Plan Generator - Cohort files to plans
+Streams a fitness.csv-style cohort (CSV or Parquet) in fixed-size chunks,
+maps every row onto planner.UserProfile and writes one plan per row as
+JSONL or Parquet. Memory use depends on the chunk size, not the file size.
+
+Usage: python bulk_planner.py ../fitness.csv plans.jsonl [--chunk-size 1000] [--workers N]
+       python bulk_planner.py cohort.parquet plans.parquet
+Parquet input/output needs pyarrow (pip install pyarrow).
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import health
+from planner import UserProfile, generate_diet_plan, generate_exercise_plan
+
+DEFAULT_CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 100
+
+# Cohort labels -> the vocabulary planner.py understands
+GOAL_MAP = {
+    "Weight Loss": "Lose fat / weight loss",
+    "Muscle Gain": "Build muscle / strength",
+    "Endurance": "Improve overall fitness",
+    "Flexibility": "Improve overall fitness",
+}
+
+ACTIVITY_MAP = {
+    "Sedentary": "Sedentary",
+    "Lightly Active": "Lightly active",
+    "Active": "Moderately active",
+    "Moderately Active": "Moderately active",
+    "Very Active": "Very active",
+}
+
+DIET_MAP = {
+    "Non-Vegetarian": "No specific restriction",
+    "Jain": "Vegetarian",
+}
+
+
+def row_to_profile(row: Dict[str, str]) -> UserProfile:
+    """Map one cohort row onto a UserProfile. Raises ValueError/KeyError on bad rows."""
+    height_cm = float(row["Height_cm"])
+    weight_kg = float(row["Weight_kg"])
+    bmi = row.get("BMI")
+    if bmi in (None, ""):
+        bmi = health.bmi(weight_kg, height_cm)
+
+    goal = row.get("Fitness_Goal", "")
+    activity = row.get("Activity_Level", "")
+    diet = row.get("Dietary_Preference", "")
+    return UserProfile(
+        age=int(row["Age"]),
+        gender=row.get("Gender", ""),
+        height_cm=height_cm,
+        weight_kg=weight_kg,
+        bmi=float(bmi),
+        goal=GOAL_MAP.get(goal, goal),
+        activity_level=ACTIVITY_MAP.get(activity, activity),
+        dietary_restrictions=DIET_MAP.get(diet, diet),
+        workout_time_pref=row.get("Preferred_Workout_Time", ""),
+    )
+
+
+def _iter_csv_rows(path: str) -> Iterator[Dict[str, str]]:
+    with open(path, newline="", encoding="utf-8") as f:
+        yield from csv.DictReader(f)
+
+
+def _iter_parquet_rows(path: str, chunk_size: int) -> Iterator[Dict[str, str]]:
+    import pyarrow.parquet as pq
+
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+        yield from batch.to_pylist()
+
+
+def iter_rows(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Dict[str, str]]:
+    if path.endswith(".parquet"):
+        return _iter_parquet_rows(path, chunk_size)
+    if path == "-":
+        return csv.DictReader(sys.stdin)
+    return _iter_csv_rows(path)
+
+
+def iter_chunks(rows: Iterable, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[List]:
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def plan_row(row: Dict[str, str], row_number: int) -> Tuple[Optional[dict], Optional[str]]:
+    """Return (record, None) for a good row or (None, error message) for a bad one."""
+    row_id = row.get("S_ID") or str(row_number)
+    try:
+        profile = row_to_profile(row)
+    except (KeyError, TypeError, ValueError) as e:
+        return None, f"row {row_number} ({row_id}): {e!r}"
+    return {
+        "id": row_id,
+        "profile": asdict(profile),
+        "bmi_category": health.bmi_category(profile.bmi),
+        "exercise_plan": generate_exercise_plan(profile),
+        "diet_plan": generate_diet_plan(profile),
+    }, None
+
+
+def plan_chunk(chunk: List[Dict[str, str]], start: int = 0) -> Tuple[List[dict], List[str]]:
+    records, errors = [], []
+    for offset, row in enumerate(chunk):
+        record, error = plan_row(row, start + offset + 1)
+        if error:
+            errors.append(error)
+        else:
+            records.append(record)
+    return records, errors
+
+
+class JsonlWriter:
+    def __init__(self, path: str):
+        self._f = sys.stdout if path == "-" else open(path, "w", encoding="utf-8")
+
+    @staticmethod
+    def encode(records: List[dict]) -> str:
+        # Runs in the worker process so only one string crosses the process boundary
+        return "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records)
+
+    def write(self, payload: str):
+        self._f.write(payload)
+
+    def close(self):
+        if self._f is not sys.stdout:
+            self._f.close()
+
+
+class ParquetWriter:
+    def __init__(self, path: str):
+        import pyarrow  # noqa: F401  (fail early if pyarrow is missing)
+
+        self._path = path
+        self._writer = None
+
+    @staticmethod
+    def encode(records: List[dict]) -> List[dict]:
+        return records
+
+    def write(self, records: List[dict]):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if not records:
+            return
+        if self._writer is None:
+            table = pa.Table.from_pylist(records)
+            self._writer = pq.ParquetWriter(self._path, table.schema)
+        else:
+            table = pa.Table.from_pylist(records, schema=self._writer.schema)
+        self._writer.write_table(table)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+def open_writer(path: str, fmt: Optional[str] = None):
+    fmt = fmt or ("parquet" if path.endswith(".parquet") else "jsonl")
+    if fmt == "parquet":
+        return ParquetWriter(path)
+    return JsonlWriter(path)
+
+
+def _plan_chunk_task(chunk: List[Dict[str, str]], start: int, encode) -> Tuple[object, int, List[str]]:
+    records, errors = plan_chunk(chunk, start)
+    return encode(records), len(records), errors
+
+
+def _iter_results(chunks: Iterator[List], encode, workers: int):
+    """
+    Yield (payload, planned, errors) per chunk, in input order.
+    With workers > 1 chunks are sharded across a process pool; at most
+    2 * workers chunks are in flight so memory stays bounded.
+    """
+    start = 0
+    if workers <= 1:
+        for chunk in chunks:
+            yield _plan_chunk_task(chunk, start, encode)
+            start += len(chunk)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(_plan_chunk_task, chunk, start, encode))
+            start += len(chunk)
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def generate_bulk_plans(input_path: str, output_path: str, fmt: Optional[str] = None,
+                        chunk_size: int = DEFAULT_CHUNK_SIZE, workers: int = 1) -> Tuple[int, int, List[str]]:
+    """
+    Stream input_path chunk by chunk and write one plan per valid row.
+    Output order always matches input order, whatever the number of workers.
+    Returns (plans written, rows skipped, first MAX_REPORTED_ERRORS row errors).
+    """
+    writer = open_writer(output_path, fmt)
+    written, skipped, errors = 0, 0, []
+    try:
+        chunks = iter_chunks(iter_rows(input_path, chunk_size), chunk_size)
+        for payload, planned, chunk_errors in _iter_results(chunks, writer.encode, workers):
+            writer.write(payload)
+            written += planned
+            skipped += len(chunk_errors)
+            errors.extend(chunk_errors[:MAX_REPORTED_ERRORS - len(errors)])
+    finally:
+        writer.close()
+    return written, skipped, errors
+
+
+def positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be a positive integer, got {value}")
+    return number
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate plans for every row of a cohort file.")
+    parser.add_argument("input", help="Cohort CSV or .parquet file ('-' for CSV on stdin)")
+    parser.add_argument("output", help="Output .jsonl or .parquet file ('-' for JSONL on stdout)")
+    parser.add_argument("--format", choices=["jsonl", "parquet"], help="Output format (default: from extension)")
+    parser.add_argument("--chunk-size", type=positive_int, default=DEFAULT_CHUNK_SIZE, help="Rows per chunk")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Worker processes (0 = one per CPU, 1 = run in-process)")
+    args = parser.parse_args(argv)
+    workers = args.workers if args.workers > 0 else (os.cpu_count() or 1)
+
+    try:
+        written, skipped, errors = generate_bulk_plans(
+            args.input, args.output, args.format, args.chunk_size, workers
+        )
+    except ImportError:
+        parser.exit(1, "Parquet support needs pyarrow: pip install pyarrow\n")
+
+    for error in errors:
+        print(f"skipped {error}", file=sys.stderr)
+    print(f"{written} plans written, {skipped} rows skipped", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,403 @@
+"""
+Diet and workout catalog.
+Meals, exercises, the named diet plans and the weekly workouts used by the
+API and by planner.py live in a versioned JSON file (catalog.json next to
+this module, or FITPLAN_CATALOG). It is compiled into a read-only Catalog:
+records are named tuples of interned strings, identical tag sets are shared,
+and meals/exercises are indexed by dietary tag, goal, meal slot and intensity.
+
+A CatalogStore holds the current Catalog. A reload parses and validates a
+complete new Catalog off to the side and then swaps a single reference, so
+readers never take a lock and a request keeps the snapshot it started with.
+Subscribers (backend_api's pre-encoded fragments, planner's compiled
+tables) build their derived state from each new snapshot before anything is
+swapped. A file that fails to load, or that any subscriber fails to build
+from, leaves the current catalog and all derived state in place.
+
+Usage: python catalog.py check [catalog.json]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from types import MappingProxyType
+from typing import Callable, Dict, FrozenSet, List, Mapping, NamedTuple, Optional, Tuple
+
+SCHEMA_VERSION = 1
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "catalog.json")
+MACRO_KEYS = ("protein_g", "carbs_g", "fats_g")
+# Keys the planner section must provide (see planner.py)
+PLANNER_KEYS = (
+    "workout", "exercise_goal_notes", "exercise_time_note",
+    "diet_tags", "diet_goal_notes", "diet_default_note", "diet_bmi_notes",
+)
+
+
+class CatalogError(ValueError):
+    """The catalog file is missing, malformed or inconsistent."""
+
+
+class Meal(NamedTuple):
+    id: str
+    slot: str
+    name: str
+    tags: FrozenSet[str]
+    goals: FrozenSet[str]
+    # Grams of protein, carbs and fats per serving; None when not specified
+    macros: Optional[Tuple[float, float, float]]
+
+
+class Exercise(NamedTuple):
+    id: str
+    name: str
+    details: str
+    intensity: str
+    goals: FrozenSet[str]
+
+
+def _check(condition, message):
+    if not condition:
+        raise CatalogError(message)
+
+
+def _text(entry, key, where, default=None) -> str:
+    value = entry.get(key, default)
+    _check(isinstance(value, str) and (value or default is not None), f"{where}: '{key}' must be a non-empty string")
+    return sys.intern(value)
+
+
+def _macros(entry, where) -> Optional[Tuple[float, float, float]]:
+    macros = entry.get("macros")
+    if macros is None:
+        return None
+    _check(isinstance(macros, dict), f"{where}: 'macros' must be an object")
+    values = tuple(macros.get(key) for key in MACRO_KEYS)
+    _check(all(isinstance(v, (int, float)) and v >= 0 for v in values),
+           f"{where}: 'macros' needs non-negative {', '.join(MACRO_KEYS)}")
+    _check(sum(values) > 0, f"{where}: 'macros' are all zero")
+    return tuple(float(v) for v in values)
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class Catalog:
+    """One immutable catalog snapshot."""
+
+    def __init__(self, document: dict, digest: str = "", path: Optional[str] = None):
+        _check(isinstance(document, dict), "catalog must be a JSON object")
+        _check(document.get("schema") == SCHEMA_VERSION,
+               f"unsupported catalog schema {document.get('schema')!r} (expected {SCHEMA_VERSION})")
+        self.revision = str(document.get("revision", ""))
+        self.digest = digest
+        self.path = path
+        self.loaded_at = time.time()
+        self._sets: Dict[FrozenSet[str], FrozenSet[str]] = {}
+        self.meal_slots: Tuple[str, ...] = tuple(sys.intern(slot) for slot in document.get("meal_slots", ()))
+        _check(self.meal_slots, "'meal_slots' must list at least one slot")
+
+        meals: Dict[str, Meal] = {}
+        for entry in document.get("meals", ()):
+            where = f"meal {entry.get('id')!r}"
+            meal = Meal(
+                _text(entry, "id", where), _text(entry, "slot", where), _text(entry, "name", where),
+                self._tag_set(entry.get("tags", [])), self._tag_set(entry.get("goals", [])),
+                _macros(entry, where),
+            )
+            _check(meal.id not in meals, f"{where}: duplicate id")
+            _check(meal.slot in self.meal_slots, f"{where}: unknown slot {meal.slot!r}")
+            meals[meal.id] = meal
+        exercises: Dict[str, Exercise] = {}
+        for entry in document.get("exercises", ()):
+            where = f"exercise {entry.get('id')!r}"
+            exercise = Exercise(
+                _text(entry, "id", where), _text(entry, "name", where), _text(entry, "details", where, ""),
+                _text(entry, "intensity", where), self._tag_set(entry.get("goals", [])),
+            )
+            _check(exercise.id not in exercises, f"{where}: duplicate id")
+            exercises[exercise.id] = exercise
+        self.meals: Tuple[Meal, ...] = tuple(meals.values())
+        self.exercises: Tuple[Exercise, ...] = tuple(exercises.values())
+        self.meal_by_id: Mapping[str, Meal] = MappingProxyType(meals)
+        self.exercise_by_id: Mapping[str, Exercise] = MappingProxyType(exercises)
+
+        diet_plans = {}
+        for name, slots in document.get("diet_plans", {}).items():
+            plan = {}
+            for slot, meal_id in slots.items():
+                meal = meals.get(meal_id)
+                _check(meal is not None, f"diet plan {name!r}: unknown meal {meal_id!r}")
+                _check(meal.slot == slot, f"diet plan {name!r}: meal {meal_id!r} is not a {slot} meal")
+                plan[meal.slot] = meal
+            diet_plans[sys.intern(name)] = MappingProxyType(plan)
+        workouts = {}
+        for name, days in document.get("workouts", {}).items():
+            program = {}
+            for day, exercise_id in days.items():
+                _check(exercise_id in exercises, f"workout {name!r}: unknown exercise {exercise_id!r}")
+                program[sys.intern(day)] = exercises[exercise_id]
+            workouts[sys.intern(name)] = MappingProxyType(program)
+        self.diet_plans: Mapping[str, Mapping[str, Meal]] = MappingProxyType(diet_plans)
+        self.workouts: Mapping[str, Mapping[str, Exercise]] = MappingProxyType(workouts)
+
+        self.default_diet = _text(document, "default_diet", "catalog")
+        self.default_workout = _text(document, "default_workout", "catalog")
+        _check(self.default_diet in diet_plans, f"default_diet {self.default_diet!r} is not a diet plan")
+        _check(self.default_workout in workouts, f"default_workout {self.default_workout!r} is not a workout")
+        diet_workouts = {}
+        for diet, workout in document.get("diet_workouts", {}).items():
+            _check(workout in workouts, f"diet_workouts: unknown workout {workout!r} for {diet!r}")
+            diet_workouts[sys.intern(diet)] = sys.intern(workout)
+        self.diet_workouts: Mapping[str, str] = MappingProxyType(diet_workouts)
+        # Preferred exercise type (the cohort's labels, see recommender.py) -> workout
+        exercise_type_workouts = {}
+        for exercise_type, workout in document.get("exercise_type_workouts", {}).items():
+            _check(workout in workouts, f"exercise_type_workouts: unknown workout {workout!r} for {exercise_type!r}")
+            exercise_type_workouts[sys.intern(exercise_type)] = sys.intern(workout)
+        self.exercise_type_workouts: Mapping[str, str] = MappingProxyType(exercise_type_workouts)
+        # diet -> (protein, carbs, fats) shares of calories, where a diet
+        # departs from the standard split (e.g. keto)
+        macro_splits = {}
+        for diet, split in document.get("diet_macro_splits", {}).items():
+            shares = tuple(split.get(key) for key in ("protein", "carbs", "fats"))
+            _check(all(isinstance(v, (int, float)) and v >= 0 for v in shares) and abs(sum(shares) - 1) < 1e-6,
+                   f"diet_macro_splits {diet!r}: protein, carbs and fats must be shares summing to 1")
+            macro_splits[sys.intern(diet)] = tuple(float(v) for v in shares)
+        self.macro_splits: Mapping[str, Tuple[float, float, float]] = MappingProxyType(macro_splits)
+
+        planner = document.get("planner", {})
+        missing = [key for key in PLANNER_KEYS if key not in planner]
+        _check(not missing, f"planner section is missing {', '.join(missing)}")
+        _check(planner["workout"] in workouts, f"planner workout {planner['workout']!r} is not a workout")
+        _check("" in planner["diet_tags"], "planner diet_tags needs an entry for no restriction ('')")
+        try:
+            planner["exercise_time_note"].format(time="morning")
+        except (AttributeError, IndexError, KeyError, ValueError) as e:
+            raise CatalogError(f"planner exercise_time_note may only use {{time}}: {e!r}") from e
+        self.planner: Mapping[str, object] = _freeze(planner)
+
+        self._meal_index = self._index(self.meals, slot=lambda m: (m.slot,), tag=lambda m: m.tags,
+                                       goal=lambda m: m.goals)
+        self._exercise_index = self._index(self.exercises, goal=lambda e: e.goals,
+                                           intensity=lambda e: (e.intensity,))
+        # (kind, criteria) -> result; a snapshot never changes, so neither do its answers
+        self._queries: Dict[tuple, tuple] = {}
+
+    @classmethod
+    def load(cls, path: str) -> "Catalog":
+        try:
+            with open(path, "rb") as f:
+                raw = f.read()
+            document = json.loads(raw)
+        except (OSError, ValueError) as e:
+            raise CatalogError(f"cannot load catalog {path}: {e}") from e
+        try:
+            return cls(document, hashlib.blake2b(raw, digest_size=8).hexdigest(), path)
+        except (AttributeError, KeyError, TypeError) as e:
+            raise CatalogError(f"malformed catalog {path}: {e!r}") from e
+
+    def _tag_set(self, values) -> FrozenSet[str]:
+        _check(isinstance(values, list) and all(isinstance(v, str) for v in values), "tags/goals must be lists of strings")
+        tags = frozenset(sys.intern(v) for v in values)
+        return self._sets.setdefault(tags, tags)
+
+    @staticmethod
+    def _index(records, **fields) -> Dict[Tuple[str, str], tuple]:
+        index: Dict[Tuple[str, str], list] = {}
+        for record in records:
+            for field, values in fields.items():
+                for value in values(record):
+                    index.setdefault((field, value), []).append(record)
+        return {key: tuple(found) for key, found in index.items()}
+
+    @staticmethod
+    def _select(index, everything, criteria, keep):
+        # Start from the smallest posting list and filter it by the rest
+        keys = [(field, value) for field, values in criteria for value in values]
+        if not keys:
+            return everything
+        candidates = min((index.get(key, ()) for key in keys), key=len)
+        return candidates if len(keys) == 1 else tuple(record for record in candidates if keep(record))
+
+    # --- queries ---
+    def find_meals(self, slot: Optional[str] = None, tags=(), goal: Optional[str] = None) -> Tuple[Meal, ...]:
+        """Meals in `slot` carrying every tag in `tags` (and `goal`), in catalog order."""
+        tags = frozenset(tags)
+        query = ("meals", slot, tags, goal)
+        found = self._queries.get(query)
+        if found is None:
+            found = self._queries[query] = self._select(
+                self._meal_index, self.meals,
+                [("slot", [slot] if slot else []), ("tag", tags), ("goal", [goal] if goal else [])],
+                lambda m: (slot is None or m.slot == slot) and tags <= m.tags and (goal is None or goal in m.goals),
+            )
+        return found
+
+    def find_exercises(self, goal: Optional[str] = None, intensity: Optional[str] = None) -> Tuple[Exercise, ...]:
+        """Exercises for `goal` at `intensity`, in catalog order."""
+        query = ("exercises", goal, intensity)
+        found = self._queries.get(query)
+        if found is None:
+            found = self._queries[query] = self._select(
+                self._exercise_index, self.exercises,
+                [("goal", [goal] if goal else []), ("intensity", [intensity] if intensity else [])],
+                lambda e: (goal is None or goal in e.goals) and (intensity is None or e.intensity == intensity),
+            )
+        return found
+
+    def diet_plan(self, diet: str) -> Mapping[str, Meal]:
+        return self.diet_plans.get(diet) or self.diet_plans[self.default_diet]
+
+    def workout_for(self, diet: str, exercise_type: Optional[str] = None) -> str:
+        """
+        Name of the workout program for a preferred exercise type, if the
+        catalog maps it, otherwise the one that goes with the diet plan.
+        """
+        workout = self.exercise_type_workouts.get(exercise_type) if exercise_type else None
+        return workout or self.diet_workouts.get(diet, self.default_workout)
+
+    def summary(self) -> dict:
+        return {
+            "revision": self.revision,
+            "digest": self.digest,
+            "path": self.path,
+            "loaded_at": self.loaded_at,
+            "meals": len(self.meals),
+            "exercises": len(self.exercises),
+            "diet_plans": len(self.diet_plans),
+            "workouts": len(self.workouts),
+        }
+
+
+def _source_key(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+class CatalogStore:
+    """
+    The current Catalog plus hot reload. current() is a plain attribute read;
+    reloads are serialized among themselves but never block readers.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[Catalog], Callable[[], None]]] = []
+        self._watcher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.reloads = 0
+        self.last_error: Optional[str] = None
+        self._source = _source_key(path)
+        self._catalog = Catalog.load(path)
+
+    def current(self) -> Catalog:
+        return self._catalog
+
+    def subscribe(self, listener: Callable[[Catalog], Callable[[], None]]):
+        """
+        Call listener(catalog) with the current catalog now and with every new
+        one. The listener builds its derived state and returns a function that
+        swaps it in; those run only once every listener has built.
+        """
+        with self._lock:
+            apply = listener(self._catalog)
+            self._listeners.append(listener)
+            apply()
+
+    def reload(self, force: bool = False) -> bool:
+        """
+        Load the file if it changed since the last load (always with force).
+        Returns True if a catalog with different content was swapped in. An
+        invalid file, or one a subscriber cannot build from, raises
+        CatalogError and the current catalog stays.
+        Replace the file atomically (write elsewhere, then rename) so a reload
+        never reads it half-written.
+        """
+        with self._lock:
+            source = _source_key(self.path)
+            if not force and source == self._source:
+                return False
+            try:
+                catalog = Catalog.load(self.path)
+            except CatalogError as e:
+                self.last_error = str(e)
+                raise
+            self._source, self.last_error = source, None
+            if catalog.digest == self._catalog.digest:
+                return False
+            try:
+                applies = [listener(catalog) for listener in self._listeners]
+            except Exception as e:
+                self.last_error = f"cannot build from catalog {self.path}: {e!r}"
+                raise CatalogError(self.last_error) from e
+            self._catalog = catalog
+            for apply in applies:
+                apply()
+            self.reloads += 1
+            return True
+
+    def watch(self, interval: float):
+        """Poll the file every `interval` seconds and reload it when it changes."""
+        if self._watcher is not None:
+            return
+        self._stop.clear()
+
+        def poll():
+            while not self._stop.wait(interval):
+                try:
+                    self.reload()
+                except CatalogError:
+                    pass  # kept in last_error; retried once the file changes again
+
+        self._watcher = threading.Thread(target=poll, name="fitplan-catalog-watch", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self):
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+
+    def status(self) -> dict:
+        return {
+            **self._catalog.summary(),
+            "reloads": self.reloads,
+            "watching": self._watcher is not None,
+            "last_error": self.last_error,
+        }
+
+
+# The process-wide catalog, shared by planner.py and backend_api.py
+store = CatalogStore(os.environ.get("FITPLAN_CATALOG") or DEFAULT_PATH)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Catalog tools.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    check = sub.add_parser("check", help="Validate a catalog file before deploying it")
+    check.add_argument("path", nargs="?", default=DEFAULT_PATH)
+    args = parser.parse_args()
+
+    try:
+        catalog = Catalog.load(args.path)
+    except CatalogError as e:
+        print(f"invalid: {e}")
+        sys.exit(1)
+    print(json.dumps(catalog.summary(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
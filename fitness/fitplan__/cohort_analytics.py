@@ -0,0 +1,400 @@
+"""
+Cohort analytics engine.
+Loads the cohort file (fitness.csv) once into typed NumPy columns, with
+categorical fields stored as small integer codes, and keeps every aggregate
+the analytics endpoints serve up to date as rows are appended:
+
+  value counts         per categorical column
+  group sums           every numeric column by every categorical column
+  crosstabs            counts for every pair of categorical columns
+  histograms           fine fixed-width bins per numeric column, merged on read
+  correlation          running sums and cross-products of the numeric columns
+
+Queries read only these aggregates, so their cost does not depend on the
+number of rows.
+
+Parsing a large CSV dominates startup, so the parsed rows can be saved as a
+snapshot (.npz) that later processes load instead:
+  python cohort_analytics.py snapshot ../fitness.csv -o fitness.npz
+"""
+
+import argparse
+import csv
+import json
+import os
+import threading
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+import health
+
+# Numeric columns, their storage dtype and the width of their histogram bins
+NUMERIC_COLUMNS = {
+    "Age": (np.int16, 1),
+    "Height_cm": (np.float32, 1),
+    "Weight_kg": (np.float32, 1),
+    "Daily_Step_Count": (np.int32, 500),
+    "Resting_Heart_Rate": (np.int16, 1),
+    "Academic_Schedule": (np.int16, 1),
+    "Weekly_Workout_Frequency": (np.int16, 1),
+    "BMI": (np.float32, 0.1),
+}
+CATEGORICAL_COLUMNS = (
+    "Gender",
+    "Fitness_Goal",
+    "Activity_Level",
+    "Preferred_Workout_Time",
+    "Dietary_Preference",
+    "Preferred_Exercise_Type",
+    "Chronic_Condition",
+    "BMI_Category",  # derived from BMI
+)
+_NUMERIC = tuple(NUMERIC_COLUMNS)
+_HEIGHT, _WEIGHT, _BMI = (_NUMERIC.index(name) for name in ("Height_cm", "Weight_kg", "BMI"))
+SNAPSHOT_VERSION = 1
+# Distinct labels kept per categorical column: bounds the aggregate tables
+# (crosstabs are labels x labels) and keeps codes inside uint16
+MAX_LABELS = 256
+
+
+def _source_key(path: str) -> dict:
+    # A snapshot is valid for exactly the file it was built from
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _grow(array: np.ndarray, *shape: int) -> np.ndarray:
+    """Zero-pad a 1-D or 2-D aggregate so each axis is at least as long as `shape`."""
+    if all(n >= size for n, size in zip(array.shape, shape)):
+        return array
+    grown = np.zeros(tuple(max(n, size) for n, size in zip(array.shape, shape)), dtype=array.dtype)
+    grown[tuple(slice(0, n) for n in array.shape)] = array
+    return grown
+
+
+class CohortAnalytics:
+    def __init__(self, capacity: int = 1024):
+        self._lock = threading.Lock()
+        self._size = 0
+        self._capacity = capacity
+        self._numeric = {name: np.zeros(capacity, dtype) for name, (dtype, _) in NUMERIC_COLUMNS.items()}
+        self._codes = {name: np.zeros(capacity, np.uint16) for name in CATEGORICAL_COLUMNS}
+        self._labels: Dict[str, List[str]] = {name: [] for name in CATEGORICAL_COLUMNS}
+        self._label_codes: Dict[str, Dict[str, int]] = {name: {} for name in CATEGORICAL_COLUMNS}
+
+        self._counts = {name: np.zeros(0, np.int64) for name in CATEGORICAL_COLUMNS}
+        self._group_sums = {(cat, num): np.zeros(0) for cat in CATEGORICAL_COLUMNS for num in _NUMERIC}
+        self._pairs = {
+            (a, b): np.zeros((0, 0), np.int64)
+            for i, a in enumerate(CATEGORICAL_COLUMNS) for b in CATEGORICAL_COLUMNS[i + 1:]
+        }
+        self._bins: Dict[str, Dict[int, int]] = {name: {} for name in _NUMERIC}
+        self._min = np.full(len(_NUMERIC), np.inf)
+        self._max = np.full(len(_NUMERIC), -np.inf)
+        # Sums are kept relative to the first batch's means for numerical stability
+        self._shift: Optional[np.ndarray] = None
+        self._sum = np.zeros(len(_NUMERIC))
+        self._cross = np.zeros((len(_NUMERIC), len(_NUMERIC)))
+
+    # --- loading ---
+    @classmethod
+    def from_csv(cls, path: str) -> "CohortAnalytics":
+        engine = cls()
+        with open(path, newline="") as f:
+            engine.append_rows(csv.DictReader(f))
+        return engine
+
+    @classmethod
+    def load_snapshot(cls, path: str, source: Optional[str] = None) -> Optional["CohortAnalytics"]:
+        """
+        Restore an engine written by save_snapshot(). Returns None when the
+        file is missing or unreadable, or was built from a different `source`.
+        """
+        try:
+            with np.load(path) as data:
+                meta = json.loads(data["meta"].tobytes())
+                if meta.get("version") != SNAPSHOT_VERSION:
+                    return None
+                if source is not None and meta.get("source") != _source_key(source):
+                    return None
+                arrays = {name: data[name] for name in data.files}
+        except (OSError, ValueError, KeyError):
+            return None
+        engine = cls(max(meta["rows"], 1024))
+        engine._size = meta["rows"]
+        for name in _NUMERIC:
+            engine._numeric[name][:engine._size] = arrays[f"numeric/{name}"]
+            keys, counts = arrays[f"bins/{name}"]
+            engine._bins[name] = dict(zip(keys.tolist(), counts.tolist()))
+        for name in CATEGORICAL_COLUMNS:
+            engine._codes[name][:engine._size] = arrays[f"codes/{name}"]
+            engine._labels[name] = list(meta["labels"][name])
+            engine._label_codes[name] = {label: i for i, label in enumerate(engine._labels[name])}
+            engine._counts[name] = arrays[f"counts/{name}"]
+            for num in _NUMERIC:
+                engine._group_sums[name, num] = arrays[f"sums/{name}/{num}"]
+        for a, b in engine._pairs:
+            engine._pairs[a, b] = arrays[f"pairs/{a}/{b}"]
+        engine._min, engine._max = arrays["min"], arrays["max"]
+        engine._sum, engine._cross = arrays["sum"], arrays["cross"]
+        engine._shift = arrays["shift"] if meta["rows"] else None
+        return engine
+
+    def save_snapshot(self, path: str, source: Optional[str] = None):
+        """
+        Write the columns, label tables and every aggregate, so a loaded engine
+        answers exactly as this one does. Replaces `path` atomically.
+        """
+        with self._lock:
+            n = self._size
+            arrays = {"min": self._min, "max": self._max, "sum": self._sum, "cross": self._cross}
+            arrays["shift"] = self._shift if self._shift is not None else np.zeros(len(_NUMERIC))
+            for name in _NUMERIC:
+                arrays[f"numeric/{name}"] = self._numeric[name][:n]
+                bins = self._bins[name]
+                arrays[f"bins/{name}"] = np.array([list(bins), list(bins.values())], dtype=np.int64).reshape(2, -1)
+            for name in CATEGORICAL_COLUMNS:
+                arrays[f"codes/{name}"] = self._codes[name][:n]
+                arrays[f"counts/{name}"] = self._counts[name]
+                for num in _NUMERIC:
+                    arrays[f"sums/{name}/{num}"] = self._group_sums[name, num]
+            for (a, b), table in self._pairs.items():
+                arrays[f"pairs/{a}/{b}"] = table
+            meta = {
+                "version": SNAPSHOT_VERSION,
+                "rows": n,
+                "source": _source_key(source) if source else None,
+                "labels": self._labels,
+            }
+            arrays["meta"] = np.frombuffer(json.dumps(meta).encode(), np.uint8)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                np.savez(f, **arrays)
+        os.replace(tmp, path)
+
+    def _encode(self, column: str, label: str) -> int:
+        codes = self._label_codes[column]
+        code = codes.get(label)
+        if code is None:
+            code = codes[label] = len(self._labels[column])
+            self._labels[column].append(label)
+        return code
+
+    @staticmethod
+    def _parse(row: dict) -> tuple:
+        # A blank BMI is derived for the whole batch in append_rows
+        has_bmi = bool(str(row.get("BMI", "")).strip())
+        numbers = [float(row[name]) if name != "BMI" or has_bmi else 0.0 for name in _NUMERIC]
+        labels = [str(row[name]).strip() for name in CATEGORICAL_COLUMNS[:-1]]
+        return numbers, labels, has_bmi
+
+    def append_rows(self, rows: Iterable[dict]) -> int:
+        """Append rows (dicts keyed by the fitness.csv header); returns how many were added."""
+        parsed = [self._parse(row) for row in rows]
+        if not parsed:
+            return 0
+        values = np.array([numbers for numbers, _, _ in parsed], dtype=np.float64)
+        bmi = values[:, _BMI]
+        missing = ~np.array([has_bmi for _, _, has_bmi in parsed])
+        if missing.any():
+            # A zero height gives inf, rejected just below
+            with np.errstate(divide="ignore", invalid="ignore"):
+                bmi[missing] = health.bmi(values[missing, _WEIGHT], values[missing, _HEIGHT])
+        if not np.isfinite(values).all():
+            raise ValueError("numeric columns must be finite numbers")
+        categories = health.bmi_category(bmi).tolist()
+        with self._lock:
+            self._check_labels(parsed)
+            codes = np.array(
+                [[self._encode(name, label) for name, label in zip(CATEGORICAL_COLUMNS, (*labels, category))]
+                 for (_, labels, _), category in zip(parsed, categories)],
+                dtype=np.int64,
+            )
+            self._store(values, codes)
+            self._aggregate(values, codes)
+        return len(parsed)
+
+    def _check_labels(self, parsed: list):
+        # Before anything is encoded, so a rejected batch leaves no trace
+        for i, name in enumerate(CATEGORICAL_COLUMNS[:-1]):
+            known = self._label_codes[name]
+            new = {labels[i] for _, labels, _ in parsed} - known.keys()
+            if len(known) + len(new) > MAX_LABELS:
+                raise ValueError(f"{name} would have more than {MAX_LABELS} distinct labels")
+
+    def append(self, row: dict):
+        self.append_rows([row])
+
+    def _store(self, values: np.ndarray, codes: np.ndarray):
+        start, end = self._size, self._size + len(values)
+        if end > self._capacity:
+            # Amortized O(1) appends: double the column capacity
+            while self._capacity < end:
+                self._capacity *= 2
+            for columns in (self._numeric, self._codes):
+                for name, column in columns.items():
+                    grown = np.zeros(self._capacity, column.dtype)
+                    grown[:start] = column[:start]
+                    columns[name] = grown
+        for i, name in enumerate(_NUMERIC):
+            self._numeric[name][start:end] = values[:, i]
+        for i, name in enumerate(CATEGORICAL_COLUMNS):
+            self._codes[name][start:end] = codes[:, i]
+        self._size = end
+
+    def _aggregate(self, values: np.ndarray, codes: np.ndarray):
+        for i, cat in enumerate(CATEGORICAL_COLUMNS):
+            n = len(self._labels[cat])
+            self._counts[cat] = _grow(self._counts[cat], n)
+            self._counts[cat][:n] += np.bincount(codes[:, i], minlength=n)
+            for j, num in enumerate(_NUMERIC):
+                sums = self._group_sums[cat, num] = _grow(self._group_sums[cat, num], n)
+                sums[:n] += np.bincount(codes[:, i], weights=values[:, j], minlength=n)
+        for (a, b), table in self._pairs.items():
+            na, nb = len(self._labels[a]), len(self._labels[b])
+            ia, ib = CATEGORICAL_COLUMNS.index(a), CATEGORICAL_COLUMNS.index(b)
+            table = self._pairs[a, b] = _grow(table, na, nb)
+            flat = np.bincount(codes[:, ia] * nb + codes[:, ib], minlength=na * nb)
+            table[:na, :nb] += flat.reshape(na, nb)
+        for j, num in enumerate(_NUMERIC):
+            width = NUMERIC_COLUMNS[num][1]
+            keys, counts = np.unique(np.floor(values[:, j] / width).astype(np.int64), return_counts=True)
+            bins = self._bins[num]
+            for key, count in zip(keys.tolist(), counts.tolist()):
+                bins[key] = bins.get(key, 0) + count
+        np.minimum(self._min, values.min(axis=0), out=self._min)
+        np.maximum(self._max, values.max(axis=0), out=self._max)
+        if self._shift is None:
+            self._shift = values.mean(axis=0)
+        centered = values - self._shift
+        self._sum += centered.sum(axis=0)
+        self._cross += centered.T @ centered
+
+    # --- queries ---
+    def __len__(self) -> int:
+        return self._size
+
+    def column(self, name: str) -> np.ndarray:
+        """Read-only view of a stored column (categorical columns as codes)."""
+        if name in self._numeric:
+            view = self._numeric[name][:self._size]
+        elif name in self._codes:
+            view = self._codes[name][:self._size]
+        else:
+            raise ValueError(f"Unknown column: {name}")
+        view = view.view()
+        view.flags.writeable = False
+        return view
+
+    def labels(self, column: str) -> List[str]:
+        self._check(column, CATEGORICAL_COLUMNS)
+        return list(self._labels[column])
+
+    @staticmethod
+    def _check(column: str, allowed):
+        if column not in allowed:
+            raise ValueError(f"Unknown column: {column}; expected one of {', '.join(allowed)}")
+
+    def summary(self) -> dict:
+        with self._lock:
+            return {
+                "rows": self._size,
+                "numeric_columns": list(_NUMERIC),
+                "categorical_columns": {name: list(self._labels[name]) for name in CATEGORICAL_COLUMNS},
+            }
+
+    def value_counts(self, column: str) -> dict:
+        self._check(column, CATEGORICAL_COLUMNS)
+        with self._lock:
+            return dict(zip(self._labels[column], self._counts[column].tolist()))
+
+    def group_mean(self, by: str, column: str) -> dict:
+        self._check(by, CATEGORICAL_COLUMNS)
+        self._check(column, _NUMERIC)
+        with self._lock:
+            n = len(self._labels[by])
+            counts = self._counts[by][:n]
+            sums = self._group_sums[by, column][:n]
+            return {
+                label: round(float(total / count), 4)
+                for label, total, count in zip(self._labels[by], sums, counts) if count
+            }
+
+    def crosstab(self, rows: str, columns: str) -> dict:
+        self._check(rows, CATEGORICAL_COLUMNS)
+        self._check(columns, CATEGORICAL_COLUMNS)
+        if rows == columns:
+            raise ValueError("crosstab needs two different columns")
+        with self._lock:
+            if (rows, columns) in self._pairs:
+                table = self._pairs[rows, columns]
+            else:
+                table = self._pairs[columns, rows].T
+            row_labels, col_labels = self._labels[rows], self._labels[columns]
+            table = table[:len(row_labels), :len(col_labels)]
+            return {
+                label: dict(zip(col_labels, counts))
+                for label, counts in zip(row_labels, table.tolist())
+            }
+
+    def histogram(self, column: str, bins: int = 10) -> dict:
+        """
+        `bins` equal-width buckets over [min, max], merged from the fine bins
+        (exact for integer columns, within one fine-bin width otherwise).
+        """
+        self._check(column, _NUMERIC)
+        if bins < 1:
+            raise ValueError("bins must be at least 1")
+        with self._lock:
+            j = _NUMERIC.index(column)
+            low, high = float(self._min[j]), float(self._max[j])
+            fine = list(self._bins[column].items())
+        if not fine:
+            return {"edges": [], "counts": []}
+        width = NUMERIC_COLUMNS[column][1]
+        # Fine bins are assigned by their lower edge
+        keys = np.array([key for key, _ in fine], dtype=np.float64)
+        counts = np.array([count for _, count in fine], dtype=np.int64)
+        edges = np.linspace(low, high if high > low else low + width, bins + 1)
+        index = np.clip(np.searchsorted(edges, np.maximum(keys * width, low), side="right") - 1, 0, bins - 1)
+        return {
+            "edges": [round(float(e), 4) for e in edges],
+            "counts": np.bincount(index, weights=counts, minlength=bins).astype(np.int64).tolist(),
+        }
+
+    def correlation(self, columns: Optional[List[str]] = None) -> dict:
+        """Pearson correlation matrix of numeric columns from the running sums."""
+        columns = list(columns or _NUMERIC)
+        for column in columns:
+            self._check(column, _NUMERIC)
+        with self._lock:
+            n = self._size
+            if n < 2:
+                return {"columns": columns, "matrix": []}
+            mean = self._sum / n
+            cov = self._cross / n - np.outer(mean, mean)
+        idx = [_NUMERIC.index(column) for column in columns]
+        cov = cov[np.ix_(idx, idx)]
+        std = np.sqrt(np.clip(np.diag(cov), 0, None))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            corr = cov / np.outer(std, std)
+        corr = np.where(np.isfinite(corr), np.clip(corr, -1, 1), 0.0)
+        return {"columns": columns, "matrix": [[round(float(v), 4) for v in row] for row in corr]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cohort analytics tools.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    snap = sub.add_parser("snapshot", help="Parse a cohort CSV once and save a snapshot for fast startup")
+    snap.add_argument("csv")
+    snap.add_argument("-o", "--output", required=True, help="Snapshot file (.npz)")
+    args = parser.parse_args()
+
+    engine = CohortAnalytics.from_csv(args.csv)
+    engine.save_snapshot(args.output, args.csv)
+    print(f"Saved {len(engine)} rows to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+Health math: BMI, BMI category, BMR, TDEE and macros.
+The one implementation behind /api/generate-plan, the batch endpoints, the
+planner, bulk_planner and the cohort engine. Every function takes Python
+numbers or NumPy arrays (which broadcast against each other) and returns
+the same kind, so a single profile never pays for NumPy and a batch is one
+vectorized pass. Both paths run the same float operations in the same
+order, so they agree exactly.
+
+  BMI        weight_kg / (height_cm / 100)^2
+  category   searchsorted on BMI_EDGES (bisect for a single value)
+  BMR        Mifflin-St Jeor: 10 w + 6.25 h - 5 age + 5 (male) or - 161
+  TDEE       BMR x activity factor, truncated to whole calories
+  macros     MACRO_SPLIT of TDEE in grams, truncated
+"""
+
+from bisect import bisect_right
+from typing import NamedTuple
+
+BMI_EDGES = (18.5, 25.0, 30.0)
+BMI_CATEGORIES = ("Underweight", "Normal weight", "Overweight", "Obese")
+MALE_OFFSET, FEMALE_OFFSET = 5, -161
+# Lower-cased gender labels read as male; any other label is female
+MALE_LABELS = ("male", "m", "man")
+ACTIVITY_FACTORS = {
+    "sedentary": 1.2,
+    "lightly active": 1.375,
+    "active": 1.55,
+    "moderately active": 1.55,
+    "very active": 1.725,
+    "extra active": 1.9,
+}
+# Lightly active: what /api/generate-plan assumes
+DEFAULT_ACTIVITY_FACTOR = 1.375
+# Share of calories from protein, carbs and fats, and calories per gram
+MACRO_SPLIT = (0.30, 0.45, 0.25)
+KCAL_PER_GRAM = (4, 4, 9)
+# Label arrays with more distinct values than this are mapped via np.unique
+MAX_DISTINCT_LABELS = 16
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float))
+
+
+def _truncate(value):
+    if isinstance(value, (int, float)):  # _is_number(), inlined: this runs four times per profile
+        return int(value)
+    import numpy as np
+
+    return np.asarray(value).astype(np.int64)
+
+
+def bmi(weight_kg, height_cm):
+    height_m = height_cm / 100
+    return weight_kg / (height_m * height_m)
+
+
+def bmi_category_code(value):
+    """Index into BMI_CATEGORIES."""
+    if _is_number(value):
+        return bisect_right(BMI_EDGES, value)
+    import numpy as np
+
+    return np.searchsorted(BMI_EDGES, value, side="right")
+
+
+def bmi_category(value):
+    """BMI_CATEGORIES label, or an array of labels for an array of BMIs."""
+    if _is_number(value):
+        return BMI_CATEGORIES[bisect_right(BMI_EDGES, value)]
+    import numpy as np
+
+    return np.array(BMI_CATEGORIES, dtype=object)[bmi_category_code(value)]
+
+
+def is_male(gender):
+    """
+    True/False from any gender encoding: a bool, a label ("Male", "m",
+    "female", ...) or a numeric code (1 = male). A NumPy array of any of
+    these gives a bool array. ValueError for anything else (e.g. None).
+    """
+    if isinstance(gender, str):
+        return gender.strip().lower() in MALE_LABELS
+    if _is_number(gender):
+        return gender == 1
+    import numpy as np
+
+    if not isinstance(gender, np.ndarray):
+        raise ValueError("gender must be a label, a bool, a numeric code or an array of them")
+    if gender.dtype == bool:
+        return gender
+    if gender.dtype.kind in "iuf":
+        return gender == 1
+    if gender.dtype.kind in "OUS":
+        return _map_labels(gender, lambda label: is_male(str(label)), bool)
+    raise ValueError("gender must be a label, a bool, a numeric code or an array of them")
+
+
+def activity_factor(level=None):
+    """
+    TDEE multiplier for an activity level: a label (any case, from the
+    planner's or the cohort's vocabulary), a factor, or None for the
+    default. Unknown labels get the default. Arrays map element-wise.
+    """
+    if level is None:
+        return DEFAULT_ACTIVITY_FACTOR
+    if _is_number(level):
+        return float(level)
+    if isinstance(level, str):
+        return ACTIVITY_FACTORS.get(level.strip().lower(), DEFAULT_ACTIVITY_FACTOR)
+    import numpy as np
+
+    level = np.asarray(level)
+    if level.dtype.kind in "iuf":
+        return level.astype(np.float64)
+    return _map_labels(level, lambda label: activity_factor(str(label)), float)
+
+
+def _map_labels(labels, lookup, dtype):
+    """
+    lookup() applied to every element of a label array. Gender and activity
+    columns hold a handful of labels, and one comparison pass per distinct
+    label is several times faster than sorting them (np.unique, still the
+    fallback past MAX_DISTINCT_LABELS) or a Python loop over the rows.
+    """
+    import numpy as np
+
+    result = np.empty(labels.shape, dtype)
+    pending = np.ones(labels.shape, dtype=bool)
+    for _ in range(MAX_DISTINCT_LABELS):
+        first = pending.argmax() if pending.size else None
+        if first is None or not pending.flat[first]:
+            return result
+        label = labels.flat[first]
+        match = labels == label
+        result[match] = lookup(label)
+        pending &= ~match
+    distinct, inverse = np.unique(labels[pending].astype(str), return_inverse=True)
+    result[pending] = np.array([lookup(label) for label in distinct], dtype)[inverse]
+    return result
+
+
+def bmr(weight_kg, height_cm, age, male):
+    """Mifflin-St Jeor basal metabolic rate; `male` as returned by is_male()."""
+    if isinstance(male, bool):
+        offset = MALE_OFFSET if male else FEMALE_OFFSET
+    else:
+        import numpy as np
+
+        offset = np.where(male, MALE_OFFSET, FEMALE_OFFSET)
+    return (10 * weight_kg) + (6.25 * height_cm) - (5 * age) + offset
+
+
+def tdee(basal, factor=DEFAULT_ACTIVITY_FACTOR):
+    return _truncate(basal * factor)
+
+
+def macros(calories):
+    """(protein, carbs, fats) grams for a whole-calorie TDEE."""
+    protein, carbs, fats = MACRO_SPLIT
+    return (
+        _truncate((calories * protein) / KCAL_PER_GRAM[0]),
+        _truncate((calories * carbs) / KCAL_PER_GRAM[1]),
+        _truncate((calories * fats) / KCAL_PER_GRAM[2]),
+    )
+
+
+def nutrition(age, weight_kg, height_cm, male, factor=DEFAULT_ACTIVITY_FACTOR):
+    """(tdee, protein, carbs, fats), as /api/generate-plan reports them."""
+    calories = tdee(bmr(weight_kg, height_cm, age, male), factor)
+    return (calories, *macros(calories))
+
+
+class HealthMetrics(NamedTuple):
+    bmi: object
+    bmi_category: object  # index into BMI_CATEGORIES
+    bmr: object
+    tdee: object
+    protein_g: object
+    carbs_g: object
+    fats_g: object
+
+
+def health_metrics(age, weight_kg, height_cm, gender, activity=None) -> HealthMetrics:
+    """Everything above for one profile or a whole cohort of columns."""
+    basal = bmr(weight_kg, height_cm, age, is_male(gender))
+    calories = tdee(basal, activity_factor(activity))
+    value = bmi(weight_kg, height_cm)
+    return HealthMetrics(value, bmi_category_code(value), basal, calories, *macros(calories))
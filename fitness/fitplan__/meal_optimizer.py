@@ -0,0 +1,228 @@
+"""
+Weekly meal-plan optimizer.
+For each day of the week, picks one meal and a serving size for every meal
+slot, from the catalog meals tagged with the user's diet that list macros,
+so the day's calories, protein, carbs and fats land close to the targets
+/api/generate-plan computes. Diets with their own split in the catalog
+(diet_macro_splits, e.g. keto) keep the calories and re-split the macros.
+
+The search is a greedy construction followed by local search (coordinate
+descent): a move re-scores every (meal, servings) option of one slot on one
+day in a single NumPy expression and keeps the best. Users on the same diet
+are solved together, so a cohort costs little more per user than a single
+profile. Local search stops when no move improves any plan or when the time
+budget runs out; the greedy plan is always complete, so there is a result
+either way.
+
+Score of a day: weighted squared relative error of calories and each macro,
+plus small penalties for servings far from 1 and for repeating a meal within
+the week.
+"""
+
+import time
+from functools import lru_cache
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from catalog import Catalog
+
+DAYS = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+SERVINGS = (0.5, 0.75, 1.0, 1.25, 1.5, 1.75, 2.0, 2.5, 3.0)
+# Share of the day's calories each slot aims for while the greedy plan is built
+SLOT_SHARES = {"Breakfast": 0.25, "Lunch": 0.35, "Snack": 0.10, "Dinner": 0.30}
+KCAL_PER_GRAM = np.array([4.0, 4.0, 9.0])
+# calories, protein, carbs, fats
+WEIGHTS = np.array([4.0, 2.0, 1.0, 1.0])
+SERVING_PENALTY = 0.02  # times (servings - 1)^2
+REPEAT_PENALTY = 0.004  # per other use of the same meal in the week
+CALORIE_TOLERANCE = 0.05
+MACRO_TOLERANCE = 0.10
+# Errors are relative to max(target, floor): a 25 g carb target is held to
+# +-10 g rather than +-2.5 g, both when scoring and in the tolerance check
+SCALE_FLOOR = np.array([1.0, 100.0, 100.0, 100.0])
+DEFAULT_BUDGET_MS = 20.0
+
+
+class MealPool:
+    """Every (meal, servings) option of one diet, as arrays per slot."""
+
+    def __init__(self, catalog: Catalog, diet: str):
+        self.diet = diet
+        split = catalog.macro_splits.get(diet)
+        # Grams per calorie of each macro, or None to keep the given targets
+        self.grams_per_kcal = None if split is None else np.array(split) / KCAL_PER_GRAM
+        self.slots: List[str] = []
+        self.meals = []
+        # per slot: (meal index, servings, nutrients (n, 4), serving penalty)
+        self.options = []
+        tag = diet.lower()
+        servings = np.array(SERVINGS)
+        for slot in catalog.meal_slots:
+            meals = [meal for meal in catalog.find_meals(slot=slot, tags=(tag,)) if meal.macros is not None]
+            if not meals:
+                continue
+            macros = np.array([meal.macros for meal in meals])
+            per_serving = np.column_stack([macros @ KCAL_PER_GRAM, macros])
+            local = np.repeat(np.arange(len(meals)), len(servings))
+            amount = np.tile(servings, len(meals))
+            self.options.append((
+                local + len(self.meals), amount, per_serving[local] * amount[:, None],
+                SERVING_PENALTY * (amount - 1) ** 2,
+            ))
+            self.slots.append(slot)
+            self.meals.extend(meals)
+        shares = np.array([SLOT_SHARES.get(slot, 1.0) for slot in self.slots])
+        self.cumulative_shares = np.cumsum(shares) / shares.sum() if self.slots else shares
+
+
+@lru_cache(maxsize=32)
+def meal_pool(catalog: Catalog, diet: str) -> MealPool:
+    """Options for `diet` in this catalog snapshot (unknown diets get the default diet)."""
+    if diet not in catalog.diet_plans:
+        diet = catalog.default_diet
+    return MealPool(catalog, diet)
+
+
+def _scores(a, b, squares, nutrients):
+    """
+    sum_k w_k ((base_k + x_k - goal_k) / target_k)^2 for every option x, up
+    to a per-user constant: with a = w / target^2 and b = a * (base - goal)
+    it is a @ x^2 + 2 b @ x, two small matrix products instead of a
+    (users, options, 4) temporary.
+    """
+    return a @ squares.T + 2 * (b @ nutrients.T)
+
+
+def solve(pool: MealPool, targets: np.ndarray, days: int = len(DAYS), deadline: float = float("inf")):
+    """
+    targets: (users, 4) daily calories, protein, carbs and fats.
+    Returns (choice, totals, converged): the option index chosen per user,
+    day and slot, each day's nutrient totals, and whether local search
+    finished before the deadline.
+    """
+    targets = np.asarray(targets, dtype=np.float64)
+    users = len(targets)
+    choice = np.zeros((users, days, len(pool.slots)), dtype=np.intp)
+    totals = np.zeros((users, days, 4))
+    counts = np.zeros((users, len(pool.meals)))
+    rows = np.arange(users)
+    a = WEIGHTS / np.square(np.maximum(targets, SCALE_FLOOR))
+    squares = [np.square(nutrients) for _, _, nutrients, _ in pool.options]
+
+    # Greedy: fill the slots in order, aiming at the day's share so far
+    for day in range(days):
+        for slot, (meal_index, _, nutrients, penalty) in enumerate(pool.options):
+            b = a * (totals[:, day] - targets * pool.cumulative_shares[slot])
+            score = _scores(a, b, squares[slot], nutrients) + penalty + REPEAT_PENALTY * counts[:, meal_index]
+            best = score.argmin(axis=1)
+            choice[:, day, slot] = best
+            totals[:, day] += nutrients[best]
+            counts[rows, meal_index[best]] += 1
+
+    # Local search: re-pick one slot of one day against the full-day targets
+    # until no move lowers the score. Each move strictly lowers that user's
+    # weekly total, so this terminates. Users are independent: one whose
+    # whole week had no move is done, and later sweeps skip it.
+    active = rows
+    while len(active):
+        moved_any = np.zeros(users, dtype=bool)
+        active_a, active_targets = a[active], targets[active]
+        for day in range(days):
+            if time.perf_counter() >= deadline:
+                return choice, totals, False
+            for slot, (meal_index, _, nutrients, penalty) in enumerate(pool.options):
+                current = choice[active, day, slot]
+                current_meal = meal_index[current]
+                rest = totals[active, day] - nutrients[current]
+                others = counts[active][:, meal_index] - (meal_index == current_meal[:, None])
+                score = (
+                    _scores(active_a, active_a * (rest - active_targets), squares[slot], nutrients)
+                    + penalty + REPEAT_PENALTY * others
+                )
+                local = np.arange(len(active))
+                best = score.argmin(axis=1)
+                move = score[local, current] - score[local, best] > 1e-9
+                if not move.any():
+                    continue
+                moved, picked = active[move], best[move]
+                moved_any[moved] = True
+                choice[moved, day, slot] = picked
+                totals[moved, day] = rest[move] + nutrients[picked]
+                counts[moved, current_meal[move]] -= 1
+                counts[moved, meal_index[picked]] += 1
+        active = rows[moved_any]
+    return choice, totals, True
+
+
+def _within_tolerance(totals, targets):
+    relative = np.abs(totals - targets[:, None, :]) / np.maximum(targets, SCALE_FLOOR)[:, None, :]
+    return (relative[..., 0] <= CALORIE_TOLERANCE) & (relative[..., 1:] <= MACRO_TOLERANCE).all(axis=-1)
+
+
+def _nutrients(values) -> Dict[str, int]:
+    calories, protein, carbs, fats = (int(round(v)) for v in values)
+    return {"calories": calories, "protein_g": protein, "carbs_g": carbs, "fats_g": fats}
+
+
+def plan_weeks(targets: np.ndarray, diets: Sequence[str], catalog: Catalog,
+               budget_ms: float = DEFAULT_BUDGET_MS) -> List[dict]:
+    """
+    Weekly meal plans for many users. targets: (users, 4) daily calories,
+    protein, carbs and fats; diets: one dietary preference per user. Each
+    diet group gets budget_ms per user for local search. A plan is
+    "converged" when local search finished and at least one day is within
+    tolerance. ValueError for a non-finite or non-positive target.
+    """
+    targets = np.asarray(targets, dtype=np.float64).reshape(-1, 4)
+    if not (np.isfinite(targets).all() and (targets > 0).all()):
+        raise ValueError("Calorie and macro targets must be finite and positive")
+    groups: Dict[MealPool, List[int]] = {}
+    for i, diet in enumerate(diets):
+        groups.setdefault(meal_pool(catalog, diet), []).append(i)
+
+    plans: List[dict] = [None] * len(targets)
+    for pool, members in groups.items():
+        if not pool.slots:
+            raise ValueError(f"No meals with macros for the {pool.diet} diet")
+        started = time.perf_counter()
+        group_targets = targets[members]
+        if pool.grams_per_kcal is not None:
+            group_targets = np.column_stack([
+                group_targets[:, 0], group_targets[:, :1] * pool.grams_per_kcal
+            ])
+        choice, totals, converged = solve(
+            pool, group_targets, deadline=started + budget_ms * len(members) / 1000
+        )
+        ok = _within_tolerance(totals, group_targets)
+        options = [(meal_index.tolist(), amount.tolist(), nutrients.tolist())
+                   for meal_index, amount, nutrients, _ in pool.options]
+        for row, i in enumerate(members):
+            days = []
+            for day, picks in enumerate(choice[row].tolist()):
+                meals = []
+                for slot, option in enumerate(picks):
+                    meal_index, amount, nutrients = options[slot]
+                    meal = pool.meals[meal_index[option]]
+                    meals.append({
+                        "slot": pool.slots[slot], "meal_id": meal.id, "name": meal.name,
+                        "servings": amount[option], **_nutrients(nutrients[option]),
+                    })
+                days.append({
+                    "day": DAYS[day % len(DAYS)], "meals": meals,
+                    "totals": _nutrients(totals[row, day]), "within_tolerance": bool(ok[row, day]),
+                })
+            plans[i] = {
+                "diet_applied": pool.diet,
+                "targets": _nutrients(group_targets[row]),
+                "days": days,
+                "days_within_tolerance": int(ok[row].sum()),
+                "converged": converged and bool(ok[row].any()),
+            }
+    return plans
+
+
+def plan_week(daily_calories, protein, carbs, fats, diet: str, catalog: Catalog,
+              budget_ms: float = DEFAULT_BUDGET_MS) -> dict:
+    """The weekly meal plan for one user."""
+    return plan_weeks(np.array([[daily_calories, protein, carbs, fats]]), [diet], catalog, budget_ms)[0]
@@ -0,0 +1,188 @@
+"""
+Request metrics in the Prometheus text format.
+Every request gets a RequestTimer, held in a context variable so it follows
+the request through Flask's worker threads and ASGI tasks alike. Handlers
+call mark(phase) at phase boundaries; when the request finishes, its total
+latency and the time spent in each phase land in fixed-bucket histograms.
+
+  fitplan_request_duration_seconds{route}        total latency
+  fitplan_request_phase_seconds{route,phase}     parse / validation / cache / compute / serialization
+  fitplan_requests_total{route,status}           completed requests
+  fitplan_requests_in_flight                     requests being handled now
+
+Other counters (cache hit ratios, ...) are pulled from collectors at scrape
+time, so they cost nothing per request.
+"""
+
+import bisect
+import contextvars
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# Seconds; the API answers most requests in well under a millisecond
+LATENCY_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+# (metric name, type, help, [(labels, value), ...])
+Family = Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]
+
+_current = contextvars.ContextVar("fitplan_request_timer", default=None)
+
+
+class RequestTimer:
+    __slots__ = ("route", "start", "last", "phases", "status")
+
+    def __init__(self, route: str):
+        self.route = route
+        self.start = self.last = time.perf_counter()
+        self.phases: Dict[str, float] = {}
+        self.status = 0
+
+    def mark(self, phase: str):
+        """Charge the time since the previous mark (or the start) to `phase`."""
+        now = time.perf_counter()
+        self.phases[phase] = self.phases.get(phase, 0.0) + now - self.last
+        self.last = now
+
+
+def mark(phase: str):
+    """mark() on the current request's timer; a no-op outside an instrumented request."""
+    timer = _current.get()
+    if timer is not None:
+        timer.mark(phase)
+
+
+class MetricsRegistry:
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS, prefix: str = "fitplan"):
+        self.buckets = tuple(buckets)
+        self.prefix = prefix
+        # set.add/discard are atomic, so starting a request takes no lock
+        self._active = set()
+        self._requests: Dict[Tuple[str, int], int] = {}
+        # route -> {phase (None for the whole request): [bucket counts..., +Inf count, sum, count]}
+        self._histograms: Dict[str, Dict[Optional[str], list]] = {}
+        self._collectors: List[Callable[[], Iterable[Family]]] = []
+        self._lock = threading.Lock()
+
+    # --- per request ---
+    def start(self, route: str) -> Tuple[RequestTimer, contextvars.Token]:
+        timer = RequestTimer(route)
+        self._active.add(timer)
+        return timer, _current.set(timer)
+
+    def finish(self, timer: RequestTimer, token: contextvars.Token, status: Optional[int] = None):
+        elapsed = time.perf_counter() - timer.start
+        _current.reset(token)
+        self._active.discard(timer)
+        route, buckets = timer.route, self.buckets
+        with self._lock:
+            key = (route, status or timer.status or 500)
+            self._requests[key] = self._requests.get(key, 0) + 1
+            histograms = self._histograms.get(route)
+            if histograms is None:
+                histograms = self._histograms[route] = {}
+            for phase, seconds in ((None, elapsed), *timer.phases.items()):
+                histogram = histograms.get(phase)
+                if histogram is None:
+                    histogram = histograms[phase] = [0] * (len(buckets) + 3)
+                histogram[bisect.bisect_left(buckets, seconds)] += 1
+                histogram[-2] += seconds
+                histogram[-1] += 1
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._active)
+
+    # --- exposition ---
+    def register_collector(self, collector: Callable[[], Iterable[Family]]):
+        """Add a function returning metric families to include in every scrape."""
+        self._collectors.append(collector)
+
+    def _histogram_lines(self, name: str, phases: bool) -> List[str]:
+        lines = []
+        for route, histograms in sorted(self._histograms.items()):
+            for phase, histogram in sorted(histograms.items(), key=lambda item: item[0] or ""):
+                if (phase is not None) != phases:
+                    continue
+                labels = f'route="{_escape(route)}"' + (f',phase="{_escape(phase)}"' if phases else "")
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float("inf"),), histogram):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{{labels},le="{_number(bound)}"}} {cumulative}')
+                lines.append(f"{name}_sum{{{labels}}} {_number(histogram[-2])}")
+                lines.append(f"{name}_count{{{labels}}} {histogram[-1]}")
+        return lines
+
+    def render(self) -> bytes:
+        p = self.prefix
+        with self._lock:
+            lines = [
+                f"# HELP {p}_request_duration_seconds Request latency by route.",
+                f"# TYPE {p}_request_duration_seconds histogram",
+                *self._histogram_lines(f"{p}_request_duration_seconds", phases=False),
+                f"# HELP {p}_request_phase_seconds Time spent in each phase of a request.",
+                f"# TYPE {p}_request_phase_seconds histogram",
+                *self._histogram_lines(f"{p}_request_phase_seconds", phases=True),
+                f"# HELP {p}_requests_total Completed requests by route and status.",
+                f"# TYPE {p}_requests_total counter",
+                *(
+                    f'{p}_requests_total{{route="{_escape(route)}",status="{status}"}} {count}'
+                    for (route, status), count in sorted(self._requests.items())
+                ),
+                f"# HELP {p}_requests_in_flight Requests currently being handled.",
+                f"# TYPE {p}_requests_in_flight gauge",
+                f"{p}_requests_in_flight {self.in_flight}",
+            ]
+        for collector in self._collectors:
+            for name, kind, help_text, samples in collector():
+                lines.append(f"# HELP {p}_{name} {help_text}")
+                lines.append(f"# TYPE {p}_{name} {kind}")
+                for labels, value in samples:
+                    label_text = ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+                    lines.append(f"{p}_{name}{{{label_text}}} {_number(value)}" if label_text
+                                 else f"{p}_{name} {_number(value)}")
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware timing every HTTP request. The route label is the name of
+    the endpoint the router matched, the same label the Flask hooks use.
+    """
+
+    def __init__(self, app, registry: MetricsRegistry):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        timer, token = self.registry.start("unmatched")
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                timer.status = message["status"]
+                endpoint = scope.get("endpoint")
+                if endpoint is not None:
+                    timer.route = endpoint.__name__
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.registry.finish(timer, token)
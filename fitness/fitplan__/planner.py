@@ -1,5 +1,9 @@
 from dataclasses import dataclass
-from typing import List, Dict
+from types import MappingProxyType
+from typing import List, Dict, Mapping, Optional, Tuple
+
+from catalog import Catalog, store as catalog_store
+from health import BMI_CATEGORIES, bmi_category
 
 
 @dataclass
@@ -16,139 +20,124 @@ class UserProfile:
 
 
 def categorize_bmi(bmi: float) -> str:
-    if bmi < 18.5:
-        return "Underweight"
-    if 18.5 <= bmi < 25:
-        return "Normal weight"
-    if 25 <= bmi < 30:
-        return "Overweight"
-    return "Obese"
+    return bmi_category(bmi)
+
+
+# ===============================
+# PLAN BUILDERS
+# ===============================
+# Every plan is fully determined by a handful of discrete inputs, so all
+# combinations are built once per catalog snapshot (see the compiled tables
+# below) and the public generate_* functions are just lookups. The content
+# (the weekly workout, staple meals and notes) comes from the catalog file.
+GOALS = ("Lose fat / weight loss", "Build muscle / strength", "Improve overall fitness")
+WORKOUT_TIMES = ("Morning", "Evening")
+DIET_RESTRICTIONS = ("", "veg", "vegan")
+
+
+def _build_exercise_plan(catalog: Catalog, goal: Optional[str], workout_time_pref: Optional[str]) -> List[Dict[str, str]]:
+    section = catalog.planner
+    goal_note = section["exercise_goal_notes"].get(goal) if goal else None
+    time_note = None
+    if workout_time_pref in WORKOUT_TIMES:
+        time_note = section["exercise_time_note"].format(time=workout_time_pref.lower())
+
+    plan = []
+    for day, exercise in catalog.workouts[section["workout"]].items():
+        details = exercise.details
+        # Goal notes go on the sessions the catalog tags with that goal
+        if goal_note and goal in exercise.goals:
+            details += " " + goal_note
+        if time_note:
+            details += " " + time_note
+        plan.append({"day": day, "focus": exercise.name, "details": details})
+    return plan
+
+
+def _build_diet_plan(catalog: Catalog, goal: Optional[str], bmi_category: str, dietary_restrictions: str) -> Dict[str, List[str]]:
+    section = catalog.planner
+    diet_tags = section["diet_tags"]
+    tags = diet_tags.get(dietary_restrictions, diet_tags[""])
+    plan = {}
+    for slot in catalog.meal_slots:
+        meals = catalog.find_meals(slot=slot, tags=tags)
+        if meals:
+            plan[slot] = [meal.name for meal in meals]
+
+    note = " " + section["diet_goal_notes"].get(goal, section["diet_default_note"])
+    bmi_note = section["diet_bmi_notes"].get(bmi_category)
+    if bmi_note:
+        note += " " + bmi_note
+
+    plan["Notes"] = [note]
+    return plan
+
+
+# ===============================
+# COMPILED PLAN TABLES
+# ===============================
+# Rebuilt whenever the catalog is reloaded; each table is swapped in whole,
+# so a lookup sees either the old or the new catalog, never a mix.
+ExerciseTemplate = Tuple[Mapping[str, str], ...]
+DietTemplate = Mapping[str, Tuple[str, ...]]
+
+EXERCISE_TEMPLATES: Dict[Tuple[Optional[str], Optional[str]], ExerciseTemplate] = {}
+DIET_TEMPLATES: Dict[Tuple[Optional[str], str, str], DietTemplate] = {}
+
+
+def _compile_templates(catalog: Catalog):
+    """Build the tables for `catalog`; returns the function that swaps them in."""
+    exercise_templates = {
+        (goal, time_pref): tuple(MappingProxyType(d) for d in _build_exercise_plan(catalog, goal, time_pref))
+        for goal in GOALS + (None,)
+        for time_pref in WORKOUT_TIMES + (None,)
+    }
+    diet_templates = {
+        (goal, bmi_category, restriction): MappingProxyType({
+            slot: tuple(meals) for slot, meals in _build_diet_plan(catalog, goal, bmi_category, restriction).items()
+        })
+        for goal in GOALS + (None,)
+        for bmi_category in BMI_CATEGORIES
+        for restriction in DIET_RESTRICTIONS
+    }
 
+    def apply():
+        global EXERCISE_TEMPLATES, DIET_TEMPLATES
+        EXERCISE_TEMPLATES, DIET_TEMPLATES = exercise_templates, diet_templates
+    return apply
 
-def generate_exercise_plan(profile: UserProfile) -> List[Dict[str, str]]:
-    intensity = {
-        "Sedentary": "Low",
-        "Lightly active": "Low to Moderate",
-        "Moderately active": "Moderate",
-        "Very active": "Moderate to High",
-        "Athlete": "High",
-    }.get(profile.activity_level, "Moderate")
-
-    base_plan = [
-        {
-            "day": "Monday",
-            "focus": "Full body strength",
-            "details": "Compound lifts (squats, push-ups, rows), 3 sets of 10–12 reps.",
-        },
-        {
-            "day": "Tuesday",
-            "focus": "Cardio + Core",
-            "details": "30–40 min brisk walk/jog + planks, crunches, leg raises.",
-        },
-        {
-            "day": "Wednesday",
-            "focus": "Lower body",
-            "details": "Lunges, glute bridges, calf raises, 3 sets of 12–15 reps.",
-        },
-        {
-            "day": "Thursday",
-            "focus": "Active recovery",
-            "details": "Light stretching, yoga, or 20–30 min easy walk.",
-        },
-        {
-            "day": "Friday",
-            "focus": "Upper body",
-            "details": "Push-ups, shoulder presses, rows, bicep curls, 3 sets of 10–12 reps.",
-        },
-        {
-            "day": "Saturday",
-            "focus": "Cardio intervals",
-            "details": "20–30 min interval training (1 min fast, 2 min easy).",
-        },
-        {
-            "day": "Sunday",
-            "focus": "Rest",
-            "details": "Full rest or gentle stretching.",
-        },
-    ]
-
-    if profile.goal == "Lose fat / weight loss":
-        for d in base_plan:
-            if "Cardio" in d["focus"] or "interval" in d["details"].lower():
-                d["details"] += " Focus on keeping heart rate in fat-burning zone."
-    elif profile.goal == "Build muscle / strength":
-        for d in base_plan:
-            if "strength" in d["focus"].lower() or "upper body" in d["focus"].lower():
-                d["details"] += " Increase weight gradually and rest 60–90s between sets."
-    elif profile.goal == "Improve overall fitness":
-        for d in base_plan:
-            d["details"] += " Keep intensity at a comfortable but challenging level."
-
-    if profile.workout_time_pref in ["Morning", "Evening"]:
-        for d in base_plan:
-            d["details"] += f" Best done in the {profile.workout_time_pref.lower()} based on your preference."
-
-    return base_plan
 
+catalog_store.subscribe(_compile_templates)
 
-def generate_diet_plan(profile: UserProfile) -> Dict[str, List[str]]:
+
+def _goal_key(goal) -> Optional[str]:
+    return goal if goal in GOALS else None
+
+
+def _restriction_key(dietary_restrictions: str) -> str:
+    restrictions = dietary_restrictions.lower()
+    if "vegan" in restrictions:
+        return "vegan"
+    if "veg" in restrictions:
+        return "veg"
+    return ""
+
+
+def exercise_template(profile: UserProfile) -> ExerciseTemplate:
+    """Shared, read-only exercise plan for this profile."""
+    time_pref = profile.workout_time_pref if profile.workout_time_pref in WORKOUT_TIMES else None
+    return EXERCISE_TEMPLATES[_goal_key(profile.goal), time_pref]
+
+
+def diet_template(profile: UserProfile) -> DietTemplate:
+    """Shared, read-only diet plan for this profile."""
     bmi_category = categorize_bmi(profile.bmi)
+    return DIET_TEMPLATES[_goal_key(profile.goal), bmi_category, _restriction_key(profile.dietary_restrictions)]
 
-    base_meals = {
-        "Breakfast": [
-            "High-protein oatmeal with nuts and seeds",
-            "Greek yogurt with berries",
-            "Vegetable omelette with whole-grain toast",
-        ],
-        "Lunch": [
-            "Grilled chicken / tofu bowl with brown rice and veggies",
-            "Mixed bean salad with olive oil dressing",
-            "Whole-grain wrap with lean protein and salad",
-        ],
-        "Snack": [
-            "Handful of nuts or seeds",
-            "Fruit with peanut butter or hummus",
-            "Protein smoothie with spinach and banana",
-        ],
-        "Dinner": [
-            "Baked fish / paneer with quinoa and steamed veggies",
-            "Stir-fry with colorful vegetables and lean protein",
-            "Lentil curry with brown rice and salad",
-        ],
-    }
 
-    if "veg" in profile.dietary_restrictions.lower():
-        for key, meals in base_meals.items():
-            base_meals[key] = [m.replace("chicken", "tofu").replace("fish", "paneer") for m in meals]
-
-    if "vegan" in profile.dietary_restrictions.lower():
-        replacements = {
-            "yogurt": "soy yogurt",
-            "Greek yogurt": "soy yogurt",
-            "paneer": "tofu",
-            "milk": "plant milk",
-        }
-        for key, meals in base_meals.items():
-            new_meals = []
-            for m in meals:
-                for src, dst in replacements.items():
-                    if src.lower() in m.lower():
-                        m = m.replace(src, dst)
-                new_meals.append(m)
-            base_meals[key] = new_meals
-
-    if profile.goal == "Lose fat / weight loss":
-        note = " Prioritize portion control and high-fiber foods to keep you full."
-    elif profile.goal == "Build muscle / strength":
-        note = " Emphasize high-protein options and include a source of protein at every meal."
-    else:
-        note = " Aim for balanced meals with lean protein, complex carbs, and healthy fats."
-
-    if bmi_category in ["Overweight", "Obese"]:
-        note += " Reduce sugary drinks and highly processed foods."
-    elif bmi_category == "Underweight":
-        note += " Add calorie-dense healthy foods like nuts, seeds, and healthy oils."
-
-    base_meals["Notes"] = [note]
-    return base_meals
+def generate_exercise_plan(profile: UserProfile) -> List[Dict[str, str]]:
+    return [d.copy() for d in exercise_template(profile)]
+
 
+def generate_diet_plan(profile: UserProfile) -> Dict[str, List[str]]:
+    return {slot: list(meals) for slot, meals in diet_template(profile).items()}
@@ -0,0 +1,184 @@
+"""
+Sampling profiler for the running backend.
+While a session is running, a daemon thread wakes every `interval` seconds,
+reads every thread's current stack from sys._current_frames() and counts it.
+The output is in the collapsed-stack format read by flamegraph.pl,
+speedscope and inferno ("root;...;leaf count" per line).
+
+Sessions can be limited to request handlers, matching stacks that pass
+through a given view function, so a flamegraph shows only where e.g.
+generate_plan or login spend their time. Nothing is hooked into the request
+path: when no session is running the profiler costs nothing.
+"""
+
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, FrozenSet, Iterable, Optional, Tuple
+
+DEFAULT_INTERVAL = 0.01
+MIN_INTERVAL = 0.001
+MAX_DURATION = 3600
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._stacks: Counter = Counter()
+        # code object -> whether it is one of the anchor functions
+        self._anchor_cache: Dict[object, bool] = {}
+        self._anchors: Optional[Tuple[FrozenSet[str], FrozenSet[str]]] = None
+        self.interval = DEFAULT_INTERVAL
+        self.route: Optional[str] = None
+        self.samples = 0
+        self.started_at: Optional[float] = None
+        self.stopped_at: Optional[float] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self, interval: float = DEFAULT_INTERVAL, duration: Optional[float] = None,
+              names: Optional[Iterable[str]] = None, files: Iterable[str] = (), route: Optional[str] = None):
+        """
+        Start a session, discarding the previous one's stacks.
+        names/files: only count stacks passing through a function with one of
+        these names defined in one of these files (None counts every thread).
+        duration: stop automatically after this many seconds.
+        """
+        with self._lock:
+            if self._thread is not None:
+                raise RuntimeError("profiler is already running")
+            self.interval = max(float(interval), MIN_INTERVAL)
+            self.route = route
+            self._anchors = None if names is None else (
+                frozenset(names), frozenset(os.path.abspath(f) for f in files)
+            )
+            self._anchor_cache = {}
+            self._stacks = Counter()
+            self.samples = 0
+            self.started_at, self.stopped_at = time.time(), None
+            self._stop.clear()
+            deadline = time.monotonic() + duration if duration else None
+            self._thread = threading.Thread(target=self._run, args=(deadline,), name="fitplan-profiler", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> bool:
+        """Stop the running session; returns False if none was running."""
+        with self._lock:
+            thread = self._thread
+            if thread is None:
+                return False
+            self._stop.set()
+        if thread is not threading.current_thread():
+            thread.join()
+        return True
+
+    def _run(self, deadline: Optional[float]):
+        own = threading.get_ident()
+        try:
+            while not self._stop.wait(self.interval):
+                self._sample(own)
+                if deadline is not None and time.monotonic() >= deadline:
+                    break
+        finally:
+            with self._lock:
+                self._thread = None
+                self.stopped_at = time.time()
+
+    def _is_anchor(self, code) -> bool:
+        hit = self._anchor_cache.get(code)
+        if hit is None:
+            names, files = self._anchors
+            hit = self._anchor_cache[code] = code.co_name in names and (
+                not files or os.path.abspath(code.co_filename) in files
+            )
+        return hit
+
+    def _sample(self, own: int):
+        stacks = self._stacks
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own:
+                continue
+            matched = self._anchors is None
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                if not matched and self._is_anchor(code):
+                    matched = True
+                stack.append(code)
+                frame = frame.f_back
+            if matched:
+                stacks[tuple(stack)] += 1
+        self.samples += 1
+
+    def collapsed(self) -> str:
+        """The counted stacks in collapsed format, root frame first, most frequent first."""
+        labels: Dict[object, str] = {}
+        lines = []
+        for stack, count in self._stacks.copy().most_common():
+            frames = []
+            for code in reversed(stack):
+                label = labels.get(code)
+                if label is None:
+                    label = labels[code] = _frame_label(code).replace(";", ":")
+                frames.append(label)
+            lines.append(f"{';'.join(frames)} {count}")
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def status(self) -> dict:
+        return {
+            "running": self.running,
+            "interval": self.interval,
+            "route": self.route,
+            "samples": self.samples,
+            "stacks": len(self._stacks),
+            "started_at": self.started_at,
+            "stopped_at": self.stopped_at,
+        }
+
+    def dump(self, directory: str) -> str:
+        """Write the collapsed stacks to <directory>/fitplan-<pid>-<time>.collapsed; returns the path."""
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"fitplan-{os.getpid()}-{int(self.started_at or time.time())}.collapsed")
+        with open(path, "w") as f:
+            f.write(self.collapsed())
+        return path
+
+
+def install_signal_handler(profiler: SamplingProfiler, signal_name: str, directory: str, start_session) -> bool:
+    """
+    Make `signal_name` (e.g. SIGUSR2) toggle a profiling session: the first
+    signal calls start_session(), the next stops it and dumps the stacks to
+    `directory`. Returns False where the signal does not exist (Windows) or
+    handlers cannot be installed (not the main thread).
+    """
+    signum = getattr(signal, signal_name, None)
+    if signum is None:
+        return False
+
+    def toggle_session():
+        if profiler.stop():
+            profiler.dump(directory)
+        else:
+            start_session()
+
+    def toggle(signum, frame):
+        # The handler runs on the main thread between bytecodes, possibly while
+        # that thread holds the profiler's lock, so the work happens elsewhere
+        threading.Thread(target=toggle_session, name="fitplan-profiler-toggle", daemon=True).start()
+
+    try:
+        signal.signal(signum, toggle)
+    except ValueError:
+        return False
+    return True
@@ -0,0 +1,434 @@
+"""
+Progress tracking store.
+Each user's calorie log is an append-only columnar log: fixed-capacity
+segments holding a uint32 day column (date ordinals) and a float64 calorie
+column. With a directory configured the segments are memory-mapped files, so
+an append is two array stores and a header update; otherwise they live in
+memory. Daily, weekly and monthly rollups are updated on every append, so
+dashboard queries never touch the log itself.
+
+Disk logs are safe to share between worker processes (flock on a per-user
+lock file), checkpoint their rollups so reopening is cheap, and only the
+most recently used ones keep files open.
+
+Configure with FITPLAN_PROGRESS_DIR, e.g.
+  FITPLAN_PROGRESS_DIR=/var/lib/fitplan/progress
+Import an existing CSV (date,calories):
+  python progress.py import progress.csv --email you@example.com --dir /var/lib/fitplan/progress
+"""
+
+import argparse
+import contextlib
+import csv
+import datetime
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from user_store import normalize_email
+
+try:
+    import fcntl
+except ImportError:  # Windows: a log must then be written by one process only
+    fcntl = None
+
+_MAGIC = b"FPP1"
+# magic, capacity, count
+_SEGMENT_HEADER = struct.Struct("<4sII")
+_SEGMENT_HEADER_SIZE = 16
+PERIODS = ("day", "week", "month")
+CHECKPOINT_VERSION = 1
+
+
+def _period_key(period: str, ordinal: int) -> int:
+    if period == "day":
+        return ordinal
+    if period == "week":
+        # Ordinal 1 (0001-01-01) is a Monday, so weeks start on Monday
+        return (ordinal - 1) // 7
+    day = datetime.date.fromordinal(ordinal)
+    return day.year * 12 + day.month - 1
+
+
+def _period_label(period: str, key: int) -> str:
+    if period == "day":
+        return datetime.date.fromordinal(key).isoformat()
+    if period == "week":
+        return datetime.date.fromordinal(key * 7 + 1).isoformat()
+    return f"{key // 12:04d}-{key % 12 + 1:02d}"
+
+
+class _Segment:
+    """One fixed-capacity block of the log: header, day column, calorie column."""
+
+    def __init__(self, buffer, capacity: int, count: int = 0):
+        self.buffer = buffer
+        self.capacity = capacity
+        self.count = count
+        view = memoryview(buffer)
+        days_end = _SEGMENT_HEADER_SIZE + capacity * 4
+        self.days = view[_SEGMENT_HEADER_SIZE:days_end].cast("I")
+        self.calories = view[days_end:days_end + capacity * 8].cast("d")
+
+    @staticmethod
+    def size(capacity: int) -> int:
+        return _SEGMENT_HEADER_SIZE + capacity * 12
+
+    @classmethod
+    def in_memory(cls, capacity: int) -> "_Segment":
+        return cls(bytearray(cls.size(capacity)), capacity)
+
+    @classmethod
+    def open(cls, path: str, capacity: int) -> "_Segment":
+        # The mapping keeps its own descriptor, so the file is closed right away
+        with os.fdopen(os.open(path, os.O_RDWR | os.O_CREAT, 0o600), "r+b") as f:
+            header = f.read(_SEGMENT_HEADER.size)
+            if len(header) == _SEGMENT_HEADER.size:
+                magic, capacity, count = _SEGMENT_HEADER.unpack(header)
+                if magic != _MAGIC:
+                    raise ValueError(f"{path} is not a progress segment")
+            else:
+                count = 0
+                f.truncate(cls.size(capacity))
+                f.seek(0)
+                f.write(_SEGMENT_HEADER.pack(_MAGIC, capacity, 0))
+                f.flush()
+            return cls(mmap.mmap(f.fileno(), cls.size(capacity)), capacity, count)
+
+    def refresh(self):
+        """Re-read the count, which another process may have advanced."""
+        if isinstance(self.buffer, mmap.mmap):
+            self.count = _SEGMENT_HEADER.unpack_from(self.buffer, 0)[2]
+
+    def append(self, ordinal: int, calories: float):
+        self.days[self.count] = ordinal
+        self.calories[self.count] = calories
+        self.count += 1
+        # The count is written last, so a torn append is simply not visible
+        _SEGMENT_HEADER.pack_into(self.buffer, 0, _MAGIC, self.capacity, self.count)
+
+    @property
+    def full(self) -> bool:
+        return self.count >= self.capacity
+
+    def close(self):
+        self.days.release()
+        self.calories.release()
+        if isinstance(self.buffer, mmap.mmap):
+            self.buffer.flush()
+            self.buffer.close()
+
+
+class ProgressLog:
+    """
+    One user's calorie log plus its incrementally maintained rollups.
+    On disk, several processes may share a log: every operation takes a
+    flock on the directory's lock file (exclusive to append, shared to read)
+    and first rolls whatever other processes appended since it last looked,
+    so each process's rollups and counts follow the files. The rollups are
+    checkpointed to rollups.json when a segment fills and on close(), so
+    opening a log replays only the entries after the checkpoint. Files are
+    opened on first use and reopened after close().
+    """
+
+    def __init__(self, directory: Optional[str] = None, segment_size: int = 4096):
+        self.directory = directory
+        self.segment_size = segment_size
+        self._lock = threading.Lock()
+        self._lock_file = None
+        self._pid = None
+        self._reset()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _reset(self):
+        self._opened = False
+        self._segments: List[_Segment] = []
+        # The next entry to roll: segment index and offset within it
+        self._tail = 0
+        self._offset = 0
+        # period -> {period key: [calorie sum, entry count]}
+        self._rollups: Dict[str, Dict[int, list]] = {period: {} for period in PERIODS}
+        self._total = 0.0
+        self._count = 0
+        self._last: Optional[Tuple[int, float]] = None
+
+    # --- files ---
+    def _segment_path(self, index: int) -> str:
+        return os.path.join(self.directory, f"seg-{index:06d}.bin")
+
+    @contextlib.contextmanager
+    def _locked(self, exclusive: bool = False):
+        with self._lock:
+            if not self.directory:
+                yield
+                return
+            if self._pid != os.getpid():
+                # First use, after close(), or in a forked child: flock only
+                # separates distinct open file descriptions
+                self._reset()
+                self._lock_file = open(os.path.join(self.directory, "lock"), "a+b")
+                self._pid = os.getpid()
+            if fcntl is not None:
+                fcntl.flock(self._lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                if not self._opened:
+                    self._load_checkpoint()
+                    self._opened = True
+                self._catch_up()
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def _catch_up(self):
+        """Open new segment files and roll the entries appended since we last looked."""
+        self._open_segments()
+        replayed = self._count
+        while self._tail < len(self._segments):
+            segment = self._segments[self._tail]
+            for i in range(self._offset, segment.count):
+                self._roll(segment.days[i], segment.calories[i])
+            self._offset = segment.count
+            if self._tail == len(self._segments) - 1:
+                break
+            self._tail += 1
+            self._offset = 0
+        if self._count - replayed > self.segment_size:
+            self._save_checkpoint()
+
+    def _open_segments(self):
+        while os.path.exists(self._segment_path(len(self._segments))):
+            self._segments.append(_Segment.open(self._segment_path(len(self._segments)), self.segment_size))
+        # Segments before the tail are full and never change
+        for segment in self._segments[self._tail:]:
+            segment.refresh()
+
+    def _checkpoint_path(self) -> str:
+        return os.path.join(self.directory, "rollups.json")
+
+    def _load_checkpoint(self):
+        try:
+            with open(self._checkpoint_path()) as f:
+                state = json.load(f)
+            if state.get("version") != CHECKPOINT_VERSION:
+                return
+            count, rollups = state["count"], state["rollups"]
+            last = tuple(state["last"]) if state["last"] else None
+            total = float(state["total"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return
+        # Place the cursor on entry `count`; a checkpoint past the end of the
+        # files (e.g. segments removed) is ignored and the log replayed
+        self._open_segments()
+        tail, offset = 0, count
+        while tail < len(self._segments) - 1 and offset >= self._segments[tail].count:
+            offset -= self._segments[tail].count
+            tail += 1
+        if count and (not self._segments or offset > self._segments[tail].count):
+            return
+        self._tail, self._offset = tail, offset
+        self._rollups = {period: {key: [value, n] for key, value, n in rollups[period]} for period in PERIODS}
+        self._total, self._count, self._last = total, count, last
+
+    def _save_checkpoint(self):
+        state = {
+            "version": CHECKPOINT_VERSION,
+            "count": self._count,
+            "total": self._total,
+            "last": list(self._last) if self._last else None,
+            "rollups": {period: [[key, *bucket] for key, bucket in self._rollups[period].items()] for period in PERIODS},
+        }
+        # Atomic, so readers (and other writers) only ever see a whole checkpoint
+        path = self._checkpoint_path()
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "w") as f:
+                json.dump(state, f, separators=(",", ":"))
+            os.replace(tmp, path)
+        except OSError:
+            pass  # the log itself is intact; the next open replays a little more
+
+    # --- entries ---
+    def _new_segment(self) -> _Segment:
+        if self.directory:
+            segment = _Segment.open(self._segment_path(len(self._segments)), self.segment_size)
+        else:
+            segment = _Segment.in_memory(self.segment_size)
+        self._segments.append(segment)
+        return segment
+
+    def _roll(self, ordinal: int, calories: float):
+        for period in PERIODS:
+            rollup = self._rollups[period]
+            key = _period_key(period, ordinal)
+            bucket = rollup.get(key)
+            if bucket is None:
+                rollup[key] = [calories, 1]
+            else:
+                bucket[0] += calories
+                bucket[1] += 1
+        self._total += calories
+        self._count += 1
+        self._last = (ordinal, calories)
+
+    def append(self, day: datetime.date, calories: float):
+        ordinal = day.toordinal()
+        calories = float(calories)
+        with self._locked(exclusive=True):
+            segment = self._segments[-1] if self._segments else None
+            if segment is None or segment.full:
+                segment = self._new_segment()
+            segment.append(ordinal, calories)
+            self._roll(ordinal, calories)
+            self._tail, self._offset = len(self._segments) - 1, segment.count
+            if self.directory and segment.full:
+                self._save_checkpoint()
+
+    def __len__(self) -> int:
+        with self._locked():
+            return self._count
+
+    def __iter__(self) -> Iterator[Tuple[datetime.date, float]]:
+        with self._locked():
+            columns = [(s.days[:s.count].tolist(), s.calories[:s.count].tolist()) for s in self._segments]
+        for days, calories in columns:
+            for ordinal, value in zip(days, calories):
+                yield datetime.date.fromordinal(ordinal), value
+
+    def _bucket(self, period: str, day: datetime.date) -> dict:
+        key = _period_key(period, day.toordinal())
+        total, count = self._rollups[period].get(key, (0.0, 0))
+        return {
+            "period": _period_label(period, key),
+            "calories": round(total, 2),
+            "entries": count,
+        }
+
+    def summary(self, today: Optional[datetime.date] = None) -> dict:
+        """Today, this week, this month and all-time totals: O(1) in history length."""
+        today = today or datetime.date.today()
+        with self._locked():
+            last = self._last
+            return {
+                "day": self._bucket("day", today),
+                "week": self._bucket("week", today),
+                "month": self._bucket("month", today),
+                "total_calories": round(self._total, 2),
+                "entries": self._count,
+                "last_entry": (
+                    {"date": datetime.date.fromordinal(last[0]).isoformat(), "calories": last[1]}
+                    if last else None
+                ),
+            }
+
+    def series(self, period: str, limit: int, end: Optional[datetime.date] = None) -> List[dict]:
+        """The last `limit` periods up to `end`, oldest first (empty periods included)."""
+        if period not in PERIODS:
+            raise ValueError(f"period must be one of {', '.join(PERIODS)}")
+        last_key = _period_key(period, (end or datetime.date.today()).toordinal())
+        with self._locked():
+            rollup = self._rollups[period]
+            rows = []
+            for key in range(last_key - limit + 1, last_key + 1):
+                total, count = rollup.get(key, (0.0, 0))
+                rows.append({"period": _period_label(period, key), "calories": round(total, 2), "entries": count})
+        return rows
+
+    def close(self):
+        """Checkpoint the rollups and release the files; a disk log reopens on next use."""
+        if self.directory and self._pid == os.getpid():
+            with self._locked(exclusive=True):
+                self._save_checkpoint()
+        with self._lock:
+            for segment in self._segments:
+                segment.close()
+            self._segments = []
+            if self._lock_file is not None:
+                self._lock_file.close()
+                self._lock_file = None
+            self._pid = None
+
+
+class ProgressStore:
+    """
+    Per-user progress logs keyed by normalized email; in memory unless `root`
+    is set. On disk, at most `max_open` logs keep their files open: the least
+    recently used one is checkpointed and closed when another is opened.
+    """
+
+    def __init__(self, root: Optional[str] = None, segment_size: int = 4096, max_open: int = 256):
+        self.root = root
+        self.segment_size = segment_size
+        self.max_open = max_open
+        self._logs: "OrderedDict[str, ProgressLog]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _directory(self, key: str) -> Optional[str]:
+        if not self.root:
+            return None
+        # Hashed so any email is a safe directory name
+        return os.path.join(self.root, hashlib.blake2b(key.encode(), digest_size=16).hexdigest())
+
+    def log(self, email: str) -> ProgressLog:
+        key = normalize_email(email)
+        evicted = []
+        with self._lock:
+            log = self._logs.get(key)
+            if log is None:
+                log = self._logs[key] = ProgressLog(self._directory(key), self.segment_size)
+            else:
+                self._logs.move_to_end(key)
+            # In-memory logs are the only copy of their data, so only disk logs are evicted
+            while self.root and len(self._logs) > self.max_open:
+                evicted.append(self._logs.popitem(last=False)[1])
+        for old in evicted:
+            old.close()
+        return log
+
+    def append(self, email: str, day: datetime.date, calories: float):
+        self.log(email).append(day, calories)
+
+    def import_csv(self, path: str, email: str) -> int:
+        """Append every `date,calories` row of a CSV file; returns the number of rows."""
+        log = self.log(email)
+        rows = 0
+        with open(path, newline="") as f:
+            for row in csv.DictReader(f):
+                log.append(datetime.date.fromisoformat(row["date"].strip()), float(row["calories"]))
+                rows += 1
+        return rows
+
+    def close(self):
+        with self._lock:
+            for log in self._logs.values():
+                log.close()
+            self._logs.clear()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Progress store tools.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    imp = sub.add_parser("import", help="Import a date,calories CSV for one user")
+    imp.add_argument("csv")
+    imp.add_argument("--email", required=True)
+    imp.add_argument("--dir", default=os.environ.get("FITPLAN_PROGRESS_DIR"), required=False)
+    args = parser.parse_args()
+
+    if not args.dir:
+        parser.error("pass --dir or set FITPLAN_PROGRESS_DIR")
+    store = ProgressStore(args.dir)
+    try:
+        rows = store.import_csv(args.csv, args.email)
+    finally:
+        store.close()
+    print(f"Imported {rows} entries for {args.email}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""
+"Profiles like me" index over the cohort.
+Finds the cohort rows (fitness.csv) nearest to a profile and recommends an
+exercise type and weekly workout frequency from what those people chose.
+
+Distance over whichever features the query supplies:
+  numeric      (value - query)^2 / cohort variance, i.e. z-score units
+  categorical  1 for every label that differs
+
+A query is a vectorized brute-force pass over typed columns: two NumPy
+expressions over (features, rows) arrays and an argpartition. A KD-tree or
+ball tree would need the same feature subset for every query and a single
+metric for labels and numbers; at cohort sizes the flat scan answers in
+well under a millisecond anyway.
+
+The index copies its columns from a CohortAnalytics engine and keeps up by
+copying only the rows appended since the last sync(). Variances come from
+running sums, so new rows never trigger a full rebuild.
+"""
+
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+NUMERIC_FEATURES = ("Age", "Height_cm", "Weight_kg", "Daily_Step_Count", "Resting_Heart_Rate")
+CATEGORICAL_FEATURES = (
+    "Gender", "Fitness_Goal", "Activity_Level", "Preferred_Workout_Time", "Dietary_Preference", "Chronic_Condition",
+)
+# What neighbours vote on
+EXERCISE_TYPE = "Preferred_Exercise_Type"
+FREQUENCY = "Weekly_Workout_Frequency"
+_NUMERIC = NUMERIC_FEATURES + (FREQUENCY,)
+_CATEGORICAL = CATEGORICAL_FEATURES + (EXERCISE_TYPE,)
+
+# Request field (as sent to /api/generate-plan) -> cohort column
+REQUEST_FIELDS = {
+    "age": "Age",
+    "height": "Height_cm",
+    "weight": "Weight_kg",
+    "daily_step_count": "Daily_Step_Count",
+    "resting_heart_rate": "Resting_Heart_Rate",
+    "gender": "Gender",
+    "fitness_goal": "Fitness_Goal",
+    "activity_level": "Activity_Level",
+    "preferred_workout_time": "Preferred_Workout_Time",
+    "dietary_preference": "Dietary_Preference",
+    "chronic_condition": "Chronic_Condition",
+}
+DEFAULT_NEIGHBORS = 10
+
+
+def request_features(data: dict) -> Dict[str, object]:
+    """Cohort-column features from a request body; ValueError for a bad number."""
+    features = {}
+    for field, column in REQUEST_FIELDS.items():
+        value = data.get(field)
+        if value is None or value == "":
+            continue
+        if column in NUMERIC_FEATURES:
+            value = float(value)
+            if not np.isfinite(value):
+                raise ValueError(f"{field} must be a finite number")
+        else:
+            value = str(value).strip()
+        features[column] = value
+    return features
+
+
+def _number(value) -> float:
+    value = float(value)
+    return int(value) if value.is_integer() else value
+
+
+class ProfileIndex:
+    def __init__(self, capacity: int = 1024):
+        self._lock = threading.Lock()
+        self._capacity = capacity
+        # Feature-major, so each feature's values for all rows are contiguous.
+        # float32 and the engine's uint16 codes halve the bytes a query scans.
+        self._numeric = np.zeros((len(_NUMERIC), capacity), np.float32)
+        self._codes = np.zeros((len(_CATEGORICAL), capacity), np.uint16)
+        self._labels: Dict[str, List[str]] = {name: [] for name in _CATEGORICAL}
+        # Running sums relative to the first batch's means, for the variances
+        self._shift: Optional[np.ndarray] = None
+        self._sum = np.zeros(len(NUMERIC_FEATURES))
+        self._sumsq = np.zeros(len(NUMERIC_FEATURES))
+        # Everything a query reads, swapped in as one tuple after each sync:
+        # (rows, numeric, codes, 1 / variance, label -> code per column)
+        self._state = (0, self._numeric, self._codes, np.ones(len(NUMERIC_FEATURES)), {})
+
+    def __len__(self) -> int:
+        return self._state[0]
+
+    @classmethod
+    def from_cohort(cls, engine) -> "ProfileIndex":
+        index = cls(max(len(engine), 1024))
+        index.sync(engine)
+        return index
+
+    def sync(self, engine) -> int:
+        """Copy the rows `engine` (a CohortAnalytics) gained since the last sync; returns how many."""
+        if len(engine) == len(self):
+            return 0
+        with self._lock:
+            start, end = len(self), len(engine)
+            if end <= start:
+                return 0
+            if end > self._capacity:
+                while self._capacity < end:
+                    self._capacity *= 2
+                numeric = np.zeros((len(_NUMERIC), self._capacity), np.float32)
+                codes = np.zeros((len(_CATEGORICAL), self._capacity), np.uint16)
+                numeric[:, :start] = self._numeric[:, :start]
+                codes[:, :start] = self._codes[:, :start]
+                self._numeric, self._codes = numeric, codes
+            for i, name in enumerate(_NUMERIC):
+                self._numeric[i, start:end] = engine.column(name)[start:end]
+            for i, name in enumerate(_CATEGORICAL):
+                self._codes[i, start:end] = engine.column(name)[start:end]
+                self._labels[name] = engine.labels(name)
+
+            added = self._numeric[:len(NUMERIC_FEATURES), start:end].astype(np.float64)
+            if self._shift is None:
+                self._shift = added.mean(axis=1)
+            centered = added - self._shift[:, None]
+            self._sum += centered.sum(axis=1)
+            self._sumsq += np.square(centered).sum(axis=1)
+            variance = self._sumsq / end - np.square(self._sum / end)
+            scale = np.where(variance > 1e-12, 1 / np.maximum(variance, 1e-12), 1.0).astype(np.float32)
+            label_codes = {name: {label: i for i, label in enumerate(labels)} for name, labels in self._labels.items()}
+            self._state = (end, self._numeric, self._codes, scale, label_codes)
+        return end - start
+
+    # --- queries ---
+    def query(self, features: Dict[str, object], k: int = DEFAULT_NEIGHBORS) -> Tuple[np.ndarray, np.ndarray]:
+        """Row numbers of the k nearest rows, nearest first, and their distances."""
+        n, numeric, codes, scale, label_codes = self._state
+        k = min(k, n)
+        if k <= 0:
+            return np.zeros(0, np.intp), np.zeros(0)
+        distance = np.zeros(n, np.float32)
+        used = [i for i, name in enumerate(NUMERIC_FEATURES) if name in features]
+        if used:
+            point = np.array([features[NUMERIC_FEATURES[i]] for i in used], dtype=np.float32)
+            # A slice instead of a fancy-indexed copy when every feature is used
+            rows = slice(0, len(used)) if len(used) == len(NUMERIC_FEATURES) else used
+            distance += scale[rows] @ np.square(numeric[rows, :n] - point[:, None])
+        used = [i for i, name in enumerate(CATEGORICAL_FEATURES) if name in features]
+        if used:
+            # A label the cohort has never seen gets a code no row has
+            point = []
+            for i in used:
+                codes_of = label_codes.get(CATEGORICAL_FEATURES[i], {})
+                point.append(codes_of.get(features[CATEGORICAL_FEATURES[i]], len(codes_of)))
+            point = np.array(point, dtype=np.uint16)
+            rows = slice(0, len(used)) if len(used) == len(CATEGORICAL_FEATURES) else used
+            distance += (codes[rows, :n] != point[:, None]).sum(axis=0, dtype=np.float32)
+        nearest = np.argpartition(distance, k - 1)[:k] if k < n else np.arange(n)
+        nearest = nearest[np.argsort(distance[nearest], kind="stable")]
+        return nearest, np.sqrt(distance[nearest].astype(np.float64))
+
+    def neighbors(self, features: Dict[str, object], k: int = DEFAULT_NEIGHBORS) -> List[dict]:
+        """The k nearest cohort rows as dicts keyed like fitness.csv, plus their distance."""
+        nearest, distance = self.query(features, k)
+        _, numeric, codes, _, _ = self._state
+        rows = []
+        for row, d in zip(nearest.tolist(), distance.tolist()):
+            record = {name: _number(numeric[i, row]) for i, name in enumerate(_NUMERIC)}
+            record.update({name: self._labels[name][codes[i, row]] for i, name in enumerate(_CATEGORICAL)})
+            record["distance"] = round(d, 4)
+            rows.append(record)
+        return rows
+
+    def recommend(self, features: Dict[str, object], k: int = DEFAULT_NEIGHBORS) -> Optional[dict]:
+        """
+        The exercise type most of the k nearest rows prefer (votes weighted by
+        1 / (1 + distance)), their median weekly workouts, and the share of
+        neighbours that agree. None while the index is empty.
+        """
+        nearest, distance = self.query(features, k)
+        if not len(nearest):
+            return None
+        _, numeric, codes, _, _ = self._state
+        types = codes[len(CATEGORICAL_FEATURES), nearest]
+        votes = np.bincount(types, weights=1 / (1 + distance))
+        best = int(votes.argmax())
+        return {
+            "exercise_type": self._labels[EXERCISE_TYPE][best],
+            "weekly_workouts": int(round(float(np.median(numeric[len(NUMERIC_FEATURES), nearest])))),
+            "agreement": round(float((types == best).mean()), 2),
+            "neighbors": len(nearest),
+        }
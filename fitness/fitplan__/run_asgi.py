@@ -0,0 +1,46 @@
+"""
+ASGI Backend Server - Production Entry Point
+Serves the same API as run_backend.py on uvicorn (uvloop + httptools when
+installed): persistent keep-alive connections, HTTP/1.1 pipelining and
+multiple worker processes.
+Usage: python run_asgi.py [--port 8000] [--workers 4] [--keep-alive 30] [--preload]
+"""
+
+import argparse
+import os
+
+import uvicorn
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the plan API on an ASGI server.")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("FITPLAN_WORKERS", 1)),
+                        help="Worker processes (pair with FITPLAN_SHARED_CACHE to share cached plans)")
+    parser.add_argument("--keep-alive", type=int, default=30, help="Idle keep-alive timeout in seconds")
+    parser.add_argument("--backlog", type=int, default=2048)
+    parser.add_argument("--preload", action="store_true",
+                        help="Each worker warms its caches before it accepts requests")
+    args = parser.parse_args()
+
+    if args.preload:
+        # Read by backend_api at import time, in every worker process
+        os.environ["FITPLAN_PRELOAD"] = "1"
+
+    uvicorn.run(
+        "asgi_app:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        loop="auto",
+        http="auto",
+        timeout_keep_alive=args.keep_alive,
+        backlog=args.backlog,
+        access_log=False,
+        log_level="warning",
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,27 @@
 """
 Flask Backend Server - Standalone Script
 Run this to start the Flask API backend server
-Usage: python run_backend.py
+Usage: python run_backend.py [--preload]
+  --preload   load the cohort and warm caches before accepting requests
 """
 
-from backend_api import app
+import argparse
+import time
 
-if __name__ == '__main__':
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the plan API on the Flask server.")
+    parser.add_argument("--preload", action="store_true", help="Warm caches before accepting requests")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    from backend_api import app, warm_up
+    print(f"Imported backend in {(time.perf_counter() - started) * 1000:.0f} ms")
+    if args.preload:
+        timings = warm_up()
+        print("Preloaded: " + ", ".join(f"{step} {ms:.0f} ms" for step, ms in timings.items()))
     app.run(debug=True, port=5000, host='0.0.0.0')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,252 @@
+"""
+Shared response cache for multi-process deployments.
+Every WSGI worker on a host opens the same backend, so a plan computed by
+one worker is served from cache by all the others.
+
+Backends:
+  MmapCacheBackend   fixed-size hash table in a memory-mapped file (POSIX)
+  RedisCacheBackend  a Redis server, for sharing across hosts (needs redis-py)
+
+Configure with FITPLAN_SHARED_CACHE, e.g.
+  FITPLAN_SHARED_CACHE=/dev/shm/fitplan-cache.bin
+  FITPLAN_SHARED_CACHE=redis://localhost:6379/0
+"""
+
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+_MAGIC = b"FPC1"
+_FILE_HEADER = struct.Struct("<4sII")
+_FILE_HEADER_SIZE = 64
+# hash, key length, value length, expiry (unix time, 0 = never)
+_SLOT_HEADER = struct.Struct("<QIId")
+_MAX_PROBES = 8
+
+
+class SharedCacheBackend:
+    """Interface for shared cache tiers. Keys and values are bytes."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.errors = 0
+
+    def get(self, key: bytes) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def set(self, key: bytes, value: bytes, ttl: Optional[float] = None):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "writes": self.writes,
+            "errors": self.errors,
+        }
+
+
+class MmapCacheBackend(SharedCacheBackend):
+    """
+    Open-addressing hash table stored in a memory-mapped file.
+    Each slot holds one zlib-compressed value; a full probe window overwrites
+    the home slot, so the table never grows past slots * slot_size bytes.
+    Readers take a shared flock and writers an exclusive one.
+    """
+
+    def __init__(self, path: str, slots: int = 16384, slot_size: int = 2048):
+        super().__init__()
+        if fcntl is None:
+            raise RuntimeError("MmapCacheBackend needs fcntl (POSIX only)")
+        self.path = path
+        self.slots = slots
+        self.slot_size = slot_size
+        self._capacity = slot_size - _SLOT_HEADER.size
+        self._lock = threading.Lock()
+        self._pid = None
+        self._file = None
+        self._map = None
+
+    def _open(self):
+        # Reopen after fork: flock only separates distinct open file descriptions
+        if self._pid == os.getpid():
+            return
+        size = _FILE_HEADER_SIZE + self.slots * self.slot_size
+        f = os.fdopen(os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600), "r+b")
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            f.seek(0)
+            header = f.read(_FILE_HEADER.size)
+            if len(header) < _FILE_HEADER.size or _FILE_HEADER.unpack(header) != (_MAGIC, self.slots, self.slot_size):
+                f.truncate(0)
+                f.truncate(size)
+                f.seek(0)
+                f.write(_FILE_HEADER.pack(_MAGIC, self.slots, self.slot_size))
+                f.flush()
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+        self._file = f
+        self._map = mmap.mmap(f.fileno(), size)
+        self._pid = os.getpid()
+
+    def _hash(self, key: bytes) -> int:
+        # 0 marks an empty slot
+        return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little") | 1
+
+    def _offset(self, index: int) -> int:
+        return _FILE_HEADER_SIZE + index * self.slot_size
+
+    def get(self, key: bytes) -> Optional[bytes]:
+        h = self._hash(key)
+        try:
+            with self._lock:
+                self._open()
+                fcntl.flock(self._file, fcntl.LOCK_SH)
+                try:
+                    value = self._lookup(h, key)
+                finally:
+                    fcntl.flock(self._file, fcntl.LOCK_UN)
+        except (OSError, ValueError):
+            self.errors += 1
+            return None
+        if value is None:
+            self.misses += 1
+            return None
+        try:
+            value = zlib.decompress(value)
+        except zlib.error:
+            self.errors += 1
+            return None
+        self.hits += 1
+        return value
+
+    def _lookup(self, h: int, key: bytes) -> Optional[bytes]:
+        m = self._map
+        for probe in range(_MAX_PROBES):
+            offset = self._offset((h + probe) % self.slots)
+            slot_hash, key_len, value_len, expires_at = _SLOT_HEADER.unpack_from(m, offset)
+            if slot_hash == 0:
+                return None
+            if slot_hash != h:
+                continue
+            start = offset + _SLOT_HEADER.size
+            if m[start:start + key_len] != key:
+                continue
+            if expires_at and expires_at <= time.time():
+                return None
+            return m[start + key_len:start + key_len + value_len]
+        return None
+
+    def set(self, key: bytes, value: bytes, ttl: Optional[float] = None):
+        value = zlib.compress(value, 1)
+        if len(key) + len(value) > self._capacity:
+            return
+        h = self._hash(key)
+        expires_at = time.time() + ttl if ttl else 0.0
+        try:
+            with self._lock:
+                self._open()
+                fcntl.flock(self._file, fcntl.LOCK_EX)
+                try:
+                    offset = self._find_slot(h, key)
+                    m = self._map
+                    start = offset + _SLOT_HEADER.size
+                    m[start:start + len(key)] = key
+                    m[start + len(key):start + len(key) + len(value)] = value
+                    _SLOT_HEADER.pack_into(m, offset, h, len(key), len(value), expires_at)
+                finally:
+                    fcntl.flock(self._file, fcntl.LOCK_UN)
+        except (OSError, ValueError):
+            self.errors += 1
+            return
+        self.writes += 1
+
+    def _find_slot(self, h: int, key: bytes) -> int:
+        m = self._map
+        now = time.time()
+        for probe in range(_MAX_PROBES):
+            offset = self._offset((h + probe) % self.slots)
+            slot_hash, key_len, _, expires_at = _SLOT_HEADER.unpack_from(m, offset)
+            if slot_hash == 0 or (expires_at and expires_at <= now):
+                return offset
+            start = offset + _SLOT_HEADER.size
+            if slot_hash == h and m[start:start + key_len] == key:
+                return offset
+        return self._offset(h % self.slots)
+
+    def clear(self):
+        with self._lock:
+            self._open()
+            fcntl.flock(self._file, fcntl.LOCK_EX)
+            try:
+                for index in range(self.slots):
+                    _SLOT_HEADER.pack_into(self._map, self._offset(index), 0, 0, 0, 0.0)
+            finally:
+                fcntl.flock(self._file, fcntl.LOCK_UN)
+
+
+class RedisCacheBackend(SharedCacheBackend):
+    def __init__(self, url: str, prefix: bytes = b"fitplan:"):
+        super().__init__()
+        import redis
+
+        self._client = redis.Redis.from_url(url)
+        self._prefix = prefix
+
+    def get(self, key: bytes) -> Optional[bytes]:
+        try:
+            value = self._client.get(self._prefix + key)
+        except Exception:
+            self.errors += 1
+            return None
+        if value is None:
+            self.misses += 1
+            return None
+        try:
+            value = zlib.decompress(value)
+        except zlib.error:
+            self.errors += 1
+            return None
+        self.hits += 1
+        return value
+
+    def set(self, key: bytes, value: bytes, ttl: Optional[float] = None):
+        try:
+            self._client.set(self._prefix + key, zlib.compress(value, 1), px=int(ttl * 1000) if ttl else None)
+        except Exception:
+            self.errors += 1
+            return
+        self.writes += 1
+
+    def clear(self):
+        for key in self._client.scan_iter(self._prefix + b"*"):
+            self._client.delete(key)
+
+
+def open_shared_cache(spec: Optional[str]) -> Optional[SharedCacheBackend]:
+    """Build a backend from a FITPLAN_SHARED_CACHE value; None/empty disables it."""
+    if not spec:
+        return None
+    if spec.startswith(("redis://", "rediss://", "unix://")):
+        return RedisCacheBackend(spec)
+    if spec.startswith("mmap://"):
+        spec = spec[len("mmap://"):]
+    return MmapCacheBackend(spec)
@@ -0,0 +1,335 @@
+"""
+User stores.
+UserStore keeps users in memory, keyed by normalized email (primary index)
+with a secondary case-folded username index, so login by either identifier
+is O(1). SqliteUserStore persists the same records in SQLite (WAL mode) and
+serves reads from a bounded in-memory hot index. Passwords are kept only as
+salted scrypt hashes (hash_password / verify_password).
+"""
+
+import hashlib
+import hmac
+import json
+import os
+import queue
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional
+
+
+def normalize_email(email: str) -> str:
+    return email.strip().lower()
+
+
+def normalize_username(username: str) -> str:
+    return username.strip().casefold()
+
+
+# scrypt cost parameters: about 50 ms and 16 MB per hash
+SCRYPT_N, SCRYPT_R, SCRYPT_P = 2 ** 14, 8, 1
+_SCRYPT_PREFIX = "scrypt$"
+
+
+def _scrypt(password: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+    return hashlib.scrypt(password.encode("utf-8"), salt=salt, n=n, r=r, p=p, maxmem=256 * r * n * 2, dklen=32)
+
+
+def hash_password(password: str) -> str:
+    """Salted scrypt hash, stored as scrypt$n$r$p$salt$hash (hex)."""
+    salt = os.urandom(16)
+    digest = _scrypt(password, salt, SCRYPT_N, SCRYPT_R, SCRYPT_P)
+    return f"{_SCRYPT_PREFIX}{SCRYPT_N}${SCRYPT_R}${SCRYPT_P}${salt.hex()}${digest.hex()}"
+
+
+def verify_password(password, stored: Optional[str]) -> bool:
+    """Check a password against hash_password() output, in constant time."""
+    if not isinstance(password, str) or not stored or not stored.startswith(_SCRYPT_PREFIX):
+        return False
+    try:
+        n, r, p, salt, digest = stored[len(_SCRYPT_PREFIX):].split("$")
+        expected = bytes.fromhex(digest)
+        actual = _scrypt(password, bytes.fromhex(salt), int(n), int(r), int(p))
+    except ValueError:
+        return False
+    return hmac.compare_digest(actual, expected)
+
+
+class UserRecord:
+    __slots__ = ("email", "username", "password", "extra")
+
+    def __init__(self, email: str, username: str, password: Optional[str], extra: Optional[dict] = None):
+        self.email = email
+        self.username = username
+        # hash_password() output; never the password itself
+        self.password = password
+        # Any other signup fields (name, profile data...); None when there are none
+        self.extra = extra or None
+
+    @classmethod
+    def from_signup(cls, data: dict) -> "UserRecord":
+        extra = {k: v for k, v in data.items() if k not in cls.__slots__}
+        password = data.get("password")
+        password = hash_password(password) if isinstance(password, str) else None
+        return cls(data.get("email", ""), data.get("username", ""), password, extra)
+
+    def to_dict(self) -> dict:
+        data = dict(self.extra or {})
+        data.update(email=self.email, username=self.username, password=self.password)
+        return data
+
+
+class UserStore:
+    def __init__(self):
+        self._by_email: Dict[str, UserRecord] = {}
+        self._by_username: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def add(self, record: UserRecord) -> bool:
+        """Insert a new user. Returns False if the email is already registered."""
+        key = normalize_email(record.email)
+        with self._lock:
+            if key in self._by_email:
+                return False
+            self._by_email[key] = record
+            # First registration keeps a username, as the old linear scan did
+            self._by_username.setdefault(normalize_username(record.username), key)
+        return True
+
+    def get(self, email: str) -> Optional[UserRecord]:
+        return self._by_email.get(normalize_email(email))
+
+    def get_by_username(self, username: str) -> Optional[UserRecord]:
+        key = self._by_username.get(normalize_username(username))
+        return self._by_email.get(key) if key is not None else None
+
+    def find(self, identifier: str) -> Optional[UserRecord]:
+        """Look a user up by email, falling back to username."""
+        return self.get(identifier) or self.get_by_username(identifier)
+
+    def __contains__(self, email: str) -> bool:
+        return normalize_email(email) in self._by_email
+
+    def __len__(self) -> int:
+        return len(self._by_email)
+
+    def __iter__(self) -> Iterator[UserRecord]:
+        return iter(list(self._by_email.values()))
+
+
+# ===============================
+# PERSISTENT STORE (SQLite, WAL)
+# ===============================
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY,
+    email_key TEXT NOT NULL UNIQUE,
+    username_key TEXT NOT NULL,
+    email TEXT NOT NULL,
+    username TEXT NOT NULL,
+    password TEXT,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS users_username_key ON users (username_key, id);
+"""
+_INSERT = (
+    "INSERT OR IGNORE INTO users (email_key, username_key, email, username, password, extra) "
+    "VALUES (?, ?, ?, ?, ?, ?)"
+)
+_SELECT_COLUMNS = "SELECT email, username, password, extra FROM users "
+_BY_EMAIL = _SELECT_COLUMNS + "WHERE email_key = ?"
+_BY_USERNAME = _SELECT_COLUMNS + "WHERE username_key = ? ORDER BY id LIMIT 1"
+
+
+class _PendingWrite:
+    __slots__ = ("record", "done", "inserted", "error")
+
+    def __init__(self, record: UserRecord):
+        self.record = record
+        self.done = threading.Event()
+        self.inserted = False
+        self.error = None
+
+
+class SqliteUserStore:
+    """
+    Same interface as UserStore, backed by a SQLite database in WAL mode.
+    Reads use a small pool of connections; signups are queued to one writer
+    thread that commits them in batches (group commit). Opening the store does
+    not scan the table, so restart time is independent of the number of users.
+    """
+
+    def __init__(self, path: str, pool_size: int = 4, hot_size: int = 100_000,
+                 batch_size: int = 256, batch_wait: float = 0.0):
+        self.path = path
+        self.hot_size = hot_size
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self._hot = OrderedDict()
+        self._hot_usernames = OrderedDict()
+        self._hot_lock = threading.Lock()
+
+        writer = self._connect()
+        writer.executescript(_SCHEMA)
+        writer.commit()
+        self._pool = queue.LifoQueue()
+        for _ in range(pool_size):
+            self._pool.put(self._connect())
+        self._writes = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, args=(writer,), daemon=True)
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False, cached_statements=32)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextmanager
+    def _connection(self):
+        conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    # --- hot index ---
+    def _remember(self, key: str, record: UserRecord):
+        with self._hot_lock:
+            self._hot[key] = record
+            self._hot.move_to_end(key)
+            if len(self._hot) > self.hot_size:
+                self._hot.popitem(last=False)
+
+    def _recall(self, key: str) -> Optional[UserRecord]:
+        with self._hot_lock:
+            record = self._hot.get(key)
+            if record is not None:
+                self._hot.move_to_end(key)
+            return record
+
+    # --- writes ---
+    def _write_loop(self, conn: sqlite3.Connection):
+        while True:
+            batch = [self._writes.get()]
+            if batch[0] is None:
+                return
+            # Group commit: take whatever queued up while the last batch was
+            # committing (optionally waiting batch_wait seconds for more)
+            try:
+                while len(batch) < self.batch_size:
+                    if self.batch_wait:
+                        item = self._writes.get(timeout=self.batch_wait)
+                    else:
+                        item = self._writes.get_nowait()
+                    if item is None:
+                        self._writes.put(None)
+                        break
+                    batch.append(item)
+            except queue.Empty:
+                pass
+            self._commit_batch(conn, batch)
+
+    def _commit_batch(self, conn: sqlite3.Connection, batch: List[_PendingWrite]):
+        try:
+            with conn:
+                for pending in batch:
+                    r = pending.record
+                    cur = conn.execute(_INSERT, (
+                        normalize_email(r.email), normalize_username(r.username), r.email, r.username,
+                        r.password, json.dumps(r.extra) if r.extra else None,
+                    ))
+                    pending.inserted = cur.rowcount == 1
+        except sqlite3.Error as e:
+            for pending in batch:
+                pending.inserted, pending.error = False, e
+        for pending in batch:
+            if pending.inserted:
+                self._remember(normalize_email(pending.record.email), pending.record)
+            pending.done.set()
+
+    def add(self, record: UserRecord) -> bool:
+        """Insert a new user; blocks until its batch is committed. False if the email exists."""
+        if self._recall(normalize_email(record.email)) is not None:
+            return False
+        pending = _PendingWrite(record)
+        self._writes.put(pending)
+        pending.done.wait()
+        if pending.error is not None:
+            raise pending.error
+        return pending.inserted
+
+    def add_many(self, records: Iterable[UserRecord]) -> int:
+        """Bulk import in one transaction; returns how many were inserted."""
+        with self._connection() as conn, conn:
+            before = conn.total_changes
+            conn.executemany(_INSERT, (
+                (normalize_email(r.email), normalize_username(r.username), r.email, r.username,
+                 r.password, json.dumps(r.extra) if r.extra else None)
+                for r in records
+            ))
+            return conn.total_changes - before
+
+    # --- reads ---
+    @staticmethod
+    def _record(row) -> Optional[UserRecord]:
+        if row is None:
+            return None
+        email, username, password, extra = row
+        return UserRecord(email, username, password, json.loads(extra) if extra else None)
+
+    def get(self, email: str) -> Optional[UserRecord]:
+        key = normalize_email(email)
+        record = self._recall(key)
+        if record is None:
+            with self._connection() as conn:
+                record = self._record(conn.execute(_BY_EMAIL, (key,)).fetchone())
+            if record is not None:
+                self._remember(key, record)
+        return record
+
+    def get_by_username(self, username: str) -> Optional[UserRecord]:
+        username_key = normalize_username(username)
+        with self._hot_lock:
+            email_key = self._hot_usernames.get(username_key)
+        if email_key is not None:
+            record = self._recall(email_key)
+            if record is not None:
+                return record
+        with self._connection() as conn:
+            record = self._record(conn.execute(_BY_USERNAME, (username_key,)).fetchone())
+        if record is not None:
+            email_key = normalize_email(record.email)
+            self._remember(email_key, record)
+            with self._hot_lock:
+                self._hot_usernames[username_key] = email_key
+                if len(self._hot_usernames) > self.hot_size:
+                    self._hot_usernames.popitem(last=False)
+        return record
+
+    def find(self, identifier: str) -> Optional[UserRecord]:
+        return self.get(identifier) or self.get_by_username(identifier)
+
+    def __contains__(self, email: str) -> bool:
+        return self.get(email) is not None
+
+    def __len__(self) -> int:
+        with self._connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+
+    def __iter__(self) -> Iterator[UserRecord]:
+        with self._connection() as conn:
+            rows = conn.execute(_SELECT_COLUMNS + "ORDER BY id").fetchall()
+        return (self._record(row) for row in rows)
+
+    def close(self):
+        self._writes.put(None)
+        self._writer.join()
+        while not self._pool.empty():
+            self._pool.get().close()
+
+
+def open_user_store(path: Optional[str] = None):
+    """SqliteUserStore when a database path is configured, else the in-memory UserStore."""
+    return SqliteUserStore(path) if path else UserStore()
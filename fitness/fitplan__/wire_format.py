@@ -0,0 +1,111 @@
+"""
+Response encodings: content negotiation for compact binary formats and
+compression for JSON bodies.
+
+Binary formats (optional dependencies, offered only when installed):
+  application/msgpack   needs msgpack
+  application/cbor      needs cbor2
+Content encodings for JSON: gzip always, br when brotli is installed.
+"""
+
+import gzip
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import cbor2
+except ImportError:
+    cbor2 = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+JSON_TYPE = "application/json"
+BINARY_ENCODERS: Dict[str, Callable[[object], bytes]] = {}
+if msgpack is not None:
+    BINARY_ENCODERS["application/msgpack"] = msgpack.packb
+    BINARY_ENCODERS["application/x-msgpack"] = msgpack.packb
+if cbor2 is not None:
+    BINARY_ENCODERS["application/cbor"] = cbor2.dumps
+
+# Bodies smaller than this are sent uncompressed
+MIN_COMPRESS_SIZE = 256
+# Only bodies up to this size (single plans, the catalog) have their
+# compressed form memoized; batch responses are compressed every time, so the
+# memo holds at most MEMO_ENTRIES * MAX_MEMO_SIZE bytes of bodies (~16 MB)
+MAX_MEMO_SIZE = 16 * 1024
+MEMO_ENTRIES = 1024
+
+
+def _parse_header(header: Optional[str]) -> List[Tuple[str, float]]:
+    """Split an Accept/Accept-Encoding header into (value, q), highest q first."""
+    items = []
+    for position, part in enumerate((header or "").split(",")):
+        value, _, params = part.partition(";")
+        value = value.strip().lower()
+        if not value:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, number = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(number)
+                except ValueError:
+                    q = 0.0
+        items.append((-q, position, value))
+    return [(value, -neg_q) for neg_q, _, value in sorted(items)]
+
+
+def negotiate_binary(accept: Optional[str]) -> Optional[str]:
+    """The binary media type to answer with, or None for JSON."""
+    for media_type, q in _parse_header(accept):
+        if q <= 0:
+            continue
+        if media_type in BINARY_ENCODERS:
+            return media_type
+        if media_type in (JSON_TYPE, "application/*", "*/*"):
+            return None
+    return None
+
+
+def encode_binary(media_type: str, obj) -> bytes:
+    return BINARY_ENCODERS[media_type](obj)
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    accepted = {value: q for value, q in _parse_header(accept_encoding)}
+    if brotli is not None and accepted.get("br", 0) > 0:
+        return "br"
+    if accepted.get("gzip", 0) > 0:
+        return "gzip"
+    return None
+
+
+def _compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6, mtime=0)
+
+
+# Single-plan and catalog bodies repeat across requests
+_compress_memo = lru_cache(maxsize=MEMO_ENTRIES)(_compress)
+
+
+def compress_body(body: bytes, accept_encoding: Optional[str]) -> Tuple[bytes, Optional[str]]:
+    """Returns (body, content encoding or None)."""
+    if len(body) < MIN_COMPRESS_SIZE:
+        return body, None
+    encoding = choose_encoding(accept_encoding)
+    if encoding is None:
+        return body, None
+    if len(body) <= MAX_MEMO_SIZE:
+        return _compress_memo(body, encoding), encoding
+    return _compress(body, encoding), encoding